@@ -0,0 +1,27 @@
+"""product keyset pagination indexes
+
+Revision ID: 0029_product_keyset_indexes
+Revises: 0028_wishlist_items
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0029_product_keyset_indexes"
+down_revision = "0028_wishlist_items"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_products_created_at_id", "products", ["created_at", "id"])
+    op.create_index("ix_products_base_price_id", "products", ["base_price", "id"])
+    op.create_index("ix_products_name_id", "products", ["name", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_name_id", table_name="products")
+    op.drop_index("ix_products_base_price_id", table_name="products")
+    op.drop_index("ix_products_created_at_id", table_name="products")
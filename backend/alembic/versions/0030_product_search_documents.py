@@ -0,0 +1,52 @@
+"""product search documents
+
+Revision ID: 0030_product_search_documents
+Revises: 0029_product_keyset_indexes
+Create Date: 2026-10-17
+
+Documents are populated by the catalog write paths; backfill existing rows with
+`python -m app.cli reindex-search` after upgrading.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+import uuid
+
+
+# revision identifiers, used by Alembic.
+revision = "0030_product_search_documents"
+down_revision = "0029_product_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_search_documents",
+        sa.Column("id", sa.UUID(as_uuid=True), primary_key=True, default=uuid.uuid4),
+        sa.Column("product_id", sa.UUID(as_uuid=True), sa.ForeignKey("products.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("lang", sa.String(length=10), nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("product_id", "lang", name="uq_product_search_product_lang"),
+    )
+    op.create_index("ix_product_search_documents_product_id", "product_search_documents", ["product_id"])
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX ix_product_search_documents_fts ON product_search_documents "
+            "USING gin (to_tsvector('simple'::regconfig, content))"
+        )
+        op.execute(
+            "CREATE INDEX ix_product_search_documents_title_trgm ON product_search_documents "
+            "USING gin (title gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_product_search_documents_title_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_product_search_documents_fts")
+    op.drop_index("ix_product_search_documents_product_id", table_name="product_search_documents")
+    op.drop_table("product_search_documents")
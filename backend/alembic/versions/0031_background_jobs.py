@@ -0,0 +1,45 @@
+"""background job queue
+
+Revision ID: 0031_background_jobs
+Revises: 0030_product_search_documents
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0031_background_jobs'
+down_revision = '0030_product_search_documents'
+branch_labels = None
+depends_on = None
+
+job_status = sa.Enum('pending', 'running', 'succeeded', 'failed', name='jobstatus')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'background_jobs',
+        sa.Column('id', sa.UUID(as_uuid=True), primary_key=True),
+        sa.Column('kind', sa.String(length=64), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', job_status, nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='5'),
+        sa.Column('run_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('locked_by', sa.String(length=128), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_background_jobs_kind', 'background_jobs', ['kind'])
+    op.create_index('ix_background_jobs_status_run_at', 'background_jobs', ['status', 'run_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_background_jobs_status_run_at', table_name='background_jobs')
+    op.drop_index('ix_background_jobs_kind', table_name='background_jobs')
+    op.drop_table('background_jobs')
+    job_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,40 @@
+"""audit events
+
+Revision ID: 0032_audit_events
+Revises: 0031_background_jobs
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0032_audit_events'
+down_revision = '0031_background_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audit_events',
+        sa.Column('id', sa.UUID(as_uuid=True), primary_key=True),
+        sa.Column('request_id', sa.String(length=64), nullable=False),
+        sa.Column('method', sa.String(length=16), nullable=False),
+        sa.Column('path', sa.String(length=512), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(length=64), nullable=True),
+        sa.Column('client_ip', sa.String(length=64), nullable=True),
+        sa.Column('duration_ms', sa.Integer(), nullable=False),
+        sa.Column('request_payload', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_audit_events_user_id', 'audit_events', ['user_id'])
+    op.create_index('ix_audit_events_created_at', 'audit_events', ['created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audit_events_created_at', table_name='audit_events')
+    op.drop_index('ix_audit_events_user_id', table_name='audit_events')
+    op.drop_table('audit_events')
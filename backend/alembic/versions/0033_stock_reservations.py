@@ -0,0 +1,42 @@
+"""stock reservations
+
+Revision ID: 0033_stock_reservations
+Revises: 0032_audit_events
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0033_stock_reservations'
+down_revision = '0032_audit_events'
+branch_labels = None
+depends_on = None
+
+reservation_status = sa.Enum('active', 'committed', 'released', name='reservationstatus')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stock_reservations',
+        sa.Column('id', sa.UUID(as_uuid=True), primary_key=True),
+        sa.Column('product_id', sa.UUID(as_uuid=True), sa.ForeignKey('products.id'), nullable=False),
+        sa.Column('variant_id', sa.UUID(as_uuid=True), sa.ForeignKey('product_variants.id'), nullable=True),
+        sa.Column('order_id', sa.UUID(as_uuid=True), sa.ForeignKey('orders.id'), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('status', reservation_status, nullable=False, server_default='active'),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('released_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_stock_reservations_order_id', 'stock_reservations', ['order_id'])
+    op.create_index('ix_stock_reservations_status_expires_at', 'stock_reservations', ['status', 'expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stock_reservations_status_expires_at', table_name='stock_reservations')
+    op.drop_index('ix_stock_reservations_order_id', table_name='stock_reservations')
+    op.drop_table('stock_reservations')
+    reservation_status.drop(op.get_bind(), checkfirst=True)
@@ -1,16 +1,25 @@
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import security
 from app.core.config import settings
 from app.core.dependencies import require_admin
+from app.db import query_stats, replicas
+from app.db.replicas import get_read_session
 from app.db.session import get_session
 from app.models.catalog import Product, ProductAuditLog, Category
 from app.models.content import ContentBlock, ContentAuditLog
+from app.middleware import backpressure
+from app.services import audit as audit_service
 from app.services import exporter as exporter_service
+from app.services import inventory
+from app.services import jobs as jobs_service
+from app.services import recently_viewed
+from app.services import user_cache
 from app.models.order import Order
 from app.models.user import User, RefreshSession, UserRole
 from app.models.promo import PromoCode
@@ -20,7 +29,7 @@ router = APIRouter(prefix="/admin/dashboard", tags=["admin"])
 
 @router.get("/summary")
 async def admin_summary(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     _: str = Depends(require_admin),
 ) -> dict:
     products_total = await session.scalar(select(func.count()).select_from(Product).where(Product.is_deleted.is_(False)))
@@ -50,7 +59,7 @@ async def admin_summary(
 
 
 @router.get("/products")
-async def admin_products(session: AsyncSession = Depends(get_session), _: str = Depends(require_admin)) -> list[dict]:
+async def admin_products(session: AsyncSession = Depends(get_read_session), _: str = Depends(require_admin)) -> list[dict]:
     stmt = (
         select(Product, Category.name)
         .join(Category, Product.category_id == Category.id)
@@ -76,7 +85,7 @@ async def admin_products(session: AsyncSession = Depends(get_session), _: str =
 
 
 @router.get("/orders")
-async def admin_orders(session: AsyncSession = Depends(get_session), _: str = Depends(require_admin)) -> list[dict]:
+async def admin_orders(session: AsyncSession = Depends(get_read_session), _: str = Depends(require_admin)) -> list[dict]:
     stmt = (
         select(Order, User.email)
         .join(User, Order.user_id == User.id, isouter=True)
@@ -99,7 +108,7 @@ async def admin_orders(session: AsyncSession = Depends(get_session), _: str = De
 
 
 @router.get("/users")
-async def admin_users(session: AsyncSession = Depends(get_session), _: str = Depends(require_admin)) -> list[dict]:
+async def admin_users(session: AsyncSession = Depends(get_read_session), _: str = Depends(require_admin)) -> list[dict]:
     result = await session.execute(select(User).order_by(User.created_at.desc()).limit(20))
     users = result.scalars().all()
     return [
@@ -115,7 +124,7 @@ async def admin_users(session: AsyncSession = Depends(get_session), _: str = Dep
 
 
 @router.get("/content")
-async def admin_content(session: AsyncSession = Depends(get_session), _: str = Depends(require_admin)) -> list[dict]:
+async def admin_content(session: AsyncSession = Depends(get_read_session), _: str = Depends(require_admin)) -> list[dict]:
     result = await session.execute(select(ContentBlock).order_by(ContentBlock.updated_at.desc()).limit(20))
     blocks = result.scalars().all()
     return [
@@ -131,7 +140,7 @@ async def admin_content(session: AsyncSession = Depends(get_session), _: str = D
 
 
 @router.get("/coupons")
-async def admin_coupons(session: AsyncSession = Depends(get_session), _: str = Depends(require_admin)) -> list[dict]:
+async def admin_coupons(session: AsyncSession = Depends(get_read_session), _: str = Depends(require_admin)) -> list[dict]:
     result = await session.execute(select(PromoCode).order_by(PromoCode.created_at.desc()).limit(20))
     promos = result.scalars().all()
     return [
@@ -213,7 +222,7 @@ async def admin_update_coupon(
 
 
 @router.get("/audit")
-async def admin_audit(session: AsyncSession = Depends(get_session), _: str = Depends(require_admin)) -> dict:
+async def admin_audit(session: AsyncSession = Depends(get_read_session), _: str = Depends(require_admin)) -> dict:
     product_audit_stmt = (
         select(ProductAuditLog)
         .options()
@@ -265,6 +274,7 @@ async def revoke_sessions(
     if sessions:
         session.add_all(sessions)
         await session.commit()
+    user_cache.invalidate(user_id)
     return None
 
 
@@ -310,8 +320,55 @@ async def export_data(session: AsyncSession = Depends(get_session), _: str = Dep
     return await exporter_service.export_json(session)
 
 
+@router.get("/jobs")
+async def job_queue_stats(session: AsyncSession = Depends(get_session), _: str = Depends(require_admin)) -> dict:
+    return await jobs_service.queue_stats(session)
+
+
+@router.get("/audit-sink")
+async def audit_sink_stats(_: str = Depends(require_admin)) -> dict:
+    return audit_service.sink.stats()
+
+
+@router.get("/recently-viewed")
+async def recently_viewed_stats(_: str = Depends(require_admin)) -> dict:
+    return recently_viewed.buffer.stats()
+
+
+@router.get("/stock-reservations")
+async def stock_reservation_stats(
+    session: AsyncSession = Depends(get_session), _: str = Depends(require_admin)
+) -> dict:
+    return {**inventory.sweeper.stats(), **await inventory.active_totals(session)}
+
+
+@router.get("/backpressure")
+async def backpressure_stats(_: str = Depends(require_admin)) -> dict:
+    return backpressure.limiter_stats()
+
+
+@router.get("/queries")
+async def query_fingerprints(
+    limit: int = Query(default=20, ge=1, le=200),
+    order_by: str = Query(default="total_ms", pattern="^(total_ms|calls|max_ms|n_plus_one)$"),
+    _: str = Depends(require_admin),
+) -> list[dict]:
+    return query_stats.top(limit, order_by)
+
+
+@router.get("/replicas")
+async def replica_stats(_: str = Depends(require_admin)) -> dict:
+    replica_set = replicas.get_replica_set()
+    return replica_set.stats() if replica_set is not None else {"replicas": [], "primary_fallbacks": 0}
+
+
+@router.get("/password-hashing")
+async def password_hashing_stats(_: str = Depends(require_admin)) -> dict:
+    return security.hasher.stats()
+
+
 @router.get("/low-stock")
-async def low_stock_products(session: AsyncSession = Depends(get_session), _: str = Depends(require_admin)) -> list[dict]:
+async def low_stock_products(session: AsyncSession = Depends(get_read_session), _: str = Depends(require_admin)) -> list[dict]:
     stmt = (
         select(Product)
         .where(Product.stock_quantity < 5, Product.is_deleted.is_(False), Product.is_active.is_(True))
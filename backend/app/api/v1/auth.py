@@ -1,12 +1,12 @@
 from pathlib import Path
-import secrets
+import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
 from urllib.parse import urlencode
 
 from jose import jwt
 
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, Response, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile, status
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -28,15 +28,17 @@ from app.schemas.auth import (
 )
 from app.schemas.user import UserCreate
 from app.services import auth as auth_service
-from app.services import email as email_service
+from app.services import jobs as jobs_service
+from app.services import media_cache
 from app.services import storage
+from app.services import user_cache
 from app.core import metrics
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 logger = logging.getLogger(__name__)
 
 register_rate_limit = per_identifier_limiter(
-    lambda r: r.client.host if r.client else "anon", settings.auth_rate_limit_register, 60
+    lambda r: r.client.host if r.client else "anon", settings.auth_rate_limit_register, 60, namespace="auth:register"
 )
 login_rate_limit = limiter("auth:login", settings.auth_rate_limit_login, 60)
 refresh_rate_limit = limiter("auth:refresh", settings.auth_rate_limit_refresh, 60)
@@ -46,6 +48,7 @@ google_rate_limit = per_identifier_limiter(
     lambda r: r.client.host if r.client else "anon",
     settings.auth_rate_limit_google,
     60,
+    namespace="auth:google",
 )
 
 
@@ -160,12 +163,13 @@ async def refresh_tokens(
 async def logout(
     payload: RefreshRequest,
     session: AsyncSession = Depends(get_session),
-    _: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user),
     response: Response = None,
 ) -> None:
     payload_data = decode_token(payload.refresh_token)
     if payload_data and payload_data.get("jti"):
         await auth_service.revoke_refresh_token(session, payload_data["jti"], reason="logout")
+    user_cache.invalidate(current_user.id)
     if response:
         clear_refresh_cookie(response)
     return None
@@ -177,9 +181,9 @@ async def change_password(
     session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> dict:
-    if not security.verify_password(payload.current_password, current_user.hashed_password):
+    if not await security.verify_password_async(payload.current_password, current_user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Current password is incorrect")
-    current_user.hashed_password = security.hash_password(payload.new_password)
+    current_user.hashed_password = await security.hash_password_async(payload.new_password)
     session.add(current_user)
     await session.flush()
     return {"detail": "Password updated"}
@@ -187,12 +191,11 @@ async def change_password(
 
 @router.post("/verify/request", status_code=status.HTTP_202_ACCEPTED)
 async def request_email_verification(
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ) -> dict:
     record = await auth_service.create_email_verification(session, current_user)
-    background_tasks.add_task(email_service.send_verification_email, current_user.email, record.token)
+    await jobs_service.enqueue(session, "email.verification", {"to_email": current_user.email, "token": record.token})
     return {"detail": "Verification email sent"}
 
 
@@ -232,7 +235,11 @@ async def upload_avatar(
     avatars_root = Path(settings.media_root) / "avatars"
     extension = Path(file.filename or "").suffix.lower() or ".png"
     filename = f"avatar-{current_user.id}{extension}"
-    url_path, saved_name = storage.save_upload(
+    previous = avatars_root / filename
+    if previous.is_file():
+        # Same path, new bytes: drop the old file's resized copies instead of leaving them to LRU eviction.
+        await asyncio.to_thread(media_cache.remove_for_source, previous)
+    url_path, saved_name = await storage.save_upload_async(
         file,
         root=avatars_root,
         filename=filename,
@@ -241,7 +248,8 @@ async def upload_avatar(
     )
     current_user.avatar_url = url_path
     session.add(current_user)
-    await session.flush()
+    await session.commit()
+    await session.refresh(current_user)
     return UserResponse.model_validate(current_user)
 
 
@@ -253,12 +261,11 @@ async def admin_ping(admin_user: User = Depends(require_admin)) -> dict[str, str
 @router.post("/password-reset/request", status_code=status.HTTP_202_ACCEPTED)
 async def request_password_reset(
     payload: PasswordResetRequest,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_session),
     _: None = Depends(reset_request_rate_limit),
 ) -> dict[str, str]:
     reset = await auth_service.create_reset_token(session, payload.email)
-    background_tasks.add_task(email_service.send_password_reset, payload.email, reset.token)
+    await jobs_service.enqueue(session, "email.password_reset", {"to_email": payload.email, "token": reset.token})
     return {"status": "sent"}
 
 
@@ -324,10 +331,9 @@ async def google_callback(
     if existing_email and not existing_email.google_sub:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Account exists; linking required")
 
-    password_placeholder = security.hash_password(secrets.token_urlsafe(16))
     user = User(
         email=email,
-        hashed_password=password_placeholder,
+        hashed_password=security.unusable_password(),
         name=name,
         avatar_url=picture,
         google_sub=sub,
@@ -378,7 +384,7 @@ async def google_link(
     _: None = Depends(google_rate_limit),
 ) -> UserResponse:
     _validate_google_state(payload.state, "google_link", str(current_user.id))
-    if not security.verify_password(payload.password, current_user.hashed_password):
+    if not await security.verify_password_async(payload.password, current_user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid password")
     profile = await auth_service.exchange_google_code(payload.code)
     sub = profile.get("sub")
@@ -417,7 +423,7 @@ async def google_unlink(
     session: AsyncSession = Depends(get_session),
     _: None = Depends(google_rate_limit),
 ) -> UserResponse:
-    if not security.verify_password(payload.password, current_user.hashed_password):
+    if not await security.verify_password_async(payload.password, current_user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid password")
     current_user.google_sub = None
     current_user.google_email = None
@@ -2,14 +2,16 @@ from uuid import UUID
 from decimal import Decimal
 
 import uuid
-from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.dependencies import get_current_user_optional
 from app.db.session import get_session
 from app.schemas.cart import CartItemCreate, CartItemRead, CartItemUpdate, CartRead
 from app.schemas.promo import PromoCodeRead, PromoCodeCreate
 from app.services import cart as cart_service
+from app.services import guest_cart
 from app.services import order as order_service
 from app.schemas.cart_sync import CartSyncRequest
 
@@ -20,6 +22,27 @@ def session_header(x_session_id: str | None = Header(default=None)) -> str | Non
     return x_session_id
 
 
+def cart_token_header(x_cart_token: str | None = Header(default=None)) -> str | None:
+    return x_cart_token
+
+
+def uses_cart_token(current_user) -> bool:
+    """Anonymous carts are kept client-side when ``cart_guest_storage`` is ``token``."""
+    return current_user is None and settings.cart_guest_storage == "token"
+
+
+def _item_read(item_id: UUID, line: guest_cart.GuestLine, price: Decimal) -> CartItemRead:
+    return CartItemRead(
+        id=item_id,
+        product_id=line.product_id,
+        variant_id=line.variant_id,
+        quantity=line.quantity,
+        max_quantity=line.max_quantity,
+        note=line.note,
+        unit_price_at_add=price,
+    )
+
+
 @router.get("", response_model=CartRead)
 async def get_cart(
     session: AsyncSession = Depends(get_session),
@@ -27,16 +50,19 @@ async def get_cart(
     session_id: str | None = Depends(session_header),
     shipping_method_id: UUID | None = Query(default=None),
     promo_code: str | None = Query(default=None),
+    response: Response = None,
+    cart_token: str | None = Depends(cart_token_header),
 ):
-    if not current_user and not session_id:
-        session_id = f"guest-{uuid.uuid4()}"
-    cart = await cart_service.get_cart(session, getattr(current_user, "id", None) if current_user else None, session_id)
-    await session.refresh(cart)
-    if session_id and not cart.session_id:
-        cart.session_id = session_id
-        session.add(cart)
-        await session.commit()
-        await session.refresh(cart)
+    if uses_cart_token(current_user):
+        state = guest_cart.decode(cart_token)
+        cart = await guest_cart.hydrate(session, state)
+        response.headers[guest_cart.TOKEN_HEADER] = guest_cart.encode(guest_cart.prune(state, cart))
+    else:
+        if not current_user and not session_id:
+            session_id = f"guest-{uuid.uuid4()}"
+        cart = await cart_service.get_cart_view(
+            session, getattr(current_user, "id", None) if current_user else None, session_id
+        )
     shipping_method = None
     if shipping_method_id:
         shipping_method = await order_service.get_shipping_method(session, shipping_method_id)
@@ -45,7 +71,7 @@ async def get_cart(
     promo = None
     if promo_code:
         promo = await cart_service.validate_promo(session, promo_code, currency=None)
-    return await cart_service.serialize_cart(session, cart, shipping_method=shipping_method, promo=promo)
+    return cart_service.cart_read(cart, shipping_method=shipping_method, promo=promo)
 
 
 @router.post("/items", response_model=CartItemRead, status_code=status.HTTP_201_CREATED)
@@ -54,7 +80,23 @@ async def add_item(
     session: AsyncSession = Depends(get_session),
     current_user=Depends(get_current_user_optional),
     session_id: str | None = Depends(session_header),
+    response: Response = None,
+    cart_token: str | None = Depends(cart_token_header),
 ):
+    if uses_cart_token(current_user):
+        state = guest_cart.decode(cart_token)
+        existing = next(
+            (l for l in state.lines if l.product_id == payload.product_id and l.variant_id == payload.variant_id), None
+        )
+        if existing is not None:
+            payload = payload.model_copy(update={"quantity": existing.quantity + payload.quantity})
+        product, variant = await cart_service.validate_line(session, payload)
+        line = guest_cart.put_line(
+            state,
+            guest_cart.GuestLine(product.id, payload.variant_id, payload.quantity, payload.note, payload.max_quantity),
+        )
+        response.headers[guest_cart.TOKEN_HEADER] = guest_cart.encode(state)
+        return _item_read(state.line_id(line), line, cart_service.unit_price(product, variant))
     if not current_user and not session_id:
         session_id = f"guest-{uuid.uuid4()}"
     cart = await cart_service.get_cart(session, getattr(current_user, "id", None) if current_user else None, session_id)
@@ -76,7 +118,25 @@ async def update_item(
     session: AsyncSession = Depends(get_session),
     current_user=Depends(get_current_user_optional),
     session_id: str | None = Depends(session_header),
+    response: Response = None,
+    cart_token: str | None = Depends(cart_token_header),
 ):
+    if uses_cart_token(current_user):
+        state = guest_cart.decode(cart_token)
+        line = state.find(item_id)
+        product, variant = await cart_service.validate_line(
+            session,
+            CartItemCreate(
+                product_id=line.product_id,
+                variant_id=line.variant_id,
+                quantity=payload.quantity,
+                max_quantity=line.max_quantity,
+            ),
+        )
+        line.quantity = payload.quantity
+        line.note = payload.note
+        response.headers[guest_cart.TOKEN_HEADER] = guest_cart.encode(state)
+        return _item_read(item_id, line, cart_service.unit_price(product, variant))
     cart = await cart_service.get_cart(session, getattr(current_user, "id", None) if current_user else None, session_id)
     item = await cart_service.update_item(session, cart, item_id, payload)
     return CartItemRead(
@@ -95,7 +155,15 @@ async def delete_item(
     session: AsyncSession = Depends(get_session),
     current_user=Depends(get_current_user_optional),
     session_id: str | None = Depends(session_header),
+    response: Response = None,
+    cart_token: str | None = Depends(cart_token_header),
 ):
+    if uses_cart_token(current_user):
+        state = guest_cart.decode(cart_token)
+        line = state.find(item_id)
+        state.lines.remove(line)
+        response.headers[guest_cart.TOKEN_HEADER] = guest_cart.encode(state)
+        return None
     cart = await cart_service.get_cart(session, getattr(current_user, "id", None) if current_user else None, session_id)
     await cart_service.delete_item(session, cart, item_id)
     return None
@@ -106,11 +174,13 @@ async def merge_guest_cart(
     session: AsyncSession = Depends(get_session),
     current_user=Depends(get_current_user_optional),
     session_id: str | None = Depends(session_header),
+    cart_token: str | None = Depends(cart_token_header),
 ):
     if not current_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Auth required to merge guest cart")
     user_cart = await cart_service.get_cart(session, current_user.id, None)
-    merged_cart = await cart_service.merge_guest_cart(session, user_cart, session_id)
+    token_items = (await guest_cart.hydrate(session, guest_cart.decode(cart_token))).items if cart_token else []
+    merged_cart = await cart_service.merge_guest_cart(session, user_cart, session_id, token_items)
     return await cart_service.serialize_cart(session, merged_cart)
 
 
@@ -128,7 +198,20 @@ async def sync_cart(
     session: AsyncSession = Depends(get_session),
     current_user=Depends(get_current_user_optional),
     session_id: str | None = Depends(session_header),
+    response: Response = None,
+    cart_token: str | None = Depends(cart_token_header),
 ):
+    if uses_cart_token(current_user):
+        state = guest_cart.GuestCartState(cart_id=guest_cart.decode(cart_token).cart_id)
+        line_payloads = [CartItemCreate(**item.model_dump()) for item in payload.items]
+        checked = await cart_service.validate_lines(session, line_payloads)
+        for item, (product, _) in zip(payload.items, checked):
+            guest_cart.put_line(
+                state, guest_cart.GuestLine(product.id, item.variant_id, item.quantity, item.note, item.max_quantity)
+            )
+        token_cart = await guest_cart.hydrate(session, state)
+        response.headers[guest_cart.TOKEN_HEADER] = guest_cart.encode(state)
+        return cart_service.cart_read(token_cart)
     if not current_user and not session_id:
         session_id = f"guest-{uuid.uuid4()}"
     cart = await cart_service.get_cart(session, getattr(current_user, "id", None) if current_user else None, session_id)
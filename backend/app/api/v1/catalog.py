@@ -1,12 +1,15 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
 from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core import cache, http_cache
 from app.core.dependencies import require_admin, get_current_user_optional
+from app.db.replicas import get_read_session
 from app.db.session import get_session
 from app.models.catalog import Category, Product, ProductReview, ProductStatus
 from app.schemas.catalog import (
@@ -28,54 +31,97 @@ from app.schemas.catalog import (
     ProductFeedItem,
 )
 from app.services import catalog as catalog_service
+from app.services import exporter as exporter_service
+from app.services import jobs as jobs_service
+from app.services import product_import as product_import_service
 from app.services import storage
 
 router = APIRouter(prefix="/catalog", tags=["catalog"])
 
+_category_list_adapter = TypeAdapter(list[CategoryRead])
+_product_list_adapter = TypeAdapter(list[ProductRead])
+_featured_collection_list_adapter = TypeAdapter(list[FeaturedCollectionRead])
+
+
+def _render(adapter: TypeAdapter, value) -> bytes:
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
 
 @router.get("/categories", response_model=list[CategoryRead])
 async def list_categories(
-    session: AsyncSession = Depends(get_session), lang: str | None = Query(default=None, pattern="^(en|ro)$")
-) -> list[Category]:
-    query = select(Category).order_by(Category.sort_order, Category.name)
-    if lang:
-        query = query.options(selectinload(Category.translations))
-    result = await session.execute(query)
-    categories = list(result.scalars())
-    if lang:
-        for cat in categories:
-            catalog_service.apply_category_translation(cat, lang)
-    return categories
+    request: Request,
+    session: AsyncSession = Depends(get_read_session),
+    lang: str | None = Query(default=None, pattern="^(en|ro)$"),
+) -> Response:
+    async def load() -> bytes:
+        query = select(Category).order_by(Category.sort_order, Category.name)
+        if lang:
+            query = query.options(selectinload(Category.translations))
+        result = await session.execute(query)
+        categories = list(result.scalars())
+        if lang:
+            for cat in categories:
+                catalog_service.apply_category_translation(cat, lang)
+        return _render(_category_list_adapter, categories)
+
+    return await cache.cached_json_response(cache.CATALOG_NAMESPACE, request, load)
 
 
 @router.get("/products", response_model=ProductListResponse)
 async def list_products(
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    session: AsyncSession = Depends(get_read_session),
     category_slug: str | None = Query(default=None),
     is_featured: bool | None = Query(default=None),
     search: str | None = Query(default=None),
     min_price: float | None = Query(default=None, ge=0),
     max_price: float | None = Query(default=None, ge=0),
     tags: list[str] | None = Query(default=None),
-    sort: str | None = Query(default=None, description="newest|price_asc|price_desc|name_asc|name_desc"),
+    sort: str | None = Query(default=None, description="newest|price_asc|price_desc|name_asc|name_desc|relevance"),
     page: int = Query(default=1, ge=1),
     limit: int = Query(default=20, ge=1, le=100),
     lang: str | None = Query(default=None, pattern="^(en|ro)$"),
-) -> ProductListResponse:
-    offset = (page - 1) * limit
-    items, total_items = await catalog_service.list_products_with_filters(
-        session, category_slug, is_featured, search, min_price, max_price, tags, sort, limit, offset, lang=lang
-    )
-    total_pages = max(1, (total_items + limit - 1) // limit) if total_items else 1
-    return ProductListResponse(
-        items=items,
-        meta={"total_items": total_items, "total_pages": total_pages, "page": page, "limit": limit},
-    )
+    cursor: str | None = Query(default=None, description="Opaque next_cursor from a previous page (keyset mode)"),
+    include_total: bool = Query(default=True, description="Skip the total count query when false"),
+) -> Response:
+    async def load() -> bytes:
+        offset = (page - 1) * limit
+        items, total_items, next_cursor = await catalog_service.list_products_with_filters(
+            session,
+            category_slug,
+            is_featured,
+            search,
+            min_price,
+            max_price,
+            tags,
+            sort,
+            limit,
+            offset,
+            lang=lang,
+            cursor=cursor,
+            include_total=include_total,
+        )
+        total_pages = None
+        if total_items is not None:
+            total_pages = max(1, (total_items + limit - 1) // limit) if total_items else 1
+        response = ProductListResponse(
+            items=items,
+            meta={
+                "total_items": total_items,
+                "total_pages": total_pages,
+                "page": page,
+                "limit": limit,
+                "next_cursor": next_cursor,
+            },
+        )
+        return response.model_dump_json().encode("utf-8")
+
+    return await cache.cached_json_response(cache.CATALOG_NAMESPACE, request, load)
 
 
 @router.get("/products/feed", response_model=list[ProductFeedItem])
 async def product_feed(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     lang: str | None = Query(default=None, pattern="^(en|ro)$"),
 ) -> list[ProductFeedItem]:
     return await catalog_service.get_product_feed(session, lang=lang)
@@ -83,12 +129,12 @@ async def product_feed(
 
 @router.get("/products/feed.csv", response_class=StreamingResponse)
 async def product_feed_csv(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     lang: str | None = Query(default=None, pattern="^(en|ro)$"),
 ):
-    content = await catalog_service.get_product_feed_csv(session, lang=lang)
-    headers = {"Content-Disposition": 'attachment; filename="product_feed.csv"'}
-    return StreamingResponse(iter([content]), media_type="text/csv", headers=headers)
+    return exporter_service.csv_streaming_response(
+        session, catalog_service.iter_product_feed_csv(session, lang=lang), "product_feed.csv"
+    )
 
 
 # Admin endpoints
@@ -127,6 +173,7 @@ async def delete_category(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
     await session.delete(category)
     await session.commit()
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     return category
 
 
@@ -188,15 +235,15 @@ async def upload_product_image(
     if not product or product.is_deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
 
-    path, filename = storage.save_upload(
+    path, filename = await storage.save_upload_async(
         file,
         allowed_content_types=("image/png", "image/jpeg", "image/webp", "image/gif"),
         max_bytes=5 * 1024 * 1024,
-        generate_thumbnails=True,
     )
     await catalog_service.add_product_image_from_path(
         session, product, url=path, alt_text=filename, sort_order=len(product.images) + 1
     )
+    await jobs_service.enqueue(session, "media.thumbnails", {"url": path})
     await session.refresh(product)
     return product
 
@@ -212,9 +259,12 @@ async def bulk_update_products(
 
 
 @router.get("/collections/featured", response_model=list[FeaturedCollectionRead])
-async def list_featured_collections(session: AsyncSession = Depends(get_session)) -> list[FeaturedCollectionRead]:
-    collections = await catalog_service.list_featured_collections(session)
-    return [FeaturedCollectionRead.model_validate(c) for c in collections]
+async def list_featured_collections(request: Request, session: AsyncSession = Depends(get_read_session)) -> Response:
+    async def load() -> bytes:
+        collections = await catalog_service.list_featured_collections(session)
+        return _render(_featured_collection_list_adapter, collections)
+
+    return await cache.cached_json_response(cache.CATALOG_NAMESPACE, request, load)
 
 
 @router.post("/collections/featured", response_model=FeaturedCollectionRead, status_code=status.HTTP_201_CREATED)
@@ -278,9 +328,7 @@ async def export_products_csv(
     session: AsyncSession = Depends(get_session),
     _: str = Depends(require_admin),
 ):
-    content = await catalog_service.export_products_csv(session)
-    headers = {"Content-Disposition": 'attachment; filename="products.csv"'}
-    return StreamingResponse(iter([content]), media_type="text/csv", headers=headers)
+    return exporter_service.csv_streaming_response(session, catalog_service.iter_products_csv(session), "products.csv")
 
 
 @router.post("/products/import", response_model=ImportResult)
@@ -297,32 +345,45 @@ async def import_products_csv(
         content = raw.decode()
     except UnicodeDecodeError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unable to decode CSV")
-    result = await catalog_service.import_products_csv(session, content, dry_run=dry_run)
+    result = await product_import_service.import_products_csv(session, content, dry_run=dry_run)
     return ImportResult(**result)
 
 
 @router.get("/products/{slug}", response_model=ProductRead)
 async def get_product(
+    request: Request,
     slug: str,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     session_id: str | None = Query(default=None, description="Client session identifier for recently viewed tracking"),
     lang: str | None = Query(default=None, pattern="^(en|ro)$"),
     current_user=Depends(get_current_user_optional),
-) -> Product:
-    product_options = [selectinload(Product.images)]
-    if lang:
-        product_options.append(selectinload(Product.translations))
-        product_options.append(selectinload(Product.category).selectinload(Category.translations))
-    else:
-        product_options.append(selectinload(Product.category))
-    product = await catalog_service.get_product_by_slug(
-        session, slug, options=product_options, follow_history=True, lang=lang
-    )
-    if not product or product.is_deleted:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+) -> Product | Response:
+    async def load() -> Product:
+        product_options = [selectinload(Product.images)]
+        if lang:
+            product_options.append(selectinload(Product.translations))
+            product_options.append(selectinload(Product.category).selectinload(Category.translations))
+        else:
+            product_options.append(selectinload(Product.category))
+        product = await catalog_service.get_product_by_slug(
+            session, slug, options=product_options, follow_history=True, lang=lang
+        )
+        if not product or product.is_deleted:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        return product
+
+    if current_user is None and session_id is None:
+        # Anonymous views without tracking are pure reads and can be served from the cache.
+        async def render() -> bytes:
+            return ProductRead.model_validate(await load()).model_dump_json().encode("utf-8")
+
+        response = await cache.cached_json_response(cache.CATALOG_NAMESPACE, request, render)
+        return http_cache.conditional(request, response, http_cache.CATALOG_CACHE_CONTROL)
+
+    product = await load()
     if product.status == ProductStatus.published:
-        await catalog_service.record_recently_viewed(
-            session, product, getattr(current_user, "id", None) if current_user else None, session_id
+        catalog_service.record_recently_viewed(
+            product, getattr(current_user, "id", None) if current_user else None, session_id
         )
     return product
 
@@ -397,11 +458,14 @@ async def approve_review(
 
 
 @router.get("/products/{slug}/related", response_model=list[ProductRead])
-async def related_products(slug: str, session: AsyncSession = Depends(get_session)) -> list[Product]:
-    product = await catalog_service.get_product_by_slug(
-        session, slug, options=[selectinload(Product.images), selectinload(Product.category)]
-    )
-    if not product or product.is_deleted:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    related = await catalog_service.get_related_products(session, product, limit=4)
-    return related
+async def related_products(request: Request, slug: str, session: AsyncSession = Depends(get_read_session)) -> Response:
+    async def load() -> bytes:
+        product = await catalog_service.get_product_by_slug(
+            session, slug, options=[selectinload(Product.images), selectinload(Product.category)]
+        )
+        if not product or product.is_deleted:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        related = await catalog_service.get_related_products(session, product, limit=4)
+        return _render(_product_list_adapter, related)
+
+    return await cache.cached_json_response(cache.CATALOG_NAMESPACE, request, load)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Query
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import http_cache
 from app.core.config import settings
 from app.core.dependencies import get_session, require_admin
+from app.db.replicas import get_read_session
 from app.schemas.content import (
     ContentAuditRead,
     ContentBlockCreate,
@@ -14,29 +16,37 @@ from app.services import content as content_service
 router = APIRouter(prefix="/content", tags=["content"])
 
 
+def _public_block_response(request: Request, block) -> Response:
+    body = ContentBlockRead.model_validate(block).model_dump_json().encode("utf-8")
+    response = Response(content=body, media_type="application/json")
+    return http_cache.conditional(request, response, http_cache.CONTENT_CACHE_CONTROL, last_modified=block.updated_at)
+
+
 @router.get("/pages/{slug}", response_model=ContentBlockRead)
 async def get_static_page(
+    request: Request,
     slug: str,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     lang: str | None = Query(default=None, pattern="^(en|ro)$"),
-) -> ContentBlockRead:
+) -> Response:
     key = f"page.{slug}"
     block = await content_service.get_published_by_key(session, key, lang=lang)
     if not block:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Content not found")
-    return block
+    return _public_block_response(request, block)
 
 
 @router.get("/{key}", response_model=ContentBlockRead)
 async def get_content(
+    request: Request,
     key: str,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     lang: str | None = Query(default=None, pattern="^(en|ro)$"),
-) -> ContentBlockRead:
+) -> Response:
     block = await content_service.get_published_by_key(session, key, lang=lang)
     if not block:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Content not found")
-    return block
+    return _public_block_response(request, block)
 
 
 @router.get("/admin/{key}", response_model=ContentBlockRead)
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Query, Request, Response
+from fastapi.responses import FileResponse
+
+from app.core import http_cache
+from app.core.config import settings
+from app.services import media_cache
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+
+@router.get("/resize/{path:path}")
+async def resize_image(
+    path: str,
+    request: Request,
+    w: int | None = Query(default=None, ge=1, le=settings.media_resize_max_dimension),
+    h: int | None = Query(default=None, ge=1, le=settings.media_resize_max_dimension),
+    fmt: str | None = Query(default=None, max_length=8),
+    v: str | None = Query(default=None, max_length=64),
+) -> Response:
+    derivative = await media_cache.get_derivative(path, w, h, fmt)
+    # Only a URL pinned to the current source bytes may be cached as immutable.
+    cache_control = (
+        http_cache.MEDIA_DERIVATIVE_CACHE_CONTROL
+        if v == derivative.version
+        else http_cache.MEDIA_DERIVATIVE_REVALIDATE_CACHE_CONTROL
+    )
+    headers = {"ETag": derivative.etag, "Cache-Control": cache_control, "X-Media-Version": derivative.version}
+    if http_cache.is_not_modified(request, derivative.etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(derivative.path, media_type=derivative.media_type, headers=headers)
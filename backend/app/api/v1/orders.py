@@ -1,9 +1,7 @@
-import csv
-import io
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
@@ -16,8 +14,11 @@ from app.models.order import OrderStatus
 from app.schemas.cart import CartRead
 from app.schemas.order import OrderRead, OrderCreate, OrderUpdate, ShippingMethodCreate, ShippingMethodRead, OrderEventRead
 from app.services import cart as cart_service
+from app.services import guest_cart as guest_cart_service
+from app.services import inventory
 from app.services import order as order_service
-from app.services import email as email_service
+from app.services import exporter as exporter_service
+from app.services import jobs as jobs_service
 from app.schemas.checkout import GuestCheckoutRequest, GuestCheckoutResponse
 from app.schemas.user import UserCreate
 from app.schemas.address import AddressCreate
@@ -32,7 +33,6 @@ router = APIRouter(prefix="/orders", tags=["orders"])
 
 @router.post("", response_model=OrderRead, status_code=status.HTTP_201_CREATED)
 async def create_order(
-    background_tasks: BackgroundTasks,
     payload: OrderCreate,
     session: AsyncSession = Depends(get_session),
     current_user=Depends(get_current_user),
@@ -56,15 +56,25 @@ async def create_order(
         if not shipping_method:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipping method not found")
 
-    order = await order_service.build_order_from_cart(
-        session,
-        current_user.id,
-        cart,
-        payload.shipping_address_id,
-        payload.billing_address_id,
-        shipping_method,
+    reservations = await cart_service.reserve_stock_for_checkout(session, cart)
+    try:
+        order = await order_service.build_order_from_cart(
+            session,
+            current_user.id,
+            cart,
+            payload.shipping_address_id,
+            payload.billing_address_id,
+            shipping_method,
+        )
+    except Exception:
+        # No order to attach the held units to; give them back now rather than at expiry.
+        await session.rollback()
+        await inventory.release(session, reservations)
+        raise
+    await inventory.assign_order(session, reservations, order.id)
+    await jobs_service.enqueue(
+        session, "email.order_confirmation", {"order_id": str(order.id), "to_email": current_user.email}
     )
-    background_tasks.add_task(email_service.send_order_confirmation, current_user.email, order, order.items)
     return order
 
 
@@ -87,12 +97,16 @@ async def admin_list_orders(
 @router.post("/guest-checkout", response_model=GuestCheckoutResponse, status_code=status.HTTP_201_CREATED)
 async def guest_checkout(
     payload: GuestCheckoutRequest,
-    background_tasks: BackgroundTasks,
+    response: Response,
     session: AsyncSession = Depends(get_session),
     session_id: str | None = Depends(cart_api.session_header),
+    cart_token: str | None = Depends(cart_api.cart_token_header),
 ):
     # ensure cart exists
-    guest_cart = await cart_service.get_cart(session, None, session_id)
+    if cart_api.uses_cart_token(None):
+        guest_cart = await guest_cart_service.hydrate(session, guest_cart_service.decode(cart_token))
+    else:
+        guest_cart = await cart_service.get_cart(session, None, session_id)
     if not guest_cart.items:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cart is empty")
 
@@ -101,12 +115,20 @@ async def guest_checkout(
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered; please log in")
 
+    # Without a chosen password there is nothing worth hashing; the reset email below lets them set one.
     password = payload.password or secrets.token_urlsafe(12)
-    user = await auth_service.create_user(session, UserCreate(email=payload.email, password=password, name=payload.name))
+    user = await auth_service.create_user(
+        session,
+        UserCreate(email=payload.email, password=password, name=payload.name),
+        usable_password=payload.password is not None,
+    )
 
     # merge guest cart into user cart
     user_cart = await cart_service.get_cart(session, user.id, None)
-    user_cart = await cart_service.merge_guest_cart(session, user_cart, guest_cart.session_id)
+    if isinstance(guest_cart, guest_cart_service.GuestCart):
+        user_cart = await cart_service.merge_guest_cart(session, user_cart, None, guest_cart.items)
+    else:
+        user_cart = await cart_service.merge_guest_cart(session, user_cart, guest_cart.session_id)
 
     # create shipping address
     shipping_addr = await address_service.create_address(
@@ -137,26 +159,42 @@ async def guest_checkout(
 
     totals, discount_val = cart_service.calculate_totals(user_cart, shipping_method=shipping_method, promo=promo)
 
-    intent = await payments.create_payment_intent(session, user_cart, amount_cents=int(totals.total * 100))
-    order = await order_service.build_order_from_cart(
-        session,
-        user.id,
-        user_cart,
-        shipping_addr.id,
-        shipping_addr.id,
-        shipping_method=shipping_method,
-        payment_intent_id=intent["intent_id"],
-        discount=discount_val,
-    )
+    reservations = await cart_service.reserve_stock_for_checkout(session, user_cart)
+    try:
+        intent = await payments.create_payment_intent(session, user_cart, amount_cents=int(totals.total * 100))
+    except HTTPException:
+        await inventory.release(session, reservations)
+        raise
+    try:
+        order = await order_service.build_order_from_cart(
+            session,
+            user.id,
+            user_cart,
+            shipping_addr.id,
+            shipping_addr.id,
+            shipping_method=shipping_method,
+            payment_intent_id=intent["intent_id"],
+            discount=discount_val,
+        )
+    except Exception:
+        await session.rollback()
+        await inventory.release(session, reservations)
+        raise
+    await inventory.assign_order(session, reservations, order.id)
     if not payload.create_account:
         reset_token = await auth_service.create_reset_token(session, payload.email)
-        background_tasks.add_task(email_service.send_password_reset, payload.email, reset_token.token)
+        await jobs_service.enqueue(
+            session, "email.password_reset", {"to_email": payload.email, "token": reset_token.token}
+        )
+    if isinstance(guest_cart, guest_cart_service.GuestCart):
+        # The client holds the cart; hand back an empty one so a resubmit or reload cannot order it again.
+        empty = guest_cart_service.GuestCartState()
+        response.headers[guest_cart_service.TOKEN_HEADER] = guest_cart_service.encode(empty)
     return GuestCheckoutResponse(order_id=order.id, reference_code=order.reference_code, client_secret=intent["client_secret"])
 
 
 @router.patch("/admin/{order_id}", response_model=OrderRead)
 async def admin_update_order(
-    background_tasks: BackgroundTasks,
     order_id: UUID,
     payload: OrderUpdate,
     session: AsyncSession = Depends(get_session),
@@ -173,8 +211,8 @@ async def admin_update_order(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipping method not found")
     updated = await order_service.update_order(session, order, payload, shipping_method=shipping_method)
     if previous_status != updated.status and updated.status == OrderStatus.shipped and updated.user and updated.user.email:
-        background_tasks.add_task(
-            email_service.send_shipping_update, updated.user.email, updated, updated.tracking_number
+        await jobs_service.enqueue(
+            session, "email.shipping_update", {"order_id": str(updated.id), "to_email": updated.user.email}
         )
     return updated
 
@@ -215,7 +253,9 @@ async def admin_send_delivery_email(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
     if not order.user or not order.user.email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Order user email missing")
-    await email_service.send_delivery_confirmation(order.user.email, order)
+    await jobs_service.enqueue(
+        session, "email.delivery_confirmation", {"order_id": str(order.id), "to_email": order.user.email}
+    )
     return order
 
 
@@ -289,25 +329,7 @@ async def admin_export_orders(
     session: AsyncSession = Depends(get_session),
     _: str = Depends(require_admin),
 ):
-    orders = await order_service.list_orders(session)
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(["id", "reference_code", "status", "total_amount", "currency", "user_id", "created_at"])
-    for order in orders:
-        writer.writerow(
-            [
-                order.id,
-                order.reference_code,
-                order.status.value,
-                order.total_amount,
-                order.currency,
-                order.user_id,
-                order.created_at,
-            ]
-        )
-    buffer.seek(0)
-    headers = {"Content-Disposition": "attachment; filename=orders.csv"}
-    return StreamingResponse(iter([buffer.getvalue()]), media_type="text/csv", headers=headers)
+    return exporter_service.csv_streaming_response(session, order_service.iter_orders_csv(session), "orders.csv")
 
 
 @router.post("/shipping-methods", response_model=ShippingMethodRead, status_code=status.HTTP_201_CREATED)
@@ -6,7 +6,8 @@ from sqlalchemy.orm import selectinload
 from app.core.dependencies import get_current_user_optional
 from app.db.session import get_session
 from app.models.cart import Cart
-from app.services import payments
+from app.services import guest_cart, payments
+from app.services import order as order_service
 from app.api.v1 import cart as cart_api
 
 router = APIRouter(prefix="/payments", tags=["payments"])
@@ -17,7 +18,11 @@ async def create_payment_intent(
     session: AsyncSession = Depends(get_session),
     current_user=Depends(get_current_user_optional),
     session_id: str | None = Depends(cart_api.session_header),
+    cart_token: str | None = Depends(cart_api.cart_token_header),
 ):
+    if cart_api.uses_cart_token(current_user):
+        cart = await guest_cart.hydrate(session, guest_cart.decode(cart_token))
+        return await payments.create_payment_intent(session, cart)
     user_id = getattr(current_user, "id", None) if current_user else None
     query = select(Cart).options(selectinload(Cart.items))
     if user_id:
@@ -32,8 +37,13 @@ async def create_payment_intent(
 
 
 @router.post("/webhook", status_code=status.HTTP_200_OK)
-async def stripe_webhook(request: Request, stripe_signature: str | None = Header(default=None)) -> dict:
+async def stripe_webhook(
+    request: Request,
+    stripe_signature: str | None = Header(default=None),
+    session: AsyncSession = Depends(get_session),
+) -> dict:
     payload = await request.body()
     event = await payments.handle_webhook_event(payload, stripe_signature)
-    # Order status updates would occur here based on event["type"]
+    # Order status updates would occur here based on event["type"]; reserved stock is settled now.
+    await order_service.apply_payment_event(session, event)
     return {"received": True, "type": event.get("type")}
@@ -12,12 +12,16 @@ from app.api.v1 import admin_dashboard
 from app.api.v1 import payment_methods
 from app.api.v1 import wishlist
 from app.models.catalog import Product, Category
-from fastapi import Response, Depends
+from fastapi import Request, Response, Depends
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.db.session import get_session
+from app.db import replicas
+from app.db import session as db_session
+from app.db.replicas import get_read_session
+from app.core import http_cache
 from app.core.config import settings
-from app.core.metrics import snapshot as metrics_snapshot
+from app.core import metrics as metrics_registry
 
 api_router = APIRouter()
 
@@ -40,17 +44,21 @@ def healthcheck() -> dict[str, str]:
 
 
 @api_router.get("/health/ready", tags=["health"])
-def readiness() -> dict[str, str]:
-    return {"status": "ready"}
+def readiness() -> dict:
+    payload = {"status": "ready", "db_pool": db_session.pool_stats()}
+    replica_set = replicas.get_replica_set()
+    if replica_set is not None:
+        payload["db_replicas"] = replica_set.stats()
+    return payload
 
 
 @api_router.get("/metrics", tags=["metrics"])
-def metrics() -> dict:
-    return metrics_snapshot()
+def metrics() -> Response:
+    return Response(metrics_registry.render(), media_type=metrics_registry.CONTENT_TYPE)
 
 
 @api_router.get("/sitemap.xml", tags=["sitemap"])
-async def sitemap(session: AsyncSession = Depends(get_session)) -> Response:
+async def sitemap(request: Request, session: AsyncSession = Depends(get_read_session)) -> Response:
     products = (await session.execute(select(Product.slug))).scalars().all()
     categories = (await session.execute(select(Category.slug))).scalars().all()
     urls = []
@@ -65,7 +73,8 @@ async def sitemap(session: AsyncSession = Depends(get_session)) -> Response:
         for lang in langs:
             urls.append(f"<url><loc>{base}/products/{slug}?lang={lang}</loc></url>")
     body = "<?xml version=\"1.0\" encoding=\"UTF-8\"?><urlset xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\">" + "".join(urls) + "</urlset>"
-    return Response(content=body, media_type="application/xml")
+    response = Response(content=body, media_type="application/xml")
+    return http_cache.conditional(request, response, http_cache.SITEMAP_CACHE_CONTROL)
 
 
 @api_router.get("/robots.txt", tags=["sitemap"])
@@ -79,11 +88,11 @@ def robots() -> Response:
 
 
 @api_router.get("/feeds/products.json", tags=["sitemap"])
-async def product_feed(session: AsyncSession = Depends(get_session)) -> list[dict]:
+async def product_feed(request: Request, session: AsyncSession = Depends(get_read_session)) -> Response:
     result = await session.execute(select(Product.slug, Product.name, Product.base_price, Product.currency, Product.updated_at))
     rows = result.all()
     base = settings.frontend_origin.rstrip("/")
-    return [
+    items = [
         {
             "slug": slug,
             "name": name,
@@ -94,3 +103,6 @@ async def product_feed(session: AsyncSession = Depends(get_session)) -> list[dic
         }
         for slug, name, price, currency, updated_at in rows
     ]
+    last_modified = max((updated_at for *_, updated_at in rows if updated_at), default=None)
+    response = JSONResponse(content=items)
+    return http_cache.conditional(request, response, http_cache.FEED_CACHE_CONTROL, last_modified=last_modified)
@@ -1,6 +1,8 @@
 import argparse
 import asyncio
+import contextlib
 import json
+import signal
 from pathlib import Path
 from typing import Any, Dict
 
@@ -11,6 +13,8 @@ from app.models.user import User, UserRole
 from app.models.address import Address
 from app.models.catalog import Category, Product, ProductImage, ProductOption, ProductVariant, Tag
 from app.models.order import Order, OrderItem, ShippingMethod
+from app.services import jobs as jobs_service
+from app.services import search as search_service
 
 
 async def export_data(output: Path) -> None:
@@ -276,9 +280,28 @@ async def import_data(input_path: Path) -> None:
                 )
             session.add(order_obj)
         await session.commit()
+        await search_service.reindex_all(session)
     print("Import completed")
 
 
+async def reindex_search() -> None:
+    async with SessionLocal() as session:
+        indexed = await search_service.reindex_all(session)
+    print(f"Indexed {indexed} search documents")
+
+
+async def run_worker(concurrency: int | None, once: bool) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop.set)
+    processed = await jobs_service.run_worker(
+        SessionLocal, concurrency=concurrency, once=once, stop=stop, schedule=True
+    )
+    print(f"Worker stopped after {processed} jobs")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Data portability utilities")
     sub = parser.add_subparsers(dest="command")
@@ -286,12 +309,20 @@ def main():
     exp.add_argument("--output", default="export.json", help="Output JSON path")
     imp = sub.add_parser("import-data", help="Import data from JSON")
     imp.add_argument("--input", required=True, help="Input JSON path")
+    sub.add_parser("reindex-search", help="Rebuild product search documents")
+    wrk = sub.add_parser("worker", help="Run the background job worker")
+    wrk.add_argument("--concurrency", type=int, default=None, help="Jobs to run at once (default: JOB_WORKER_CONCURRENCY)")
+    wrk.add_argument("--once", action="store_true", help="Exit once no jobs are due")
     args = parser.parse_args()
 
     if args.command == "export-data":
         asyncio.run(export_data(Path(args.output)))
     elif args.command == "import-data":
         asyncio.run(import_data(Path(args.input)))
+    elif args.command == "reindex-search":
+        asyncio.run(reindex_search())
+    elif args.command == "worker":
+        asyncio.run(run_worker(args.concurrency, args.once))
     else:
         parser.print_help()
 
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Awaitable, Callable, Protocol
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.db import replicas
+
+logger = logging.getLogger(__name__)
+
+CATALOG_NAMESPACE = "catalog"
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl_seconds: int) -> None: ...
+
+    async def generation(self, namespace: str) -> int: ...
+
+    async def bump_generation(self, namespace: str) -> None: ...
+
+    async def bumped_at(self, namespace: str) -> float | None: ...
+
+    async def clear(self) -> None: ...
+
+
+class MemoryCache:
+    """Per-process LRU cache with per-entry TTL.
+
+    Namespaces are invalidated by bumping a generation counter that is part of every key, so
+    invalidation is O(1) and stale entries simply age out of the LRU.
+    """
+
+    def __init__(self, max_entries: int = 2048) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._bumped_at: dict[str, float] = {}
+        self._lock = Lock()
+
+    async def get(self, key: str) -> bytes | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def generation(self, namespace: str) -> int:
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    async def bump_generation(self, namespace: str) -> None:
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._bumped_at[namespace] = time.time()
+
+    async def bumped_at(self, namespace: str) -> float | None:
+        with self._lock:
+            return self._bumped_at.get(namespace)
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._bumped_at.clear()
+
+
+class RedisCache:
+    """Shared cache for multi-worker deployments; requires the optional ``redis`` package."""
+
+    def __init__(self, url: str, prefix: str = "adrianaart:cache:") -> None:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("cache_backend=redis requires the 'redis' package") from exc
+        self.client = redis_asyncio.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        await self.client.set(self.prefix + key, value, ex=ttl_seconds)
+
+    async def generation(self, namespace: str) -> int:
+        value = await self.client.get(f"{self.prefix}gen:{namespace}")
+        return int(value or 0)
+
+    async def bump_generation(self, namespace: str) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(f"{self.prefix}gen:{namespace}")
+            pipe.set(f"{self.prefix}gen_at:{namespace}", time.time())
+            await pipe.execute()
+
+    async def bumped_at(self, namespace: str) -> float | None:
+        value = await self.client.get(f"{self.prefix}gen_at:{namespace}")
+        return float(value) if value is not None else None
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            await self.client.delete(key)
+
+
+def _build_backend() -> CacheBackend | None:
+    if settings.cache_backend == "redis":
+        if not settings.cache_url:
+            raise RuntimeError("cache_url must be set when cache_backend=redis")
+        return RedisCache(settings.cache_url)
+    if settings.cache_backend == "memory":
+        return MemoryCache(settings.cache_max_entries)
+    return None
+
+
+_backend: CacheBackend | None = None
+_backend_ready = False
+
+
+def get_backend() -> CacheBackend | None:
+    global _backend, _backend_ready
+    if not _backend_ready:
+        _backend = _build_backend()
+        _backend_ready = True
+    return _backend
+
+
+def request_cache_key(request: Request) -> str:
+    params = sorted(request.query_params.multi_items())
+    raw = request.url.path + "?" + "&".join(f"{k}={v}" for k, v in params)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def cached_json_response(
+    namespace: str,
+    request: Request,
+    loader: Callable[[], Awaitable[bytes]],
+    ttl_seconds: int | None = None,
+) -> Response:
+    """Serve a JSON body from the cache, calling ``loader`` to render it on a miss.
+
+    A client pinned to the primary after its own write bypasses the cache both ways, so it neither reads
+    a body cached before that write nor publishes its own. A body read from a replica is not stored
+    within ``db_read_your_writes_seconds`` of an invalidation: the replica may not have the write yet,
+    and caching its answer under the new generation would pin the stale data for the whole TTL.
+    """
+    backend = get_backend()
+    if backend is None:
+        return Response(content=await loader(), media_type="application/json")
+    if replicas.wants_primary(request):
+        return Response(content=await loader(), media_type="application/json", headers={"X-Cache": "BYPASS"})
+    try:
+        generation = await backend.generation(namespace)
+        key = f"{namespace}:{generation}:{request_cache_key(request)}"
+        cached = await backend.get(key)
+    except Exception as exc:  # pragma: no cover - a cache outage must not fail reads
+        logger.warning("cache_unavailable", extra={"error": str(exc)})
+        return Response(content=await loader(), media_type="application/json")
+    if cached is not None:
+        return Response(content=cached, media_type="application/json", headers={"X-Cache": "HIT"})
+    body = await loader()
+    try:
+        if not await _replica_may_lag(backend, namespace, request):
+            await backend.set(key, body, ttl_seconds or settings.cache_ttl_seconds)
+    except Exception as exc:  # pragma: no cover
+        logger.warning("cache_unavailable", extra={"error": str(exc)})
+    return Response(content=body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+
+async def _replica_may_lag(backend: CacheBackend, namespace: str, request: Request) -> bool:
+    if getattr(request.state, "db_replica", None) is None:
+        return False
+    bumped_at = await backend.bumped_at(namespace)
+    return bumped_at is not None and time.time() - bumped_at < settings.db_read_your_writes_seconds
+
+
+async def invalidate(namespace: str) -> None:
+    backend = get_backend()
+    if backend is None:
+        return
+    try:
+        await backend.bump_generation(namespace)
+    except Exception as exc:  # pragma: no cover
+        logger.warning("cache_invalidation_failed", extra={"namespace": namespace, "error": str(exc)})
+
+
+async def reset() -> None:
+    """Helper for tests to drop every cached entry."""
+    backend = get_backend()
+    if backend is not None:
+        await backend.clear()
@@ -1,36 +1,83 @@
-from fastapi import Depends, HTTPException, status
+from dataclasses import dataclass
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import raiseload
 
 from app.core.security import decode_token
 from app.db.session import get_session
 from app.models.user import User, UserRole
+from app.services import user_cache
 from uuid import UUID
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
+@dataclass(frozen=True)
+class Principal:
+    user_id: UUID
+    claims: dict
+
+
+_UNRESOLVED = object()
+
+
+async def get_principal(
+    request: Request, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+) -> Principal | None:
+    """Decode the bearer access token once per request; the result is kept on ``request.state``."""
+    principal = getattr(request.state, "principal", _UNRESOLVED)
+    if principal is not _UNRESOLVED:
+        return principal
+    principal = None
+    payload = decode_token(credentials.credentials) if credentials is not None else None
+    if payload and payload.get("type") == "access":
+        try:
+            principal = Principal(user_id=UUID(str(payload.get("sub"))), claims=payload)
+        except ValueError:
+            principal = None
+    request.state.principal = principal
+    return principal
+
+
+async def _load_user(request: Request, session: AsyncSession, user_id: UUID) -> User | None:
+    user = getattr(request.state, "user", None)
+    if user is not None and user.id == user_id:
+        return user
+    values = user_cache.get(user_id)
+    if values is not None:
+        user = await user_cache.attach(session, values)
+    else:
+        # The request path never reads the user's token/session collections, so skip their selectin loads;
+        # raiseload makes a later access fail loudly instead of emitting a query per relationship.
+        result = await session.execute(select(User).options(raiseload("*")).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is not None:
+            user_cache.put(user)
+    request.state.user = user
+    return user
+
+
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
     session: AsyncSession = Depends(get_session),
 ) -> User:
+    """The authenticated user, with column attributes only.
+
+    Relationships (tokens, refresh sessions, payment methods) are not loaded and raise on access, for a
+    cached user as well as a freshly selected one; query them explicitly by ``user.id`` instead.
+    """
     if credentials is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
-    payload = decode_token(credentials.credentials)
-    if not payload or payload.get("type") != "access":
+    principal = await get_principal(request, credentials)
+    if principal is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    try:
-        user_id = UUID(str(payload.get("sub")))
-    except Exception:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
-    if user_id is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
-
-    result = await session.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await _load_user(request, session, principal.user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
@@ -38,22 +85,14 @@ async def get_current_user(
 
 
 async def get_current_user_optional(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
     session: AsyncSession = Depends(get_session),
 ) -> User | None:
-    if credentials is None:
+    principal = await get_principal(request, credentials)
+    if principal is None:
         return None
-    payload = decode_token(credentials.credentials)
-    if not payload or payload.get("type") != "access":
-        return None
-
-    try:
-        user_id = UUID(str(payload.get("sub")))
-    except Exception:
-        return None
-
-    result = await session.execute(select(User).where(User.id == user_id))
-    return result.scalar_one_or_none()
+    return await _load_user(request, session, principal.user_id)
 
 
 async def require_admin(user: User = Depends(get_current_user)) -> User:
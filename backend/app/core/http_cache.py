@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+# Cache-Control policies for public, read-mostly routes.
+CATALOG_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+CONTENT_CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=600"
+SITEMAP_CACHE_CONTROL = "public, max-age=3600"
+FEED_CACHE_CONTROL = "public, max-age=900"
+# A derivative URL carrying the source's version (``v``) names fixed bytes, so clients may keep it for a year.
+MEDIA_DERIVATIVE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Without it the path can be re-uploaded in place (avatars are), so revalidate against the ETag.
+MEDIA_DERIVATIVE_REVALIDATE_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+# Headers a 304 must repeat from the 200 it stands in for (RFC 9110 §15.4.5).
+_NOT_MODIFIED_HEADERS = ("cache-control", "content-location", "date", "etag", "expires", "vary", "last-modified")
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag derived from the exact representation bytes."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match.
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def _to_http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def conditional(
+    request: Request,
+    response: Response,
+    cache_control: str,
+    last_modified: datetime | None = None,
+) -> Response:
+    """Attach validators to a fully rendered response and collapse it to a 304 when the client is current."""
+    etag = body_etag(response.body)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    if last_modified is not None:
+        response.headers["Last-Modified"] = _to_http_date(last_modified)
+    if request.method not in ("GET", "HEAD") or not is_not_modified(request, etag, last_modified):
+        return response
+    headers = {k: v for k, v in response.headers.items() if k.lower() in _NOT_MODIFIED_HEADERS}
+    return Response(status_code=304, headers=headers)
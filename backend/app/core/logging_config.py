@@ -12,7 +12,9 @@ class RequestIdFilter(logging.Filter):
     """Attach request_id from contextvars to every log record."""
 
     def filter(self, record: logging.LogRecord) -> bool:  # pragma: no cover - trivial
-        record.request_id = request_id_ctx_var.get() or "-"
+        # Records written off-request (e.g. the audit writer) carry their own request_id in ``extra``.
+        if not getattr(record, "request_id", None):
+            record.request_id = request_id_ctx_var.get() or "-"
         return True
 
 
@@ -1,14 +1,125 @@
-from collections import Counter
+"""In-process metrics registry rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms live in plain dicts behind one lock, so recording costs a dict lookup.
+With several workers, set ``metrics_multiproc_dir``: each process periodically writes a JSON snapshot
+there. A scrape of ``/metrics`` on any worker then adds up counters and histograms from every file, and
+gauges from the live processes only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import logging
+import os
 from threading import Lock
-from typing import Dict, Counter as CounterType
+from typing import Any, Callable, Dict, Iterable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
 
-_metrics: CounterType[str] = Counter()
 _lock = Lock()
+_registry: dict[str, "_Metric"] = {}
+_collectors: list[Callable[[], None]] = []
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], Any] = {}
+        _registry[name] = self
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self) -> None:
+        with _lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket counts (last one is +Inf), then the sum
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+
+# Business events (kept from the original counter-only module).
+events = Counter("app_events_total", "Business events.", ["event"])
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route template.", ["method", "route", "status"]
+)
+http_in_flight = Gauge("http_requests_in_flight", "Requests currently being served.")
+http_shed = Counter("http_requests_shed_total", "Requests rejected by backpressure.", ["priority"])
+backpressure_limit = Gauge("backpressure_concurrency_limit", "Current adaptive concurrency limit.")
+backpressure_queued = Gauge("backpressure_queued_requests", "Requests waiting for a slot.", ["priority"])
+
+db_query_duration = Histogram(
+    "db_query_duration_seconds", "Database statement execution time.", ["operation"], buckets=DB_BUCKETS
+)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.", buckets=DB_BUCKETS
+)
+db_pool_connections = Gauge("db_pool_connections", "Connections in the pool by state.", ["state"])
+
+
+def on_collect(fn: Callable[[], None]) -> Callable[[], None]:
+    """Register a callback that refreshes point-in-time gauges right before rendering."""
+    _collectors.append(fn)
+    return fn
 
 
 def _inc(key: str) -> None:
-    with _lock:
-        _metrics[key] += 1
+    events.inc(event=key)
 
 
 def record_signup() -> None:
@@ -32,10 +143,137 @@ def record_payment_failure() -> None:
 
 
 def snapshot() -> Dict[str, int]:
+    """Business event totals for this process."""
     with _lock:
-        return dict(_metrics)
+        return {key[0]: int(value) for key, value in events._values.items()}
 
 
 def reset() -> None:
+    for metric in _registry.values():
+        metric.clear()
+
+
+def collect() -> dict[str, list]:
+    """This process's values as JSON-serialisable data (the multiprocess snapshot format)."""
+    for fn in _collectors:
+        try:
+            fn()
+        except Exception as exc:  # pragma: no cover - a broken collector must not break scrapes
+            logger.warning("metrics_collector_failed", extra={"error": str(exc)})
     with _lock:
-        _metrics.clear()
+        return {
+            name: [[list(key), list(value) if isinstance(value, list) else value] for key, value in metric._values.items()]
+            for name, metric in _registry.items()
+            if metric._values
+        }
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(settings.metrics_multiproc_dir or "", f"metrics-{pid}.json")
+
+
+def write_snapshot() -> None:
+    if not settings.metrics_multiproc_dir:
+        return
+    os.makedirs(settings.metrics_multiproc_dir, exist_ok=True)
+    path = _snapshot_path(os.getpid())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(collect(), fh)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # pragma: no cover - exists but owned by someone else
+        return True
+    return True
+
+
+def _gather() -> list[dict[str, list]]:
+    if not settings.metrics_multiproc_dir:
+        return [collect()]
+    write_snapshot()
+    snapshots = []
+    for filename in os.listdir(settings.metrics_multiproc_dir):
+        if not (filename.startswith("metrics-") and filename.endswith(".json")):
+            continue
+        try:
+            pid = int(filename[len("metrics-") : -len(".json")])
+            with open(os.path.join(settings.metrics_multiproc_dir, filename), encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        if not _pid_alive(pid):
+            # Totals of exited workers still count; their gauges no longer describe anything.
+            data = {name: values for name, values in data.items() if name in _registry and _registry[name].kind != "gauge"}
+        snapshots.append(data)
+    return snapshots
+
+
+def _merge(snapshots: list[dict[str, list]]) -> dict[str, dict[tuple[str, ...], Any]]:
+    merged: dict[str, dict[tuple[str, ...], Any]] = {}
+    for data in snapshots:
+        for name, samples in data.items():
+            target = merged.setdefault(name, {})
+            for key, value in samples:
+                key = tuple(key)
+                if isinstance(value, list):
+                    current = target.get(key)
+                    target[key] = value if current is None else [a + b for a, b in zip(current, value)]
+                else:
+                    target[key] = target.get(key, 0) + value
+    return merged
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render() -> str:
+    """All metrics, across workers when multiprocess mode is on, in the text exposition format."""
+    merged = _merge(_gather())
+    lines: list[str] = []
+    for name, metric in _registry.items():
+        samples = merged.get(name)
+        if not samples:
+            continue
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        for key, value in sorted(samples.items()):
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                bounds = [repr(float(bound)) for bound in metric.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, value[:-1]):
+                    cumulative += count
+                    le = 'le="' + bound + '"'
+                    lines.append(f"{name}_bucket{_labels(metric.labelnames, key, le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(metric.labelnames, key)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(metric.labelnames, key)} {cumulative}")
+            else:
+                lines.append(f"{name}{_labels(metric.labelnames, key)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+async def run_flusher() -> None:
+    """Keep this worker's multiprocess snapshot fresh; started from the app lifespan."""
+    while True:
+        await asyncio.sleep(settings.metrics_flush_interval_seconds)
+        try:
+            await asyncio.to_thread(write_snapshot)
+        except OSError as exc:  # pragma: no cover - disk trouble must not kill the loop
+            logger.warning("metrics_snapshot_failed", extra={"error": str(exc)})
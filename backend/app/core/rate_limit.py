@@ -1,49 +1,246 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
 import time
-from collections import defaultdict, deque
-from typing import Awaitable, Callable, DefaultDict, Deque, Hashable, Iterable
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Awaitable, Callable, Hashable, Protocol
 
 from fastapi import HTTPException, Request, status
 
-WindowBucket = Deque[float]
+from app.core.config import settings
 
+logger = logging.getLogger(__name__)
 
-def _prune(bucket: WindowBucket, now: float, window_seconds: int) -> None:
-    while bucket and now - bucket[0] > window_seconds:
-        bucket.popleft()
 
+class RateLimitStore(Protocol):
+    async def take(self, key: str, interval: float, burst_window: float, cost: int = 1) -> float: ...
 
-def _enforce_limit(bucket: WindowBucket, limit: int, window_seconds: int, now: float) -> None:
-    _prune(bucket, now, window_seconds)
-    if len(bucket) >= limit:
-        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many requests")
-    bucket.append(now)
+    async def clear(self) -> None: ...
+
+
+# Float sums of ``interval`` leave the last allowed request of a burst a few ulps over the window; anything
+# under this much over still counts as on time. Also used by the Redis script.
+_WAIT_TOLERANCE = 1e-9
+
+
+def _gcra(tat: float | None, now: float, interval: float, burst_window: float, cost: int) -> tuple[float, float]:
+    """Generic cell rate algorithm step; returns ``(new_tat, wait)`` where ``wait > 0`` means rejected.
+
+    A key's whole state is its theoretical arrival time (TAT). Each request pushes it ``interval``
+    seconds into the future. A request is allowed while the TAT stays within ``burst_window`` of now,
+    so ``limit`` requests may burst and then one more is admitted every ``window / limit`` seconds.
+    """
+    start = now if tat is None or tat < now else tat
+    new_tat = start + interval * cost
+    wait = new_tat - now - burst_window
+    return new_tat, wait if wait > _WAIT_TOLERANCE else 0.0
+
+
+class MemoryRateStore:
+    """Per-process store: one float per key in an LRU bounded by ``max_keys``; idle keys age out."""
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_keys = max_keys
+        self._clock = clock
+        self._tats: OrderedDict[str, float] = OrderedDict()
+        self._lock = Lock()
+
+    async def take(self, key: str, interval: float, burst_window: float, cost: int = 1) -> float:
+        now = self._clock()
+        with self._lock:
+            new_tat, wait = _gcra(self._tats.get(key), now, interval, burst_window, cost)
+            if wait > 0:
+                return wait
+            self._tats[key] = new_tat
+            self._tats.move_to_end(key)
+            # A TAT in the past is the same as no entry, so expired keys at the LRU head are free to drop.
+            while self._tats and (len(self._tats) > self.max_keys or next(iter(self._tats.values())) <= now):
+                self._tats.popitem(last=False)
+            return 0.0
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._tats.clear()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class SharedMemoryRateStore:
+    """Single-host store shared by every worker process through a memory-mapped file.
+
+    A fixed table of ``slots`` (key hash, TAT) pairs, so memory never grows. Keys probe a few slots
+    from their hash, reusing empty or expired ones first; when all are live the slot closest to expiry
+    is taken over, which at worst gives that key a fresh allowance. ``flock`` serialises the workers.
+    """
+
+    _SLOT = struct.Struct("<Qd")
+    _PROBES = 8
+
+    def __init__(self, path: str | None = None, slots: int = 65536) -> None:
+        import fcntl  # POSIX only; imported here so the module still loads on Windows
+
+        self._fcntl = fcntl
+        if path is None:
+            base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            path = os.path.join(base, "adrianaart-ratelimit")
+        self.slots = slots
+        size = slots * self._SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._mm = mmap.mmap(self._fd, size)
+        self._lock = Lock()
+
+    def _hash(self, key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+    async def take(self, key: str, interval: float, burst_window: float, cost: int = 1) -> float:
+        key_hash = self._hash(key)
+        now = time.time()
+        with self._lock:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+            try:
+                offset, tat = self._find(key_hash, now)
+                new_tat, wait = _gcra(tat, now, interval, burst_window, cost)
+                if wait > 0:
+                    return wait
+                self._SLOT.pack_into(self._mm, offset, key_hash, new_tat)
+                return 0.0
+            finally:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+
+    def _find(self, key_hash: int, now: float) -> tuple[int, float | None]:
+        victim, victim_tat = 0, math.inf
+        for probe in range(self._PROBES):
+            offset = ((key_hash + probe) % self.slots) * self._SLOT.size
+            slot_hash, tat = self._SLOT.unpack_from(self._mm, offset)
+            if slot_hash == key_hash:
+                return offset, tat
+            if slot_hash == 0 or tat <= now:
+                tat = -math.inf
+            if tat < victim_tat:
+                victim, victim_tat = offset, tat
+        return victim, None
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._mm[:] = bytes(len(self._mm))
+
+
+_REDIS_GCRA = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + tonumber(ARGV[1]) * tonumber(ARGV[3])
+local wait = new_tat - now - tonumber(ARGV[2])
+if wait > 1e-9 then return tostring(wait) end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1)
+return '0'
+"""
+
+
+class RedisRateStore:
+    """Multi-node store speaking the Redis protocol; the GCRA step runs as one atomic Lua script on the
+    server clock. Requires the optional ``redis`` package."""
+
+    def __init__(self, url: str, prefix: str = "adrianaart:ratelimit:") -> None:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("rate_limit_backend=redis requires the 'redis' package") from exc
+        self.client = redis_asyncio.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(_REDIS_GCRA)
+
+    async def take(self, key: str, interval: float, burst_window: float, cost: int = 1) -> float:
+        wait = await self._script(keys=[self.prefix + key], args=[interval, burst_window, cost])
+        return float(wait)
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            await self.client.delete(key)
+
+
+def _build_store() -> RateLimitStore:
+    if settings.rate_limit_backend == "redis":
+        url = settings.rate_limit_url or settings.cache_url
+        if not url:
+            raise RuntimeError("rate_limit_url (or cache_url) must be set when rate_limit_backend=redis")
+        return RedisRateStore(url)
+    if settings.rate_limit_backend == "shared":
+        return SharedMemoryRateStore(settings.rate_limit_shm_path, settings.rate_limit_shm_slots)
+    return MemoryRateStore(settings.rate_limit_max_keys)
+
+
+_store: RateLimitStore | None = None
+
+
+def get_store() -> RateLimitStore:
+    global _store
+    if _store is None:
+        _store = _build_store()
+    return _store
+
+
+@dataclass
+class RateDecision:
+    allowed: bool
+    retry_after: float = 0.0
+
+
+async def hit(key: str, limit: int, window_seconds: float, cost: int = 1) -> RateDecision:
+    """Count one request against ``limit`` per ``window_seconds`` for ``key``."""
+    if limit <= 0:
+        return RateDecision(False, window_seconds)
+    interval = window_seconds / limit
+    try:
+        wait = await get_store().take(key, interval, window_seconds, cost)
+    except Exception as exc:  # pragma: no cover - a store outage must not lock everyone out
+        logger.warning("rate_limit_store_unavailable", extra={"error": str(exc)})
+        return RateDecision(True)
+    return RateDecision(wait <= 0, max(wait, 0.0))
+
+
+async def _enforce(key: str, limit: int, window_seconds: int) -> None:
+    decision = await hit(key, limit, window_seconds)
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(max(1, math.ceil(decision.retry_after)))},
+        )
 
 
 def limiter(
     key: Hashable, limit: int, window_seconds: int
 ) -> Callable[[Request], Awaitable[None]]:
     """
-    Simple in-memory rate limiter shared per-process.
+    Rate limiter shared by every caller of a route.
 
     Args:
         key: identifier for the bucket (e.g., "auth:login").
         limit: max requests allowed in the window.
-        window_seconds: rolling window length in seconds.
+        window_seconds: window length in seconds; ``limit`` may burst, then one per ``window / limit``.
     """
-    buckets: DefaultDict[Hashable, WindowBucket] = defaultdict(deque)
 
     async def dependency(_: Request) -> None:
-        now = time.time()
-        _enforce_limit(buckets[key], limit, window_seconds, now)
+        await _enforce(str(key), limit, window_seconds)
 
-    dependency.buckets = buckets  # type: ignore[attr-defined]
     return dependency
 
 
 def per_identifier_limiter(
-    identifier_fn: Callable[[Request], Hashable], limit: int, window_seconds: int
+    identifier_fn: Callable[[Request], Hashable], limit: int, window_seconds: int, namespace: str | None = None
 ) -> Callable[[Request], Awaitable[None]]:
     """
     Rate limiter that uses a dynamic identifier (e.g., client IP or user id).
@@ -51,20 +248,17 @@ def per_identifier_limiter(
     Args:
         identifier_fn: function that maps the request to an identifier.
         limit: max requests allowed in the window.
-        window_seconds: rolling window length in seconds.
+        window_seconds: window length in seconds.
+        namespace: keeps limiters on the same identifier apart; must be stable across workers.
     """
-    buckets: DefaultDict[Hashable, WindowBucket] = defaultdict(deque)
+    prefix = namespace or f"{identifier_fn.__module__}.{identifier_fn.__qualname__}:{limit}/{window_seconds}"
 
     async def dependency(request: Request) -> None:
-        ident = identifier_fn(request)
-        now = time.time()
-        _enforce_limit(buckets[ident], limit, window_seconds, now)
+        await _enforce(f"{prefix}:{identifier_fn(request)}", limit, window_seconds)
 
-    dependency.buckets = buckets  # type: ignore[attr-defined]
     return dependency
 
 
-def reset_buckets(buckets: Iterable[DefaultDict[Hashable, WindowBucket]]) -> None:
+async def reset() -> None:
     """Helper for tests to clear limiter state."""
-    for bucket in buckets:
-        bucket.clear()
+    await get_store().clear()
@@ -1,23 +1,136 @@
+import asyncio
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from threading import Lock
+from typing import Any, Callable, Optional, TypeVar
 
 import bcrypt
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 
 from app.core.config import settings
 
+T = TypeVar("T")
+
+# Stored for accounts nobody has chosen a password for (guest checkout, Google sign-up). It is not a
+# bcrypt hash, so it never verifies, and writing it costs nothing.
+UNUSABLE_PASSWORD_PREFIX = "!"
+
 
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(settings.password_bcrypt_rounds)).decode("utf-8")
 
 
 def verify_password(password: str, hashed_password: str) -> bool:
+    if hashed_password.startswith(UNUSABLE_PASSWORD_PREFIX):
+        return False
     try:
         return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
     except ValueError:
         return False
 
 
+def unusable_password() -> str:
+    return UNUSABLE_PASSWORD_PREFIX + secrets.token_urlsafe(16)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when a bcrypt hash was made with a different cost than ``password_bcrypt_rounds``."""
+    if hashed_password.startswith(UNUSABLE_PASSWORD_PREFIX):
+        return False
+    try:
+        return int(hashed_password.split("$")[2]) != settings.password_bcrypt_rounds
+    except (IndexError, ValueError):
+        return True
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL, so ``password_hash_workers`` threads hash in parallel while requests keep
+    being served. At most ``password_hash_max_queue`` calls may wait for a thread; beyond that the call
+    is refused with a 503 rather than letting a login burst pile up.
+    """
+
+    def __init__(self) -> None:
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = Lock()
+        self.pending = 0
+        self.running = 0
+        self.counters = {"completed": 0, "rejected": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.password_hash_workers), thread_name_prefix="bcrypt"
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            if self.pending >= settings.password_hash_max_queue:
+                self.counters["rejected"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server busy, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+        claimed = False
+
+        def call() -> T | None:
+            nonlocal claimed
+            with self._lock:
+                if claimed:  # the caller went away while this was queued
+                    return None
+                claimed = True
+                self.pending -= 1
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.counters["completed"] += 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), call)
+        except BaseException:
+            with self._lock:
+                if not claimed:
+                    claimed = True
+                    self.pending -= 1
+            raise
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "workers": max(1, settings.password_hash_workers),
+                "queued": self.pending,
+                "running": self.running,
+                **self.counters,
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hasher = PasswordHasher()
+
+
+async def hash_password_async(password: str) -> str:
+    return await hasher.run(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    if hashed_password.startswith(UNUSABLE_PASSWORD_PREFIX):
+        return False
+    return await hasher.run(verify_password, password, hashed_password)
+
+
 def _create_token(subject: str, token_type: str, expires_delta: timedelta, jti: str | None = None) -> str:
     expire = datetime.now(timezone.utc) + expires_delta
     to_encode = {"sub": subject, "type": token_type, "exp": expire}
@@ -0,0 +1,147 @@
+"""Per-request query accounting and N+1 detection.
+
+The cursor hooks in ``app.db.session`` report every statement here. Inside ``track()`` (each HTTP
+request and each background job) they are counted against that unit of work. A statement fingerprint
+seen ``db_n_plus_one_threshold`` times in one unit is logged as a probable N+1. Fingerprints are
+statements with literals and bind-parameter lists collapsed. Totals per fingerprint since startup back
+the admin query report.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from functools import lru_cache
+from threading import Lock
+from typing import Iterator
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.db.queries")
+
+_PARAM = r"(?:\?|\$\d+|%\(\w+\)s|%s|:\w+|'(?:[^']|'')*'|-?\b\d+(?:\.\d+)?\b)"
+_IN_LIST = re.compile(r"\(\s*" + _PARAM + r"(?:\s*,\s*" + _PARAM + r")*\s*\)")
+_VALUES_ROWS = re.compile(r"(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_LITERAL = re.compile(_PARAM)
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> tuple[str, str]:
+    """``(id, normalized)`` for a statement; identical shapes with different values share an id."""
+    normalized = _SPACE.sub(" ", statement).strip()
+    normalized = _IN_LIST.sub("(?)", normalized)
+    normalized = _LITERAL.sub("?", normalized)
+    normalized = _VALUES_ROWS.sub(r"\1", normalized)
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12], normalized
+
+
+@dataclass
+class QueryStats:
+    label: str
+    count: int = 0
+    total_ms: float = 0.0
+    by_fingerprint: Counter = field(default_factory=Counter)
+
+    def repeated(self) -> list[tuple[str, int]]:
+        threshold = settings.db_n_plus_one_threshold
+        if threshold <= 0:
+            return []
+        return [(fp, n) for fp, n in self.by_fingerprint.most_common() if n >= threshold]
+
+
+@dataclass
+class FingerprintTotals:
+    statement: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    n_plus_one: int = 0  # units of work in which this statement was flagged
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+_totals: dict[str, FingerprintTotals] = {}
+_lock = Lock()
+
+
+def record(statement: str, elapsed_ms: float) -> None:
+    """Called from the cursor hooks for every executed statement."""
+    if not settings.db_query_tracking:
+        return
+    fp, normalized = fingerprint(statement)
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        stats.by_fingerprint[fp] += 1
+    with _lock:
+        totals = _totals.get(fp)
+        if totals is None:
+            if len(_totals) >= settings.db_query_fingerprints_max:
+                # Make room by forgetting the cheapest statement seen so far.
+                del _totals[min(_totals, key=lambda key: _totals[key].total_ms)]
+            totals = _totals[fp] = FingerprintTotals(statement=normalized[:1000])
+        totals.calls += 1
+        totals.total_ms += elapsed_ms
+        totals.max_ms = max(totals.max_ms, elapsed_ms)
+
+
+def begin(label: str) -> tuple[QueryStats, Token]:
+    stats = QueryStats(label)
+    return stats, _current.set(stats)
+
+
+def end(stats: QueryStats, token: Token) -> None:
+    _current.reset(token)
+    report(stats)
+
+
+@contextlib.contextmanager
+def track(label: str) -> Iterator[QueryStats]:
+    """Account the statements run inside the block; logs probable N+1 patterns when it exits."""
+    stats, token = begin(label)
+    try:
+        yield stats
+    finally:
+        end(stats, token)
+
+
+def report(stats: QueryStats) -> None:
+    for fp, count in stats.repeated():
+        with _lock:
+            totals = _totals.get(fp)
+            if totals is not None:
+                totals.n_plus_one += 1
+            statement = totals.statement if totals is not None else ""
+        logger.warning(
+            "probable_n_plus_one",
+            extra={"unit": stats.label, "fingerprint": fp, "executions": count, "statement": statement[:500]},
+        )
+
+
+def top(limit: int = 20, order_by: str = "total_ms") -> list[dict]:
+    with _lock:
+        rows = [
+            {
+                "fingerprint": fp,
+                "statement": totals.statement,
+                "calls": totals.calls,
+                "total_ms": round(totals.total_ms, 2),
+                "mean_ms": round(totals.total_ms / totals.calls, 3),
+                "max_ms": round(totals.max_ms, 2),
+                "n_plus_one": totals.n_plus_one,
+            }
+            for fp, totals in _totals.items()
+        ]
+    rows.sort(key=lambda row: row[order_by], reverse=True)
+    return rows[:limit]
+
+
+def reset() -> None:
+    with _lock:
+        _totals.clear()
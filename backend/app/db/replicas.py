@@ -0,0 +1,151 @@
+"""Read-replica routing for handlers that only read.
+
+``get_read_session`` hands out a session on the next healthy replica (round-robin). It falls back to the
+primary ``get_session`` when there are no replicas, all are down, or the client wrote recently. After a
+successful write the pipeline sets a short-lived cookie so the same client reads its own writes from the
+primary until replication has caught up. Replicas that fail are taken out of rotation and probed again
+in the background.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import AsyncGenerator
+
+from fastapi import Depends, Request
+from sqlalchemy import text
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.session import engine_options, get_session
+
+logger = logging.getLogger(__name__)
+
+READ_PRIMARY_COOKIE = "db_read_primary"
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+@dataclass
+class Replica:
+    url: str
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker = field(repr=False)
+    healthy: bool = True
+    failures: int = 0
+    served: int = 0
+
+    @property
+    def name(self) -> str:
+        return self.engine.url.render_as_string(hide_password=True)
+
+
+class ReplicaSet:
+    def __init__(self, urls: list[str]) -> None:
+        self.replicas: list[Replica] = []
+        for url in urls:
+            engine = create_async_engine(url, future=True, echo=False, **engine_options(url))
+            factory = async_sessionmaker(engine, expire_on_commit=False, autoflush=False, class_=AsyncSession)
+            self.replicas.append(Replica(url, engine, factory))
+        self._turn = itertools.count()
+        self.primary_fallbacks = 0
+
+    def pick(self) -> Replica | None:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        replica = healthy[next(self._turn) % len(healthy)]
+        replica.served += 1
+        return replica
+
+    def mark_down(self, replica: Replica, error: Exception) -> None:
+        replica.failures += 1
+        if replica.healthy:
+            replica.healthy = False
+            logger.warning("db_replica_down", extra={"replica": replica.name, "error": str(error)})
+
+    async def check(self) -> None:
+        """Probe every replica; down ones come back into rotation once they answer."""
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), settings.db_pool_timeout_seconds)
+            except Exception as exc:
+                self.mark_down(replica, exc)
+                continue
+            if not replica.healthy:
+                replica.healthy = True
+                logger.info("db_replica_up", extra={"replica": replica.name})
+
+    async def run_health_checks(self) -> None:
+        while True:
+            await asyncio.sleep(settings.db_replica_health_interval_seconds)
+            await self.check()
+
+    def stats(self) -> dict:
+        return {
+            "replicas": [
+                {"replica": r.name, "healthy": r.healthy, "served": r.served, "failures": r.failures}
+                for r in self.replicas
+            ],
+            "primary_fallbacks": self.primary_fallbacks,
+        }
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+_replica_set: ReplicaSet | None = None
+
+
+def get_replica_set() -> ReplicaSet | None:
+    global _replica_set
+    if _replica_set is None and settings.database_replica_urls:
+        _replica_set = ReplicaSet(settings.database_replica_urls)
+    return _replica_set
+
+
+def configure(urls: list[str]) -> ReplicaSet | None:
+    """Replace the replica set (tests, or settings reloaded at runtime)."""
+    global _replica_set
+    _replica_set = ReplicaSet(urls) if urls else None
+    return _replica_set
+
+
+def wants_primary(request: Request) -> bool:
+    return READ_PRIMARY_COOKIE in request.cookies
+
+
+def sticky_cookie(method: str, status_code: int) -> str | None:
+    """``Set-Cookie`` value pinning the client's reads to the primary after a successful write."""
+    if method in _SAFE_METHODS or status_code >= 400 or get_replica_set() is None:
+        return None
+    max_age = int(settings.db_read_your_writes_seconds)
+    if max_age <= 0:
+        return None
+    return f"{READ_PRIMARY_COOKIE}=1; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax"
+
+
+async def get_read_session(
+    request: Request, primary: AsyncSession = Depends(get_session)
+) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only handlers: a replica when one is usable, otherwise the primary."""
+    replica_set = get_replica_set()
+    replica = replica_set.pick() if replica_set is not None and not wants_primary(request) else None
+    if replica is None:
+        if replica_set is not None:
+            replica_set.primary_fallbacks += 1
+        yield primary
+        return
+    request.state.db_replica = replica.name
+    async with replica.sessionmaker() as session:
+        try:
+            yield session
+        except (OperationalError, InterfaceError, OSError) as exc:
+            # Unreachable or broken replica: take it out of rotation until the health check sees it again.
+            replica_set.mark_down(replica, exc)
+            raise
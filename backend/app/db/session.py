@@ -1,31 +1,83 @@
+import asyncio
 import logging
 import time
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
-from sqlalchemy import event
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from app.core import metrics
 from app.core.config import settings
+from app.db import query_stats
 
-connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
 
-engine = create_async_engine(settings.database_url, future=True, echo=False, connect_args=connect_args)
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    waits = 0
+    wait_seconds_total = 0.0
+    wait_seconds_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            metrics.db_pool_checkout_wait.observe(waited)
+            self.waits += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+def engine_options(url: str) -> dict[str, Any]:
+    """Keyword arguments for ``create_async_engine`` built from the ``db_*`` pool settings."""
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    options: dict[str, Any] = {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if "+asyncpg" in url:
+        # SQLAlchemy's adapter keeps its own prepared-statement LRU on top of asyncpg's; size both together.
+        connect_args: dict[str, Any] = {
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        }
+        if settings.db_statement_timeout_ms:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+        options["connect_args"] = connect_args
+    return options
+
+
+engine = create_async_engine(settings.database_url, future=True, echo=False, **engine_options(settings.database_url))
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False, autoflush=False, class_=AsyncSession)
 
 logger = logging.getLogger("app.db.slowquery")
 
 
-@event.listens_for(engine.sync_engine, "before_cursor_execute")
+# Registered on the Engine class so every engine (scripts, tests, replicas) is measured the same way.
+@event.listens_for(Engine, "before_cursor_execute")
 def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
-    conn.info.setdefault("query_start_time", []).append(time.time())
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
 
 
-@event.listens_for(engine.sync_engine, "after_cursor_execute")
+@event.listens_for(Engine, "after_cursor_execute")
 def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
     start_time = conn.info.get("query_start_time", []).pop(-1) if conn.info.get("query_start_time") else None
     if start_time is None:
         return
-    duration_ms = (time.time() - start_time) * 1000
+    elapsed = time.perf_counter() - start_time
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    metrics.db_query_duration.observe(elapsed, operation=operation)
+    duration_ms = elapsed * 1000
+    query_stats.record(statement, duration_ms)
     if duration_ms >= settings.slow_query_threshold_ms:
         logger.warning(
             "slow_query",
@@ -33,6 +85,50 @@ def after_cursor_execute(conn, cursor, statement, parameters, context, executema
         )
 
 
+def pool_stats(target: AsyncEngine | None = None) -> dict[str, Any]:
+    pool = (target or engine).pool
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return {"pool": type(pool).__name__}
+    stats: dict[str, Any] = {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": settings.db_max_overflow,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    if isinstance(pool, TimedQueuePool):
+        stats["checkout_waits"] = pool.waits
+        stats["checkout_wait_ms_avg"] = round(pool.wait_seconds_total / pool.waits * 1000, 3) if pool.waits else 0.0
+        stats["checkout_wait_ms_max"] = round(pool.wait_seconds_max * 1000, 3)
+    return stats
+
+
+async def warm_pool(target: AsyncEngine | None = None) -> int:
+    """Open ``db_pool_size`` connections up front so the first requests do not pay for connecting."""
+    target = target or engine
+    if not isinstance(target.pool, AsyncAdaptedQueuePool):
+        return 0
+    count = target.pool.size()
+    connections = []
+    try:
+        for _ in range(count):
+            conn = await target.connect()
+            connections.append(conn)
+            await conn.execute(text("SELECT 1"))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in connections))
+    return len(connections)
+
+
+@metrics.on_collect
+def _collect_pool_metrics() -> None:
+    stats = pool_stats()
+    for state in ("checked_out", "idle", "overflow", "size"):
+        if state in stats:
+            metrics.db_pool_connections.set(stats[state], state=state)
+
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """FastAPI dependency to provide a database session."""
     async with SessionLocal() as session:
@@ -1,3 +1,7 @@
+import asyncio
+import contextlib
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, Request
@@ -8,17 +12,52 @@ from fastapi.staticfiles import StaticFiles
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.api.v1 import api_router
+from app.api.v1 import media as media_api
+from app.core import metrics, security
 from app.core.config import settings
 from app.core.logging_config import configure_logging
+from app.db import replicas
+from app.db import session as db_session
 from fastapi.encoders import jsonable_encoder
-from app.middleware import (
-    AuditMiddleware,
-    BackpressureMiddleware,
-    MaintenanceModeMiddleware,
-    RequestLoggingMiddleware,
-    SecurityHeadersMiddleware,
-)
+from app.middleware import RequestPipelineMiddleware
 from app.schemas.error import ErrorResponse
+from app.services import audit as audit_service
+from app.services import inventory, recently_viewed
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.db_pool_warmup:
+        try:
+            opened = await asyncio.wait_for(db_session.warm_pool(), settings.db_pool_timeout_seconds)
+            logger.info("db_pool_warmed", extra={"connections": opened})
+        except Exception as exc:  # the app still starts; connections open lazily instead
+            logger.warning("db_pool_warmup_failed", extra={"error": str(exc)})
+    audit_service.sink.start()
+    recently_viewed.buffer.start()
+    inventory.sweeper.start()
+    flusher = asyncio.create_task(metrics.run_flusher()) if settings.metrics_multiproc_dir else None
+    replica_set = replicas.get_replica_set()
+    replica_checks = asyncio.create_task(replica_set.run_health_checks()) if replica_set is not None else None
+    try:
+        yield
+    finally:
+        if replica_checks is not None:
+            replica_checks.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await replica_checks
+            await replica_set.dispose()
+        if flusher is not None:
+            flusher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await flusher
+            metrics.write_snapshot()
+        await inventory.sweeper.stop()
+        await recently_viewed.buffer.stop()
+        await audit_service.sink.stop()
+        security.hasher.shutdown()
 
 
 def get_application() -> FastAPI:
@@ -36,6 +75,7 @@ def get_application() -> FastAPI:
         version=settings.app_version,
         openapi_tags=tags_metadata,
         swagger_ui_parameters={"displayRequestDuration": True},
+        lifespan=lifespan,
     )
     app.add_middleware(
         CORSMiddleware,
@@ -43,21 +83,24 @@ def get_application() -> FastAPI:
         allow_credentials=settings.cors_allow_credentials,
         allow_methods=settings.cors_allow_methods,
         allow_headers=settings.cors_allow_headers,
+        expose_headers=["X-Cart-Token"],
     )
-    app.add_middleware(SecurityHeadersMiddleware)
-    app.add_middleware(MaintenanceModeMiddleware)
-    app.add_middleware(BackpressureMiddleware)
-    app.add_middleware(RequestLoggingMiddleware)
-    app.add_middleware(AuditMiddleware)
+    app.add_middleware(RequestPipelineMiddleware)
     media_root = Path(settings.media_root)
     media_root.mkdir(parents=True, exist_ok=True)
     app.include_router(api_router, prefix="/api/v1")
+    # Registered before the static mount so /media/resize/... is not treated as a file path.
+    app.include_router(media_api.router)
     app.mount("/media", StaticFiles(directory=media_root), name="media")
 
     @app.exception_handler(StarletteHTTPException)
     async def http_exception_handler(request: Request, exc: StarletteHTTPException):
         payload = ErrorResponse(detail=exc.detail, code=None)
-        return JSONResponse(status_code=exc.status_code, content=jsonable_encoder(payload.model_dump()))
+        return JSONResponse(
+            status_code=exc.status_code,
+            content=jsonable_encoder(payload.model_dump()),
+            headers=getattr(exc, "headers", None),
+        )
 
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -1,11 +1,3 @@
-from app.middleware.request_log import RequestLoggingMiddleware
-from app.middleware.security import AuditMiddleware, SecurityHeadersMiddleware
-from app.middleware.backpressure import BackpressureMiddleware, MaintenanceModeMiddleware
+from app.middleware.pipeline import RequestPipelineMiddleware
 
-__all__ = [
-    "RequestLoggingMiddleware",
-    "AuditMiddleware",
-    "SecurityHeadersMiddleware",
-    "BackpressureMiddleware",
-    "MaintenanceModeMiddleware",
-]
+__all__ = ["RequestPipelineMiddleware"]
@@ -1,52 +1,212 @@
 import asyncio
-from typing import Awaitable, Callable
-
-from fastapi import Request
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+import math
+from collections import deque
+from dataclasses import dataclass
 
+from app.core import metrics
 from app.core.config import settings
 
+HEALTH_PATH_PREFIX = "/api/v1/health"
+
+# Requests that make money outrank browsing, which outranks bulk exports and crawler feeds.
+PRIORITY_ORDER = ("critical", "normal", "bulk")
+CRITICAL_PREFIXES = (
+    "/api/v1/payments",
+    "/api/v1/payment-methods",
+    "/api/v1/cart",
+    "/api/v1/orders/guest-checkout",
+)
+BULK_PREFIXES = (
+    "/api/v1/catalog/products/feed",
+    "/api/v1/catalog/products/export",
+    "/api/v1/catalog/products/import",
+    "/api/v1/orders/admin/export",
+    "/api/v1/admin/dashboard/export",
+    "/api/v1/sitemap.xml",
+    "/api/v1/robots.txt",
+    "/api/v1/feeds/",
+)
+
+
+@dataclass(frozen=True)
+class PriorityClass:
+    share: float  # fraction of the current limit this class may occupy
+    wait_factor: float  # multiple of backpressure_max_wait_ms it may queue for
+
+
+PRIORITY_CLASSES = {
+    "critical": PriorityClass(share=1.0, wait_factor=4.0),
+    "normal": PriorityClass(share=0.9, wait_factor=1.0),
+    "bulk": PriorityClass(share=0.5, wait_factor=0.2),
+}
+
+_LONG_RTT_WINDOW = 600
+_SHORT_RTT_ALPHA = 0.1
+_SMOOTHING = 0.2
+
+
+def priority_for(method: str, path: str) -> str:
+    if path.startswith(BULK_PREFIXES):
+        return "bulk"
+    if path.startswith(CRITICAL_PREFIXES) or (method == "POST" and path == "/api/v1/orders"):
+        return "critical"
+    return "normal"
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that follows observed latency, with priority shares and a short bounded queue.
+
+    The limit moves like Netflix's gradient limiter: while the short-term latency average stays within
+    ``backpressure_latency_tolerance`` of the long-term baseline it grows by about sqrt(limit), and it
+    shrinks in proportion when latency climbs. Each class may fill only its share of the limit. When
+    no slot is free, a request waits up to its class deadline, and a freed slot goes to the highest
+    class waiting. Only touched from the event loop, so no locking.
+    """
+
+    def __init__(self, max_limit: int | None = None, min_limit: int | None = None, queue_size: int | None = None):
+        self.max_limit = settings.max_concurrent_requests if max_limit is None else max_limit
+        min_limit = settings.backpressure_min_limit if min_limit is None else min_limit
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.queue_size = settings.backpressure_queue_size if queue_size is None else queue_size
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.rtt_short: float | None = None
+        self.rtt_long: float | None = None
+        self._waiters: dict[str, deque[asyncio.Future]] = {name: deque() for name in PRIORITY_ORDER}
+        self.admitted = {name: 0 for name in PRIORITY_ORDER}
+        self.shed = {name: 0 for name in PRIORITY_ORDER}
 
-class BackpressureMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, max_concurrent: int | None = None):
-        super().__init__(app)
-        self.max_concurrent = max_concurrent or settings.max_concurrent_requests
-        self.semaphore = asyncio.Semaphore(self.max_concurrent) if self.max_concurrent > 0 else None
+    def _fits(self, priority: str) -> bool:
+        return self.in_flight < max(1, math.floor(self.limit * PRIORITY_CLASSES[priority].share))
 
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Awaitable]):
-        if request.url.path.startswith("/api/v1/health"):
-            return await call_next(request)
-        if not self.semaphore:
-            return JSONResponse(status_code=429, content={"detail": "Too many requests"})
-        if self.semaphore._value <= 0:  # type: ignore[attr-defined]
-            return JSONResponse(status_code=429, content={"detail": "Too many requests"})
+    def _queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
 
-        await self.semaphore.acquire()
+    def _waiting_at_or_above(self, priority: str) -> bool:
+        for name in PRIORITY_ORDER:
+            if self._waiters[name]:
+                return True
+            if name == priority:
+                return False
+        return False
+
+    async def acquire(self, priority: str) -> bool:
+        """Take a slot for ``priority``, queueing briefly if needed; False means the request is shed."""
+        if self.max_limit <= 0:
+            self.shed[priority] += 1
+            return False
+        if self._fits(priority) and not self._waiting_at_or_above(priority):
+            self.in_flight += 1
+            self.admitted[priority] += 1
+            return True
+        max_wait = settings.backpressure_max_wait_ms / 1000 * PRIORITY_CLASSES[priority].wait_factor
+        if max_wait <= 0 or self._queued() >= self.queue_size:
+            self.shed[priority] += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
         try:
-            return await call_next(request)
-        finally:
-            self.semaphore.release()
+            await asyncio.wait_for(asyncio.shield(waiter), max_wait)
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as the deadline hit or the client went away.
+                if isinstance(exc, asyncio.TimeoutError):
+                    self.admitted[priority] += 1
+                    return True
+                self.release(priority, None)
+                raise
+            waiter.cancel()
+            try:
+                self._waiters[priority].remove(waiter)
+            except ValueError:
+                pass
+            if isinstance(exc, asyncio.TimeoutError):
+                self.shed[priority] += 1
+                return False
+            raise
+        self.admitted[priority] += 1
+        return True
+
+    def release(self, priority: str, rtt_seconds: float | None) -> None:
+        if rtt_seconds is not None and priority != "bulk":
+            # Bulk requests are slow by design and would read as congestion.
+            self._observe(rtt_seconds)
+        self.in_flight -= 1
+        self._grant()
+
+    def _observe(self, rtt: float) -> None:
+        if self.rtt_short is None or self.rtt_long is None:
+            self.rtt_short = self.rtt_long = rtt
+            return
+        self.rtt_short += _SHORT_RTT_ALPHA * (rtt - self.rtt_short)
+        self.rtt_long += (rtt - self.rtt_long) / _LONG_RTT_WINDOW
+        if self.rtt_long > self.rtt_short * 2:
+            # Load dropped off; let the baseline follow latency back down.
+            self.rtt_long *= 0.95
+        if self.in_flight < self.limit / 2:
+            # Far from the limit, latency says nothing about capacity.
+            return
+        gradient = max(0.5, min(1.0, settings.backpressure_latency_tolerance * self.rtt_long / self.rtt_short))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        self.limit = min(self.max_limit, max(self.min_limit, self.limit * (1 - _SMOOTHING) + target * _SMOOTHING))
+
+    def _grant(self) -> None:
+        for name in PRIORITY_ORDER:
+            waiters = self._waiters[name]
+            while waiters:
+                if not self._fits(name):
+                    # Lower classes have smaller shares, so they cannot fit where this one did not.
+                    return
+                waiter = waiters.popleft()
+                if waiter.done():
+                    continue
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, for the 429 ``Retry-After`` header."""
+        rtt = self.rtt_short or 1.0
+        backlog = self._queued() + max(self.in_flight - int(self.limit), 0) + 1
+        return max(1, min(30, math.ceil(backlog * rtt / max(self.limit, 1))))
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 1),
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queued": {name: len(waiters) for name, waiters in self._waiters.items()},
+            "admitted": dict(self.admitted),
+            "shed": dict(self.shed),
+            "rtt_short_ms": round((self.rtt_short or 0) * 1000, 2),
+            "rtt_long_ms": round((self.rtt_long or 0) * 1000, 2),
+        }
+
+
+_active: AdaptiveLimiter | None = None
+
+
+def register(limiter: AdaptiveLimiter) -> AdaptiveLimiter:
+    global _active
+    _active = limiter
+    return limiter
+
 
+def limiter_stats() -> dict:
+    return _active.stats() if _active is not None else {}
 
-class MaintenanceModeMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, bypass_token: str | None = None):
-        super().__init__(app)
-        self.bypass_token = bypass_token or settings.maintenance_bypass_token
 
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Awaitable]):
-        if settings.maintenance_mode and not _is_exempt(request, self.bypass_token):
-            return JSONResponse(
-                status_code=503,
-                content={"detail": "Maintenance mode"},
-                headers={"Retry-After": "120"},
-            )
-        return await call_next(request)
+@metrics.on_collect
+def _collect_metrics() -> None:
+    if _active is None:
+        return
+    metrics.backpressure_limit.set(round(_active.limit, 1))
+    for name, waiters in _active._waiters.items():
+        metrics.backpressure_queued.set(len(waiters), priority=name)
 
 
-def _is_exempt(request: Request, bypass_token: str | None) -> bool:
-    if request.url.path.startswith("/api/v1/health"):
+def is_maintenance_exempt(path: str, bypass_header: str | None, bypass_token: str | None) -> bool:
+    if path.startswith(HEALTH_PATH_PREFIX):
         return True
-    if bypass_token and request.headers.get("X-Maintenance-Bypass") == bypass_token:
+    if bypass_token and bypass_header == bypass_token:
         return True
     return False
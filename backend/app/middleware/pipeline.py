@@ -0,0 +1,158 @@
+import time
+import uuid
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.logging_config import request_id_ctx_var
+from app.db import query_stats, replicas
+from app.middleware import backpressure
+from app.middleware.backpressure import HEALTH_PATH_PREFIX, AdaptiveLimiter, is_maintenance_exempt, priority_for
+from app.middleware.request_log import logger
+from app.middleware.security import security_headers
+from app.services import audit as audit_service
+from app.services.audit import AuditRecord
+
+AUDIT_BODY_LIMIT = 4096
+_INSPECTED_HEADERS = {b"authorization", b"content-length", b"content-type", b"x-maintenance-bypass"}
+
+
+class RequestPipelineMiddleware:
+    """Request id, backpressure, maintenance mode, security headers and audit capture in one ASGI layer.
+
+    Replaces five ``BaseHTTPMiddleware`` layers: there is a single ``send`` wrapper, no per-layer task
+    or memory stream, and response bodies stream straight through. The concurrency slot is held until
+    the body has been sent, not just until the headers are ready.
+    """
+
+    def __init__(self, app: ASGIApp, max_concurrent: int | None = None, bypass_token: str | None = None):
+        self.app = app
+        self.limiter = backpressure.register(AdaptiveLimiter(max_concurrent))
+        self.bypass_token = bypass_token or settings.maintenance_bypass_token
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_id = str(uuid.uuid4())
+        scope.setdefault("state", {})["request_id"] = request_id
+        token = request_id_ctx_var.set(request_id)
+        path: str = scope["path"]
+        db_stats, db_token = query_stats.begin(f"{scope['method']} {path}")
+        headers = {key: value for key, value in scope["headers"] if key in _INSPECTED_HEADERS}
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        status_code = 500
+
+        # Tee small JSON bodies as the app reads them; multipart and other bodies are never copied.
+        declared_length = headers.get(b"content-length", b"0")
+        small_body = not declared_length.isdigit() or int(declared_length) < AUDIT_BODY_LIMIT
+        captured: bytearray | None = bytearray() if "application/json" in content_type and small_body else None
+
+        async def receive_wrapper() -> Message:
+            nonlocal captured
+            message = await receive()
+            if captured is not None and message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                if len(captured) + len(chunk) >= AUDIT_BODY_LIMIT:
+                    captured = None
+                else:
+                    captured += chunk
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_headers = MutableHeaders(scope=message)
+                for name, value in security_headers():
+                    response_headers.setdefault(name, value)
+                response_headers["X-Request-ID"] = request_id
+                sticky = replicas.sticky_cookie(scope["method"], status_code)
+                if sticky is not None:
+                    response_headers.append("Set-Cookie", sticky)
+                if settings.db_query_debug_header:
+                    # Queries issued while the body streams are not included.
+                    response_headers["X-DB-Queries"] = str(db_stats.count)
+                    response_headers["X-DB-Time-Ms"] = f"{db_stats.total_ms:.1f}"
+            await send(message)
+
+        metrics.http_in_flight.inc()
+        try:
+            if path.startswith(HEALTH_PATH_PREFIX):
+                await self.app(scope, receive_wrapper, send_wrapper)
+            else:
+                priority = priority_for(scope["method"], path)
+                if not await self.limiter.acquire(priority):
+                    metrics.http_shed.inc(priority=priority)
+                    response = JSONResponse(
+                        status_code=429,
+                        content={"detail": "Too many requests"},
+                        headers={"Retry-After": str(self.limiter.retry_after())},
+                    )
+                    await response(scope, receive_wrapper, send_wrapper)
+                else:
+                    admitted = time.perf_counter()
+                    try:
+                        await self._dispatch(scope, receive_wrapper, send_wrapper, headers)
+                    finally:
+                        self.limiter.release(priority, time.perf_counter() - admitted)
+        finally:
+            elapsed = time.perf_counter() - start
+            duration_ms = int(elapsed * 1000)
+            method = scope["method"]
+            metrics.http_in_flight.dec()
+            # The route template, not the raw path, keeps label cardinality bounded.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            metrics.http_request_duration.observe(elapsed, method=method, route=route, status=status_code)
+            db_stats.label = f"{method} {route if route != 'unmatched' else path}"
+            query_stats.end(db_stats, db_token)
+            logger.info(
+                "request",
+                extra={
+                    "request_id": request_id,
+                    "path": path,
+                    "method": method,
+                    "status_code": status_code,
+                    "duration_ms": duration_ms,
+                    "db_queries": db_stats.count,
+                    "db_time_ms": round(db_stats.total_ms, 2),
+                },
+            )
+            client = scope.get("client")
+            principal = scope.get("state", {}).get("principal")
+            audit_service.sink.record(
+                AuditRecord(
+                    request_id=request_id,
+                    method=method,
+                    path=path,
+                    status_code=status_code,
+                    client_ip=client[0] if client else "-",
+                    duration_ms=duration_ms,
+                    user_id=str(principal.user_id) if principal else None,
+                    authorization=None if principal else _decode(headers.get(b"authorization")),
+                    body=bytes(captured) if captured else None,
+                )
+            )
+            request_id_ctx_var.reset(token)
+
+    async def _dispatch(self, scope: Scope, receive: Receive, send: Send, headers: dict[bytes, bytes]) -> None:
+        if settings.maintenance_mode and not is_maintenance_exempt(
+            scope["path"], _decode(headers.get(b"x-maintenance-bypass")), self.bypass_token
+        ):
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Maintenance mode"},
+                headers={"Retry-After": "120"},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+def _decode(value: bytes | None) -> str | None:
+    return value.decode("latin-1") if value is not None else None
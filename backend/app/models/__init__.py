@@ -14,6 +14,7 @@ from app.models.catalog import (
     FeaturedCollection,
     CategoryTranslation,
     ProductTranslation,
+    ProductSearchDocument,
 )  # noqa: F401
 from app.models.cart import Cart, CartItem  # noqa: F401
 from app.models.promo import PromoCode  # noqa: F401
@@ -21,6 +22,9 @@ from app.models.address import Address  # noqa: F401
 from app.models.order import Order, OrderItem, OrderStatus, ShippingMethod, OrderEvent  # noqa: F401
 from app.models.content import ContentBlock, ContentBlockVersion, ContentStatus, ContentImage, ContentAuditLog, ContentBlockTranslation  # noqa: F401
 from app.models.wishlist import WishlistItem  # noqa: F401
+from app.models.job import BackgroundJob, JobStatus  # noqa: F401
+from app.models.audit import AuditEvent  # noqa: F401
+from app.models.inventory import StockReservation, ReservationStatus  # noqa: F401
 
 __all__ = [
     "Base",
@@ -39,6 +43,7 @@ __all__ = [
     "FeaturedCollection",
     "CategoryTranslation",
     "ProductTranslation",
+    "ProductSearchDocument",
     "Tag",
     "Cart",
     "CartItem",
@@ -55,4 +60,9 @@ __all__ = [
     "ContentAuditLog",
     "ContentBlockTranslation",
     "WishlistItem",
+    "BackgroundJob",
+    "JobStatus",
+    "AuditEvent",
+    "StockReservation",
+    "ReservationStatus",
 ]
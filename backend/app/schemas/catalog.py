@@ -162,10 +162,11 @@ class ProductReviewRead(ProductReviewCreate):
 
 
 class PaginationMeta(BaseModel):
-    total_items: int
-    total_pages: int
+    total_items: int | None = None
+    total_pages: int | None = None
     page: int
     limit: int
+    next_cursor: str | None = None
 
 
 class ProductCreate(ProductBase):
@@ -264,7 +265,14 @@ class ProductListResponse(BaseModel):
     meta: PaginationMeta
 
 
+class ImportStats(BaseModel):
+    rows: int
+    duration_ms: float
+    rows_per_second: float
+
+
 class ImportResult(BaseModel):
     created: int
     updated: int
     errors: list[str] = []
+    stats: ImportStats | None = None
@@ -0,0 +1,177 @@
+"""Request audit trail: the middleware enqueues raw records, a background writer formats and persists them.
+
+Everything that costs time (JSON parsing and redaction, JWT decoding, file or database I/O) happens on the
+writer, in batches. The queue is bounded; when it is full new records are dropped and counted instead
+of growing memory or blocking requests.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.core.security import decode_token
+from app.models.audit import AuditEvent
+
+logger = logging.getLogger(__name__)
+audit_logger = logging.getLogger("app.audit")
+
+SENSITIVE_KEYS = {"password", "new_password", "token", "refresh_token", "email"}
+
+
+@dataclass(slots=True)
+class AuditRecord:
+    request_id: str
+    method: str
+    path: str
+    status_code: int
+    client_ip: str
+    duration_ms: int
+    user_id: str | None = None
+    authorization: str | None = None  # only decoded by the writer when the request resolved no principal
+    body: bytes | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def redact_payload(payload: Any) -> Any:
+    if isinstance(payload, dict):
+        return {k: ("***" if k.lower() in SENSITIVE_KEYS else redact_payload(v)) for k, v in payload.items()}
+    if isinstance(payload, list):
+        return [redact_payload(item) for item in payload]
+    return payload
+
+
+def bearer_user_id(authorization: str | None) -> str | None:
+    if authorization and authorization.lower().startswith("bearer "):
+        decoded = decode_token(authorization.split(" ", 1)[1])
+        if decoded and decoded.get("sub"):
+            return str(decoded["sub"])
+    return None
+
+
+def _payload(body: bytes | None) -> Any:
+    if not body:
+        return None
+    try:
+        return redact_payload(json.loads(body.decode("utf-8", errors="replace")))
+    except ValueError:
+        return None
+
+
+def _row(record: AuditRecord) -> dict[str, Any]:
+    return {
+        "request_id": record.request_id,
+        "method": record.method,
+        "path": record.path,
+        "status_code": record.status_code,
+        "user_id": record.user_id or bearer_user_id(record.authorization),
+        "client_ip": record.client_ip,
+        "duration_ms": record.duration_ms,
+        "request_payload": _payload(record.body),
+        "created_at": record.created_at,
+    }
+
+
+class AuditSink:
+    def __init__(self, session_factory: async_sessionmaker | None = None):
+        self.session_factory = session_factory
+        self._queue: deque[AuditRecord] = deque()
+        self._task: asyncio.Task | None = None
+        self.counters = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0}
+
+    def record(self, record: AuditRecord) -> bool:
+        """Non-blocking enqueue from the request path; returns False when the record was dropped."""
+        if settings.audit_sink == "none":
+            return False
+        if len(self._queue) >= settings.audit_queue_max:
+            self.counters["dropped"] += 1
+            return False
+        self._queue.append(record)
+        self.counters["enqueued"] += 1
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.counters,
+            "queue_depth": len(self._queue),
+            "queue_max": settings.audit_queue_max,
+            "sink": settings.audit_sink,
+            "writer_running": self._task is not None and not self._task.done(),
+        }
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            if len(self._queue) < settings.audit_batch_size:
+                await asyncio.sleep(settings.audit_flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception as exc:  # pragma: no cover - flush already counts failed batches
+                logger.warning("audit_flush_failed", extra={"error": str(exc)})
+
+    async def flush(self) -> int:
+        """Write everything queued so far in ``audit_batch_size`` batches; returns records written."""
+        written = 0
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(settings.audit_batch_size, len(self._queue)))]
+            try:
+                await self._write(batch)
+            except Exception as exc:
+                self.counters["failed"] += len(batch)
+                logger.warning("audit_batch_failed", extra={"records": len(batch), "error": str(exc)})
+                continue
+            self.counters["batches"] += 1
+            self.counters["written"] += len(batch)
+            written += len(batch)
+        return written
+
+    async def _write(self, batch: list[AuditRecord]) -> None:
+        if settings.audit_sink == "db":
+            rows = await asyncio.to_thread(lambda: [_row(record) for record in batch])
+            for row in rows:
+                if row["request_payload"] is not None:
+                    row["request_payload"] = json.dumps(row["request_payload"], default=str)
+            session_factory = self.session_factory
+            if session_factory is None:
+                from app.db.session import SessionLocal
+
+                session_factory = SessionLocal
+            async with session_factory() as session:
+                await session.execute(insert(AuditEvent), rows)
+                await session.commit()
+        else:
+            await asyncio.to_thread(_write_log, batch)
+
+
+def _write_log(batch: list[AuditRecord]) -> None:
+    rows = [_row(record) for record in batch]
+    if settings.audit_log_file:
+        with open(settings.audit_log_file, "a", encoding="utf-8") as fh:
+            fh.writelines(json.dumps(row, default=str) + "\n" for row in rows)
+        return
+    for row in rows:
+        row.pop("created_at")
+        row["user_id"] = row["user_id"] or "-"
+        audit_logger.info("audit", extra=row)
+
+
+sink = AuditSink()
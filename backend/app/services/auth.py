@@ -24,14 +24,17 @@ async def get_user_by_google_sub(session: AsyncSession, google_sub: str) -> User
     return result.scalar_one_or_none()
 
 
-async def create_user(session: AsyncSession, user_in: UserCreate) -> User:
+async def create_user(session: AsyncSession, user_in: UserCreate, usable_password: bool = True) -> User:
+    """Create an account; ``usable_password=False`` skips hashing and leaves password login disabled."""
     existing = await get_user_by_email(session, user_in.email)
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
     db_user = User(
         email=user_in.email,
-        hashed_password=security.hash_password(user_in.password),
+        hashed_password=(
+            await security.hash_password_async(user_in.password) if usable_password else security.unusable_password()
+        ),
         name=user_in.name,
         preferred_language=user_in.preferred_language or "en",
     )
@@ -43,8 +46,12 @@ async def create_user(session: AsyncSession, user_in: UserCreate) -> User:
 
 async def authenticate_user(session: AsyncSession, email: str, password: str) -> User:
     user = await get_user_by_email(session, email)
-    if not user or not security.verify_password(password, user.hashed_password):
+    if not user or not await security.verify_password_async(password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if security.password_needs_rehash(user.hashed_password):
+        user.hashed_password = await security.hash_password_async(password)
+        session.add(user)
+        await session.commit()
     return user
 
 
@@ -87,7 +94,7 @@ async def confirm_reset_token(session: AsyncSession, token: str, new_password: s
     user = await session.get(User, reset.user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    user.hashed_password = security.hash_password(new_password)
+    user.hashed_password = await security.hash_password_async(new_password)
     reset.used = True
     await _revoke_other_reset_tokens(session, user.id)
     session.add_all([user, reset])
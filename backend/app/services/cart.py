@@ -1,15 +1,19 @@
 from decimal import Decimal, ROUND_HALF_UP
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from uuid import UUID
+from typing import Sequence
+from uuid import UUID, uuid4
 import logging
 
 from fastapi import HTTPException, status
+from sqlalchemy import func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import lazyload, selectinload
 
 from app.models.cart import Cart, CartItem
-from app.models.catalog import Product, ProductVariant
+from app.models.catalog import Product, ProductImage, ProductVariant
+from app.models.inventory import StockReservation
 from app.schemas.cart import CartItemCreate, CartItemUpdate, CartRead, CartItemRead, Totals
 from app.schemas.promo import PromoCodeRead, PromoCodeCreate
 from app.schemas.cart_sync import CartSyncItem
@@ -17,7 +21,8 @@ from app.models.promo import PromoCode
 from app.models.order import Order
 from app.models.user import User
 from app.models.order import ShippingMethod
-from app.services import email as email_service
+from app.services import inventory
+from app.services import jobs as jobs_service
 from app.core.config import settings
 from app.core.logging_config import request_id_ctx_var
 
@@ -25,6 +30,40 @@ from app.core.logging_config import request_id_ctx_var
 cart_logger = logging.getLogger("app.cart")
 
 
+@dataclass
+class ProductSummary:
+    """The product columns a cart shows, read without the ``Product`` mapper and its eager loads."""
+
+    id: UUID
+    name: str
+    slug: str
+    currency: str
+    stock_quantity: int
+    image_url: str | None
+
+
+@dataclass
+class CartLine:
+    id: UUID
+    product_id: UUID
+    variant_id: UUID | None
+    quantity: int
+    max_quantity: int | None
+    note: str | None
+    unit_price_at_add: Decimal
+    product: ProductSummary | None
+
+
+@dataclass
+class CartView:
+    """Read-only cart for rendering; duck-types ``Cart`` for ``cart_read`` and the totals helpers."""
+
+    id: UUID
+    user_id: UUID | None
+    session_id: str | None
+    items: list[CartLine] = field(default_factory=list)
+
+
 def _log_cart(event: str, cart: Cart, user_id: UUID | None = None) -> None:
     cart_id = getattr(cart, "id", None)
     cart_logger.info(
@@ -37,15 +76,17 @@ def _log_cart(event: str, cart: Cart, user_id: UUID | None = None) -> None:
     )
 
 
+# Items with their products and images only; the Product mapper would otherwise pull in its category,
+# tags and every other selectin relationship for each line.
+_CART_PRODUCTS = selectinload(Cart.items).selectinload(CartItem.product)
+_CART_ITEMS = (_CART_PRODUCTS.lazyload("*"), _CART_PRODUCTS.selectinload(Product.images))
+
+
 async def _get_or_create_cart(session: AsyncSession, user_id: UUID | None, session_id: str | None) -> Cart:
     if user_id:
         result = await session.execute(
             select(Cart)
-            .options(
-                selectinload(Cart.items)
-                .selectinload(CartItem.product)
-                .selectinload(Product.images)
-            )
+            .options(*_CART_ITEMS)
             .where(Cart.user_id == user_id)
         )
         cart = result.scalar_one_or_none()
@@ -54,11 +95,7 @@ async def _get_or_create_cart(session: AsyncSession, user_id: UUID | None, sessi
     if session_id:
         result = await session.execute(
             select(Cart)
-            .options(
-                selectinload(Cart.items)
-                .selectinload(CartItem.product)
-                .selectinload(Product.images)
-            )
+            .options(*_CART_ITEMS)
             .where(Cart.session_id == session_id)
         )
         cart = result.scalar_one_or_none()
@@ -90,7 +127,9 @@ def _enforce_max_quantity(quantity: int, limit: int | None) -> None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Quantity exceeds allowed maximum")
 
 
-def _get_first_image(product: Product | None) -> str | None:
+def _get_first_image(product: Product | ProductSummary | None) -> str | None:
+    if isinstance(product, ProductSummary):
+        return product.image_url
     if not product or not product.images:
         return None
     first = sorted(product.images, key=lambda img: img.sort_order or 0)
@@ -161,30 +200,117 @@ def calculate_totals(
     return totals, discount_val
 
 
+def _first_image_url():
+    return (
+        select(ProductImage.url)
+        .where(ProductImage.product_id == Product.id)
+        .order_by(func.coalesce(ProductImage.sort_order, 0), ProductImage.created_at)
+        .limit(1)
+        .correlate(Product)
+        .scalar_subquery()
+    )
+
+
+async def _load_cart_view(session: AsyncSession, condition) -> CartView | None:
+    """Cart, items, product summaries and first images in one statement."""
+    stmt = (
+        select(
+            Cart.id.label("cart_id"),
+            Cart.user_id,
+            Cart.session_id,
+            CartItem.id.label("item_id"),
+            CartItem.product_id,
+            CartItem.variant_id,
+            CartItem.quantity,
+            CartItem.max_quantity,
+            CartItem.note,
+            CartItem.unit_price_at_add,
+            Product.name,
+            Product.slug,
+            Product.currency,
+            Product.stock_quantity,
+            _first_image_url().label("image_url"),
+        )
+        .select_from(Cart)
+        .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+        .outerjoin(Product, Product.id == CartItem.product_id)
+        .where(condition)
+        .order_by(CartItem.created_at, CartItem.id)
+    )
+    rows = (await session.execute(stmt)).all()
+    if not rows:
+        return None
+    view = CartView(id=rows[0].cart_id, user_id=rows[0].user_id, session_id=rows[0].session_id)
+    for row in rows:
+        if row.item_id is None:
+            continue
+        product = None
+        if row.name is not None:
+            product = ProductSummary(
+                id=row.product_id,
+                name=row.name,
+                slug=row.slug,
+                currency=row.currency,
+                stock_quantity=row.stock_quantity,
+                image_url=row.image_url,
+            )
+        view.items.append(
+            CartLine(
+                id=row.item_id,
+                product_id=row.product_id,
+                variant_id=row.variant_id,
+                quantity=row.quantity,
+                max_quantity=row.max_quantity,
+                note=row.note,
+                unit_price_at_add=Decimal(row.unit_price_at_add),
+                product=product,
+            )
+        )
+    return view
+
+
+async def get_cart_view(session: AsyncSession, user_id: UUID | None, session_id: str | None) -> CartView:
+    """Cart read path for ``GET /cart``: same lookup order as ``get_cart``, without loading ORM objects."""
+    view = None
+    if user_id:
+        view = await _load_cart_view(session, Cart.user_id == user_id)
+    if view is None and session_id:
+        view = await _load_cart_view(session, Cart.session_id == session_id)
+    if view is None:
+        cart = Cart(id=uuid4(), user_id=user_id, session_id=session_id)
+        session.add(cart)
+        await session.commit()
+        return CartView(id=cart.id, user_id=user_id, session_id=session_id)
+    if session_id and not view.session_id:
+        await session.execute(update(Cart).where(Cart.id == view.id).values(session_id=session_id))
+        await session.commit()
+        view.session_id = session_id
+    return view
+
+
 async def serialize_cart(
     session: AsyncSession,
     cart: Cart,
     shipping_method: ShippingMethod | None = None,
     promo: PromoCodeRead | None = None,
 ) -> CartRead:
-    result = await session.execute(
-        select(Cart)
-            .options(
-                selectinload(Cart.items)
-                .selectinload(CartItem.product)
-                .selectinload(Product.images)
-            )
-            .where(Cart.id == cart.id)
-    )
-    hydrated = result.scalar_one()
+    await session.flush()
+    view = await _load_cart_view(session, Cart.id == cart.id)
+    return cart_read(view, shipping_method=shipping_method, promo=promo)
+
+
+def cart_read(
+    cart: Cart, shipping_method: ShippingMethod | None = None, promo: PromoCodeRead | None = None
+) -> CartRead:
+    """``CartRead`` for a cart whose items and products are already loaded."""
     currency = next(
-        (getattr(item.product, "currency", None) for item in hydrated.items if getattr(item, "product", None)), "USD"
+        (getattr(item.product, "currency", None) for item in cart.items if getattr(item, "product", None)), "USD"
     ) or "USD"
-    totals = _calculate_totals(hydrated, shipping_method=shipping_method, promo=promo, currency=currency)
+    totals = _calculate_totals(cart, shipping_method=shipping_method, promo=promo, currency=currency)
     return CartRead(
-        id=hydrated.id,
-        user_id=hydrated.user_id,
-        session_id=hydrated.session_id,
+        id=cart.id,
+        user_id=cart.user_id,
+        session_id=cart.session_id,
         items=[
             CartItemRead(
                 id=item.id,
@@ -199,42 +325,79 @@ async def serialize_cart(
                 image_url=_get_first_image(item.product),
                 currency=getattr(item.product, "currency", None) or "USD",
             )
-            for item in hydrated.items
+            for item in cart.items
         ],
         totals=totals,
     )
 
 
-async def add_item(
-    session: AsyncSession,
-    cart: Cart,
-    payload: CartItemCreate,
-) -> CartItem:
-    product = await session.get(Product, payload.product_id)
-    if not product or product.is_deleted or not product.is_active:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+async def _catalog_rows(
+    session: AsyncSession, product_ids: set[UUID], variant_ids: set[UUID]
+) -> tuple[dict[UUID, Product], dict[UUID, ProductVariant]]:
+    """Products and variants by id, one ``IN`` query each, without the ``Product`` mapper's eager loads."""
+    products: dict[UUID, Product] = {}
+    variants: dict[UUID, ProductVariant] = {}
+    if product_ids:
+        result = await session.execute(select(Product).options(lazyload("*")).where(Product.id.in_(product_ids)))
+        products = {product.id: product for product in result.scalars()}
+    if variant_ids:
+        result = await session.execute(
+            select(ProductVariant).options(lazyload("*")).where(ProductVariant.id.in_(variant_ids))
+        )
+        variants = {variant.id: variant for variant in result.scalars()}
+    return products, variants
 
-    variant = None
-    if payload.variant_id:
-        variant = await session.get(ProductVariant, payload.variant_id)
-        if not variant or variant.product_id != product.id:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid variant")
 
-    await _validate_stock(product, variant, payload.quantity)
-    limit = payload.max_quantity or (variant.stock_quantity if variant else product.stock_quantity)
-    _enforce_max_quantity(payload.quantity, limit)
+async def validate_lines(
+    session: AsyncSession, payloads: Sequence[CartItemCreate]
+) -> list[tuple[Product, ProductVariant | None]]:
+    """Load and check the products/variants for new cart lines (stock and quantity limits)."""
+    products, variants = await _catalog_rows(
+        session, {p.product_id for p in payloads}, {p.variant_id for p in payloads if p.variant_id}
+    )
+    checked = []
+    for payload in payloads:
+        product = products.get(payload.product_id)
+        if not product or product.is_deleted or not product.is_active:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+
+        variant = None
+        if payload.variant_id:
+            variant = variants.get(payload.variant_id)
+            if not variant or variant.product_id != product.id:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid variant")
+
+        await _validate_stock(product, variant, payload.quantity)
+        limit = payload.max_quantity or (variant.stock_quantity if variant else product.stock_quantity)
+        _enforce_max_quantity(payload.quantity, limit)
+        checked.append((product, variant))
+    return checked
+
+
+async def validate_line(session: AsyncSession, payload: CartItemCreate) -> tuple[Product, ProductVariant | None]:
+    return (await validate_lines(session, [payload]))[0]
 
-    unit_price = _to_decimal(product.base_price)
+
+def unit_price(product: Product, variant: ProductVariant | None) -> Decimal:
+    price = _to_decimal(product.base_price)
     if variant:
-        unit_price += _to_decimal(variant.additional_price_delta)
+        price += _to_decimal(variant.additional_price_delta)
+    return price
+
 
+async def add_item(
+    session: AsyncSession,
+    cart: Cart,
+    payload: CartItemCreate,
+) -> CartItem:
+    product, variant = await validate_line(session, payload)
     item = CartItem(
         cart=cart,
         product_id=product.id,
         variant_id=variant.id if variant else None,
         quantity=payload.quantity,
         note=payload.note,
-        unit_price_at_add=unit_price,
+        unit_price_at_add=unit_price(product, variant),
         max_quantity=payload.max_quantity,
     )
     session.add(item)
@@ -281,64 +444,80 @@ async def delete_item(session: AsyncSession, cart: Cart, item_id: UUID) -> None:
 
 
 async def sync_cart(session: AsyncSession, cart: Cart, items: list[CartSyncItem]) -> None:
-    # clear existing items
-    for existing in list(cart.items):
-        await session.delete(existing)
-    await session.flush()
-    for item in items:
-        await add_item(
-            session,
-            cart,
-            CartItemCreate(
-                product_id=item.product_id,
-                variant_id=item.variant_id,
-                quantity=item.quantity,
-                note=item.note,
-                max_quantity=item.max_quantity,
-            ),
-        )
-    await session.refresh(cart)
-
-
-async def merge_guest_cart(session: AsyncSession, user_cart: Cart, guest_session_id: str | None) -> Cart:
-    if not guest_session_id:
-        return user_cart
-
-    guest = await _get_or_create_cart(session, None, guest_session_id)
-    if guest.id == user_cart.id:
+    """Make ``cart`` hold exactly ``items``: existing lines are updated in place, the rest inserted or
+    deleted, all in one transaction."""
+    payloads = [CartItemCreate(**item.model_dump()) for item in items]
+    checked = await validate_lines(session, payloads)
+
+    existing: dict[tuple[UUID, UUID | None], list[CartItem]] = {}
+    for current in cart.items:
+        existing.setdefault((current.product_id, current.variant_id), []).append(current)
+    for payload, (product, variant) in zip(payloads, checked):
+        matches = existing.get((payload.product_id, payload.variant_id))
+        if matches:
+            item = matches.pop(0)
+        else:
+            item = CartItem(cart=cart, product_id=product.id, variant_id=variant.id if variant else None)
+            session.add(item)
+        item.quantity = payload.quantity
+        item.note = payload.note
+        item.max_quantity = payload.max_quantity
+        item.unit_price_at_add = unit_price(product, variant)
+    stale = [item for leftovers in existing.values() for item in leftovers]
+    for item in stale:
+        cart.items.remove(item)  # delete-orphan: removed rows are deleted on flush
+    await session.commit()
+    record_cart_event("sync", {"cart_id": str(cart.id), "items": len(payloads), "removed": len(stale)})
+
+
+async def merge_guest_cart(
+    session: AsyncSession, user_cart: Cart, guest_session_id: str | None, guest_items: Sequence = ()
+) -> Cart:
+    """Move a guest cart into ``user_cart``.
+
+    The guest cart is the stored one for ``guest_session_id`` and/or ``guest_items``, the priced lines of a
+    stateless token cart (``guest_cart.hydrate``).
+    """
+    guest = None
+    if guest_session_id:
+        guest = await _get_or_create_cart(session, None, guest_session_id)
+        if guest.id == user_cart.id:
+            guest = None
+    items = [*(guest.items if guest is not None else ()), *guest_items]
+    if not items:
         return user_cart
 
-    for guest_item in guest.items:
-        # try to find matching item
-        match = next(
-            (i for i in user_cart.items if i.product_id == guest_item.product_id and i.variant_id == guest_item.variant_id),
-            None,
-        )
-        product = await session.get(Product, guest_item.product_id)
+    products, variants = await _catalog_rows(
+        session, {item.product_id for item in items}, {item.variant_id for item in items if item.variant_id}
+    )
+    lines = {(item.product_id, item.variant_id): item for item in user_cart.items}
+    for guest_item in items:
+        product = products.get(guest_item.product_id)
         if not product:
             continue
-        variant = await session.get(ProductVariant, guest_item.variant_id) if guest_item.variant_id else None
+        variant = variants.get(guest_item.variant_id) if guest_item.variant_id else None
+        key = (guest_item.product_id, guest_item.variant_id)
+        match = lines.get(key)
         new_qty = guest_item.quantity + (match.quantity if match else 0)
         await _validate_stock(product, variant, new_qty)
 
-        unit_price = guest_item.unit_price_at_add
         if match:
             match.quantity = new_qty
-            match.unit_price_at_add = unit_price
-            session.add(match)
+            match.unit_price_at_add = guest_item.unit_price_at_add
         else:
-            session.add(
-                CartItem(
-                    cart=user_cart,
-                    product_id=guest_item.product_id,
-                    variant_id=guest_item.variant_id,
-                    quantity=guest_item.quantity,
-                    unit_price_at_add=unit_price,
-                )
+            lines[key] = CartItem(
+                cart=user_cart,
+                product_id=guest_item.product_id,
+                variant_id=guest_item.variant_id,
+                quantity=guest_item.quantity,
+                note=guest_item.note,
+                max_quantity=guest_item.max_quantity,
+                unit_price_at_add=guest_item.unit_price_at_add,
             )
-    await session.delete(guest)
+            session.add(lines[key])
+    if guest is not None:
+        await session.delete(guest)
     await session.commit()
-    await session.refresh(user_cart)
     return user_cart
 
 
@@ -385,9 +564,9 @@ async def validate_promo(session: AsyncSession, code: str, currency: str | None
     return PromoCodeRead.model_validate(promo)
 
 
-async def reserve_stock_for_checkout(session: AsyncSession, cart: Cart) -> bool:
-    # Placeholder: would mark stock as reserved in inventory system
-    return True
+async def reserve_stock_for_checkout(session: AsyncSession, cart: Cart) -> list[StockReservation]:
+    """Hold the cart's units until the order is paid; 400 "Insufficient stock" if any line cannot be covered."""
+    return await inventory.reserve(session, [(item.product_id, item.variant_id, item.quantity) for item in cart.items])
 
 
 async def run_abandoned_cart_job(session: AsyncSession, max_age_hours: int = 24) -> int:
@@ -396,16 +575,17 @@ async def run_abandoned_cart_job(session: AsyncSession, max_age_hours: int = 24)
         select(Cart).options(selectinload(Cart.items)).where(Cart.user_id.isnot(None), Cart.updated_at < cutoff)
     )
     carts = result.scalars().all()
-    sent = 0
+    emails: list[str] = []
     for cart in carts:
         if cart.items and cart.user_id:
             user_result = await session.execute(select(User).where(User.id == cart.user_id))
             user = user_result.scalar_one_or_none()
             if user and user.email:
-                await email_service.send_cart_abandonment(user.email)
-                sent += 1
+                emails.append(user.email)
+    if emails:
+        await jobs_service.enqueue(session, "email.cart_abandonment_batch", {"emails": emails})
     await cleanup_stale_guest_carts(session, max_age_hours)
-    return sent
+    return len(emails)
 
 
 def record_cart_event(event: str, payload: dict | None = None) -> None:
@@ -1,13 +1,13 @@
 from datetime import datetime, timezone
-import csv
-import io
+import base64
+import binascii
 import json
 import random
 import string
 import uuid
 
 from fastapi import HTTPException, status
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, func, or_, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -23,7 +23,9 @@ from app.models.catalog import (
     ProductSlugHistory,
     RecentlyViewedProduct,
     ProductAuditLog,
+    ProductTranslation,
     FeaturedCollection,
+    product_tags,
 )
 from app.schemas.catalog import (
     CategoryCreate,
@@ -41,7 +43,11 @@ from app.schemas.catalog import (
     ProductFeedItem,
 )
 from app.services.storage import delete_file
-from app.services import email as email_service
+from app.services import jobs as jobs_service
+from app.services import exporter as exporter_service
+from app.services import search as search_service
+from app.services import recently_viewed
+from app.core import cache
 from app.core.config import settings
 
 
@@ -166,15 +172,25 @@ async def create_category(session: AsyncSession, payload: CategoryCreate) -> Cat
     session.add(category)
     await session.commit()
     await session.refresh(category)
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     return category
 
 
 async def update_category(session: AsyncSession, category: Category, payload: CategoryUpdate) -> Category:
-    for field, value in payload.model_dump(exclude_unset=True).items():
+    data = payload.model_dump(exclude_unset=True)
+    renamed = "name" in data and data["name"] != category.name
+    for field, value in data.items():
         setattr(category, field, value)
     session.add(category)
+    if renamed:
+        # The category name is part of every product's search document.
+        result = await session.execute(select(Product.id).where(Product.category_id == category.id))
+        product_ids = list(result.scalars())
+        for start in range(0, len(product_ids), 500):
+            await search_service.reindex_products(session, product_ids[start : start + 500])
     await session.commit()
     await session.refresh(category)
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     return category
 
 
@@ -197,6 +213,7 @@ async def reorder_categories(session: AsyncSession, payload: list[CategoryReorde
         return []
     session.add_all(updated)
     await session.commit()
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     return [
         CategoryRead(
             id=cat.id,
@@ -211,8 +228,16 @@ async def reorder_categories(session: AsyncSession, payload: list[CategoryReorde
     ]
 
 
+# Product fields that feed the search documents built by app.services.search.
+SEARCH_FIELDS = {"name", "sku", "short_description", "long_description", "category_id", "tags"}
+
+
 async def create_product(
-    session: AsyncSession, payload: ProductCreate, commit: bool = True, user_id: uuid.UUID | None = None
+    session: AsyncSession,
+    payload: ProductCreate,
+    commit: bool = True,
+    user_id: uuid.UUID | None = None,
+    reindex: bool = True,
 ) -> Product:
     await _ensure_slug_unique(session, payload.slug)
     sku = payload.sku or await _generate_unique_sku(session, payload.slug)
@@ -233,17 +258,24 @@ async def create_product(
     if payload.options:
         product.options = [ProductOption(**opt.model_dump()) for opt in payload.options]
     session.add(product)
+    await session.flush()
+    if reindex:
+        await search_service.reindex_products(session, [product.id])
     if commit:
         await session.commit()
         await session.refresh(product)
         await _log_product_action(session, product.id, "create", user_id, {"slug": product.slug})
-    else:
-        await session.flush()
+        await cache.invalidate(cache.CATALOG_NAMESPACE)
     return product
 
 
 async def update_product(
-    session: AsyncSession, product: Product, payload: ProductUpdate, commit: bool = True, user_id: uuid.UUID | None = None
+    session: AsyncSession,
+    product: Product,
+    payload: ProductUpdate,
+    commit: bool = True,
+    user_id: uuid.UUID | None = None,
+    reindex: bool = True,
 ) -> Product:
     data = payload.model_dump(exclude_unset=True)
     if "base_price" in data or "currency" in data:
@@ -265,13 +297,15 @@ async def update_product(
             setattr(product, field, value)
     _set_publish_timestamp(product, data.get("status"))
     session.add(product)
+    await session.flush()
+    if reindex and SEARCH_FIELDS.intersection(data):
+        await search_service.reindex_products(session, [product.id])
     if commit:
         await session.commit()
         await session.refresh(product)
         await _log_product_action(session, product.id, "update", user_id, data)
-        await _maybe_alert_low_stock(product)
-    else:
-        await session.flush()
+        await cache.invalidate(cache.CATALOG_NAMESPACE)
+        await _maybe_alert_low_stock(session, product)
     return product
 
 
@@ -280,6 +314,7 @@ async def add_product_image(session: AsyncSession, product: Product, payload: Pr
     session.add(image)
     await session.commit()
     await session.refresh(image)
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     return image
 
 
@@ -290,6 +325,7 @@ async def add_product_image_from_path(
     session.add(image)
     await session.commit()
     await session.refresh(image)
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     return image
 
 
@@ -300,6 +336,7 @@ async def delete_product_image(session: AsyncSession, product: Product, image_id
     delete_file(image.url)
     await session.delete(image)
     await session.commit()
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     await _log_product_action(session, product.id, "image_deleted", user_id, {"image_id": image_id, "url": image.url})
 
 
@@ -310,6 +347,7 @@ async def update_product_image_sort(session: AsyncSession, product: Product, ima
     image.sort_order = sort_order
     session.add(image)
     await session.commit()
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     await session.refresh(product, attribute_names=["images"])
     return product
 
@@ -318,6 +356,7 @@ async def soft_delete_product(session: AsyncSession, product: Product, user_id:
     product.is_deleted = True
     session.add(product)
     await session.commit()
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     await _log_product_action(session, product.id, "soft_delete", user_id, {"slug": product.slug})
 
 
@@ -342,6 +381,7 @@ async def bulk_update_products(
         session.add(product)
         updated.append(product)
     await session.commit()
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     for product in updated:
         await session.refresh(product)
         await _log_product_action(
@@ -388,6 +428,7 @@ async def create_featured_collection(session: AsyncSession, payload: FeaturedCol
     session.add(collection)
     await session.commit()
     await session.refresh(collection)
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     return collection
 
 
@@ -402,6 +443,7 @@ async def update_featured_collection(
     session.add(collection)
     await session.commit()
     await session.refresh(collection)
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     return collection
 
 
@@ -434,25 +476,67 @@ async def get_product_feed(session: AsyncSession, lang: str | None = None) -> li
     return feed
 
 
-async def get_product_feed_csv(session: AsyncSession, lang: str | None = None) -> str:
-    feed = await get_product_feed(session, lang=lang)
-    buf = io.StringIO()
-    fieldnames = ["slug", "name", "price", "currency", "description", "category_slug", "tags"]
-    writer = csv.DictWriter(buf, fieldnames=fieldnames)
-    writer.writeheader()
-    for item in feed:
-        writer.writerow(
-            {
-                "slug": item.slug,
-                "name": item.name,
-                "price": item.price,
-                "currency": item.currency,
-                "description": item.description or "",
-                "category_slug": item.category_slug or "",
-                "tags": ",".join(item.tags),
-            }
+PRODUCT_FEED_CSV_HEADER = ["slug", "name", "price", "currency", "description", "category_slug", "tags"]
+
+
+async def _tag_slugs_by_product(session: AsyncSession, product_ids: list[uuid.UUID]) -> dict[uuid.UUID, list[str]]:
+    result = await session.execute(
+        select(product_tags.c.product_id, Tag.slug)
+        .join(Tag, Tag.id == product_tags.c.tag_id)
+        .where(product_tags.c.product_id.in_(product_ids))
+    )
+    tags: dict[uuid.UUID, list[str]] = {}
+    for product_id, slug in result:
+        tags.setdefault(product_id, []).append(slug)
+    return tags
+
+
+async def iter_product_feed_csv(session: AsyncSession, lang: str | None = None):
+    """Stream the marketing feed as CSV chunks, reading only the columns it needs."""
+    columns = [
+        Product.id,
+        Product.slug,
+        Product.name,
+        Product.base_price,
+        Product.currency,
+        Product.short_description,
+        Product.long_description,
+        Category.slug,
+    ]
+    query = select(*columns).join(Category, Category.id == Product.category_id)
+    if lang:
+        query = query.add_columns(
+            ProductTranslation.id, ProductTranslation.name, ProductTranslation.short_description, ProductTranslation.long_description
+        ).outerjoin(
+            ProductTranslation, and_(ProductTranslation.product_id == Product.id, ProductTranslation.lang == lang)
         )
-    return buf.getvalue()
+    query = query.where(Product.is_deleted.is_(False), Product.status == ProductStatus.published).order_by(
+        Product.created_at.desc(), Product.id.desc()
+    )
+
+    async def batches():
+        async for rows in exporter_service.iter_batches(session, query):
+            tags = await _tag_slugs_by_product(session, [row[0] for row in rows])
+            out = []
+            for row in rows:
+                product_id, slug, name, price, currency, short_description, long_description, category_slug = row[:8]
+                if lang and row[8] is not None:
+                    name, short_description, long_description = row[9], row[10], row[11]
+                out.append(
+                    [
+                        slug,
+                        name,
+                        float(price),
+                        currency,
+                        short_description or long_description or "",
+                        category_slug or "",
+                        ",".join(tags.get(product_id, [])),
+                    ]
+                )
+            yield out
+
+    async for chunk in exporter_service.iter_csv(PRODUCT_FEED_CSV_HEADER, batches()):
+        yield chunk
 
 
 def slugify(value: str) -> str:
@@ -460,6 +544,40 @@ def slugify(value: str) -> str:
     return "-".join(filter(None, cleaned.split("-")))
 
 
+PRODUCT_SORT_COLUMNS = {
+    "newest": (Product.created_at, True),
+    "price_asc": (Product.base_price, False),
+    "price_desc": (Product.base_price, True),
+    "name_asc": (Product.name, False),
+    "name_desc": (Product.name, True),
+}
+
+
+def encode_product_cursor(sort: str, product_id: uuid.UUID) -> str:
+    raw = json.dumps({"s": sort, "id": str(product_id)}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_product_cursor(cursor: str, sort: str) -> uuid.UUID:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        product_id = uuid.UUID(str(data["id"]))
+        cursor_sort = data["s"]
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match sort order")
+    return product_id
+
+
+def _keyset_after(sort_column, descending: bool, anchor_value, anchor_id: uuid.UUID):
+    # A row-value comparison is a single range on the composite (sort column, id) indexes from 0029;
+    # the equivalent OR/AND expansion is filtered row by row instead of seeked.
+    key, anchor = tuple_(sort_column, Product.id), tuple_(anchor_value, anchor_id)
+    return key < anchor if descending else key > anchor
+
+
 async def list_products_with_filters(
     session: AsyncSession,
     category_slug: str | None,
@@ -472,7 +590,14 @@ async def list_products_with_filters(
     limit: int,
     offset: int,
     lang: str | None = None,
+    cursor: str | None = None,
+    include_total: bool = True,
 ):
+    """Return ``(items, total_items, next_cursor)`` for the storefront listing.
+
+    With ``cursor`` set, rows are fetched by keyset on ``(sort column, Product.id)`` and
+    ``offset`` is ignored. ``total_items`` is ``None`` when ``include_total`` is false.
+    """
     options = [
         selectinload(Product.images),
         selectinload(Product.tags),
@@ -487,39 +612,57 @@ async def list_products_with_filters(
         base_query = base_query.join(Category).where(Category.slug == category_slug)
     if is_featured is not None:
         base_query = base_query.where(Product.is_featured == is_featured)
-    if search:
-        like = f"%{search.lower()}%"
-        base_query = base_query.where(
-            (Product.name.ilike(like)) | (Product.short_description.ilike(like)) | (Product.long_description.ilike(like))
-        )
+    ranking = search_service.build_search_ranking(session, search, lang) if search else None
+    if ranking is not None:
+        base_query = base_query.join(ranking, ranking.c.product_id == Product.id)
     if min_price is not None:
         base_query = base_query.where(Product.base_price >= min_price)
     if max_price is not None:
         base_query = base_query.where(Product.base_price <= max_price)
     if tags:
-        base_query = base_query.join(Product.tags).where(Tag.slug.in_(tags))
-
-    total_query = base_query.with_only_columns(func.count(func.distinct(Product.id))).order_by(None)
-    total_result = await session.execute(total_query)
-    total_items = total_result.scalar_one()
-
-    if sort == "price_asc":
-        base_query = base_query.order_by(Product.base_price.asc())
-    elif sort == "price_desc":
-        base_query = base_query.order_by(Product.base_price.desc())
-    elif sort == "name_asc":
-        base_query = base_query.order_by(Product.name.asc())
-    elif sort == "name_desc":
-        base_query = base_query.order_by(Product.name.desc())
+        # EXISTS keeps one row per product, so limit + 1 still counts products when several tags match.
+        base_query = base_query.where(Product.tags.any(Tag.slug.in_(tags)))
+
+    total_items: int | None = None
+    if include_total:
+        total_query = base_query.with_only_columns(func.count(func.distinct(Product.id))).order_by(None)
+        total_result = await session.execute(total_query)
+        total_items = total_result.scalar_one()
+
+    if ranking is not None and sort in (None, "relevance"):
+        sort_key = "relevance"
+        sort_column, descending = ranking.c.rank, True
     else:
-        base_query = base_query.order_by(Product.created_at.desc())
+        sort_key = sort if sort in PRODUCT_SORT_COLUMNS else "newest"
+        sort_column, descending = PRODUCT_SORT_COLUMNS[sort_key]
+    if descending:
+        base_query = base_query.order_by(sort_column.desc(), Product.id.desc())
+    else:
+        base_query = base_query.order_by(sort_column.asc(), Product.id.asc())
+
+    if cursor:
+        anchor_id = decode_product_cursor(cursor, sort_key)
+        # The anchor's sort key is re-read by primary key so typed values (Numeric, timestamps,
+        # search ranks) never round-trip through the client.
+        if sort_key == "relevance":
+            anchor_value = select(ranking.c.rank).where(ranking.c.product_id == anchor_id).scalar_subquery()
+        else:
+            anchor_value = select(sort_column).where(Product.id == anchor_id).scalar_subquery()
+        base_query = base_query.where(_keyset_after(sort_column, descending, anchor_value, anchor_id))
+    else:
+        base_query = base_query.offset(offset)
 
-    result = await session.execute(base_query.limit(limit).offset(offset))
+    # Fetch one extra row to learn whether another page exists without counting.
+    result = await session.execute(base_query.limit(limit + 1))
     items = list(result.scalars().unique())
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_product_cursor(sort_key, items[-1].id)
     if lang:
         for item in items:
             apply_product_translation(item, lang)
-    return items, total_items
+    return items, total_items, next_cursor
 
 
 async def _get_or_create_tags(session: AsyncSession, names: list[str]) -> list[Tag]:
@@ -578,6 +721,7 @@ async def duplicate_product(session: AsyncSession, product: Product) -> Product:
     clone.tags = product.tags.copy()
     session.add(clone)
     await session.commit()
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     await session.refresh(clone)
     return clone
 
@@ -631,6 +775,7 @@ async def recompute_product_rating(session: AsyncSession, product_id: uuid.UUID)
     product.rating_count = count
     session.add(product)
     await session.commit()
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
     await session.refresh(product)
 
 
@@ -649,41 +794,9 @@ async def get_related_products(session: AsyncSession, product: Product, limit: i
     return result.scalars().unique().all()
 
 
-async def record_recently_viewed(
-    session: AsyncSession, product: Product, user_id: uuid.UUID | None, session_id: str | None, limit: int = 10
-) -> None:
-    if not user_id and not session_id:
-        return
-    query = select(RecentlyViewedProduct).where(RecentlyViewedProduct.product_id == product.id)
-    if user_id:
-        query = query.where(RecentlyViewedProduct.user_id == user_id)
-    else:
-        query = query.where(RecentlyViewedProduct.session_id == session_id)
-    existing = await session.execute(query)
-    view = existing.scalar_one_or_none()
-    now = datetime.now(timezone.utc)
-    if view:
-        view.viewed_at = now
-    else:
-        view = RecentlyViewedProduct(
-            product_id=product.id,
-            user_id=user_id,
-            session_id=session_id,
-            viewed_at=now,
-        )
-        session.add(view)
-    await session.commit()
-
-    # enforce cap
-    cleanup_query = select(RecentlyViewedProduct).where(
-        (RecentlyViewedProduct.user_id == user_id) if user_id else (RecentlyViewedProduct.session_id == session_id)
-    ).order_by(RecentlyViewedProduct.viewed_at.desc())
-    result = await session.execute(cleanup_query)
-    all_views = result.scalars().all()
-    for extra in all_views[limit:]:
-        await session.delete(extra)
-    if len(all_views) > limit:
-        await session.commit()
+def record_recently_viewed(product: Product, user_id: uuid.UUID | None, session_id: str | None) -> None:
+    """Buffer the view; ``recently_viewed.buffer`` writes it in the background."""
+    recently_viewed.buffer.record(user_id, session_id, product.id)
 
 
 async def get_recently_viewed(
@@ -691,14 +804,11 @@ async def get_recently_viewed(
 ):
     if not user_id and not session_id:
         return []
+    visible = and_(Product.is_deleted.is_(False), Product.status == ProductStatus.published)
     query = (
         select(RecentlyViewedProduct)
         .options(selectinload(RecentlyViewedProduct.product).selectinload(Product.images))
-        .where(
-            RecentlyViewedProduct.product.has(
-                and_(Product.is_deleted.is_(False), Product.status == ProductStatus.published)
-            )
-        )
+        .where(RecentlyViewedProduct.product.has(visible))
     )
     if user_id:
         query = query.where(RecentlyViewedProduct.user_id == user_id)
@@ -706,140 +816,103 @@ async def get_recently_viewed(
         query = query.where(RecentlyViewedProduct.session_id == session_id)
     query = query.order_by(RecentlyViewedProduct.viewed_at.desc()).limit(limit)
     result = await session.execute(query)
-    return [rv.product for rv in result.scalars()]
-
-
-async def export_products_csv(session: AsyncSession) -> str:
-    products_result = await session.execute(
-        select(Product)
-        .options(selectinload(Product.category), selectinload(Product.tags))
+    views = {rv.product_id: (rv.viewed_at, rv.product) for rv in result.scalars()}
+
+    # Views still waiting in the write-behind buffer are newer than anything stored.
+    pending = recently_viewed.buffer.pending_for(user_id, session_id)
+    missing = [product_id for product_id in pending if product_id not in views]
+    if missing:
+        products = await session.execute(
+            select(Product).options(selectinload(Product.images)).where(Product.id.in_(missing), visible)
+        )
+        for product in products.scalars():
+            views[product.id] = (pending[product.id], product)
+    for product_id, viewed_at in pending.items():
+        if product_id in views:
+            views[product_id] = (viewed_at, views[product_id][1])
+    ordered = sorted(views.values(), key=lambda item: _as_aware(item[0]), reverse=True)
+    return [product for _, product in ordered[:limit]]
+
+
+def _as_aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes for timezone-aware columns.
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+PRODUCT_EXPORT_CSV_HEADER = [
+    "slug",
+    "name",
+    "category_slug",
+    "base_price",
+    "currency",
+    "stock_quantity",
+    "status",
+    "is_featured",
+    "is_active",
+    "short_description",
+    "long_description",
+    "tags",
+]
+
+
+async def iter_products_csv(session: AsyncSession):
+    """Stream the admin product export as CSV chunks in the format ``import_products_csv`` reads."""
+    query = (
+        select(
+            Product.id,
+            Product.slug,
+            Product.name,
+            Category.slug,
+            Product.base_price,
+            Product.currency,
+            Product.stock_quantity,
+            Product.status,
+            Product.is_featured,
+            Product.is_active,
+            Product.short_description,
+            Product.long_description,
+        )
+        .join(Category, Category.id == Product.category_id)
         .where(Product.is_deleted.is_(False))
-        .order_by(Product.created_at.desc())
+        .order_by(Product.created_at.desc(), Product.id.desc())
     )
-    products = products_result.scalars().unique().all()
-    buf = io.StringIO()
-    fieldnames = [
-        "slug",
-        "name",
-        "category_slug",
-        "base_price",
-        "currency",
-        "stock_quantity",
-        "status",
-        "is_featured",
-        "is_active",
-        "short_description",
-        "long_description",
-        "tags",
-    ]
-    writer = csv.DictWriter(buf, fieldnames=fieldnames)
-    writer.writeheader()
-    for p in products:
-        writer.writerow(
-            {
-                "slug": p.slug,
-                "name": p.name,
-                "category_slug": p.category.slug if p.category else "",
-                "base_price": float(p.base_price),
-                "currency": p.currency,
-                "stock_quantity": p.stock_quantity,
-                "status": p.status.value,
-                "is_featured": p.is_featured,
-                "is_active": p.is_active,
-                "short_description": p.short_description or "",
-                "long_description": p.long_description or "",
-                "tags": ",".join(tag.slug for tag in p.tags),
-            }
-        )
-    return buf.getvalue()
 
-
-async def import_products_csv(session: AsyncSession, content: str, dry_run: bool = True):
-    reader = csv.DictReader(io.StringIO(content))
-    created = 0
-    updated = 0
-    errors: list[str] = []
-
-    for idx, row in enumerate(reader, start=2):
-        slug = (row.get("slug") or "").strip()
-        name = (row.get("name") or "").strip()
-        category_slug = (row.get("category_slug") or "").strip()
-        if not slug or not name or not category_slug:
-            errors.append(f"Row {idx}: missing slug, name, or category_slug")
-            continue
-        try:
-            base_price = float(row.get("base_price") or 0)
-            stock_quantity = int(row.get("stock_quantity") or 0)
-        except ValueError:
-            errors.append(f"Row {idx}: invalid base_price or stock_quantity")
-            continue
-        currency = (row.get("currency") or "USD").strip()
-        status_value = (row.get("status") or ProductStatus.draft.value).strip()
-        try:
-            status_enum = ProductStatus(status_value)
-        except ValueError:
-            errors.append(f"Row {idx}: invalid status {status_value}")
-            continue
-        is_featured = str(row.get("is_featured") or "").lower() in {"true", "1", "yes"}
-        is_active = str(row.get("is_active") or "true").lower() not in {"false", "0", "no"}
-        short_description = (row.get("short_description") or "").strip() or None
-        long_description = (row.get("long_description") or "").strip() or None
-        tag_slugs = [t.strip() for t in (row.get("tags") or "").split(",") if t.strip()]
-
-        category = await get_category_by_slug(session, category_slug)
-        if not category:
-            if dry_run:
-                errors.append(f"Row {idx}: category {category_slug} not found")
-                continue
-            category = Category(slug=category_slug, name=category_slug.replace("-", " ").title())
-            session.add(category)
-            await session.flush()
-
-        existing = await get_product_by_slug(session, slug, follow_history=False)
-        if existing:
-            updated += 1
-            if dry_run:
-                continue
-            payload = ProductUpdate(
-                name=name,
-                base_price=base_price,
-                currency=currency,
-                stock_quantity=stock_quantity,
-                status=status_enum,
-                is_featured=is_featured,
-                is_active=is_active,
-                short_description=short_description,
-                long_description=long_description,
-                category_id=category.id,
-                tags=tag_slugs if tag_slugs else [],
-            )
-            await update_product(session, existing, payload, commit=False)
-        else:
-            created += 1
-            if dry_run:
-                continue
-            create_payload = ProductCreate(
-                category_id=category.id,
-                slug=slug,
-                name=name,
-                base_price=base_price,
-                currency=currency,
-                stock_quantity=stock_quantity,
-                status=status_enum,
-                is_featured=is_featured,
-                is_active=is_active,
-                short_description=short_description,
-                long_description=long_description,
-                tags=tag_slugs,
-            )
-            await create_product(session, create_payload, commit=False)
-    if errors:
-        if not dry_run:
-            await session.rollback()
-    else:
-        if not dry_run:
-            await session.commit()
-    return {"created": created, "updated": updated, "errors": errors}
+    async def batches():
+        async for rows in exporter_service.iter_batches(session, query):
+            tags = await _tag_slugs_by_product(session, [row[0] for row in rows])
+            yield [
+                [
+                    slug,
+                    name,
+                    category_slug or "",
+                    float(base_price),
+                    currency,
+                    stock_quantity,
+                    status_value.value,
+                    is_featured,
+                    is_active,
+                    short_description or "",
+                    long_description or "",
+                    ",".join(tags.get(product_id, [])),
+                ]
+                for (
+                    product_id,
+                    slug,
+                    name,
+                    category_slug,
+                    base_price,
+                    currency,
+                    stock_quantity,
+                    status_value,
+                    is_featured,
+                    is_active,
+                    short_description,
+                    long_description,
+                ) in rows
+            ]
+
+    async for chunk in exporter_service.iter_csv(PRODUCT_EXPORT_CSV_HEADER, batches()):
+        yield chunk
 
 
 async def _record_slug_history(session: AsyncSession, product: Product, old_slug: str) -> None:
@@ -848,14 +921,16 @@ async def _record_slug_history(session: AsyncSession, product: Product, old_slug
     await session.flush()
 
 
-async def notify_back_in_stock(emails: list[str], product_name: str) -> int:
-    sent = 0
-    for email in emails:
-        if await email_service.send_back_in_stock(email, product_name):
-            sent += 1
-    return sent
+async def notify_back_in_stock(session: AsyncSession, emails: list[str], product_name: str) -> int:
+    if emails:
+        await jobs_service.enqueue(session, "email.back_in_stock_batch", {"emails": emails, "product_name": product_name})
+    return len(emails)
 
 
-async def _maybe_alert_low_stock(product: Product, threshold: int = 2) -> None:
+async def _maybe_alert_low_stock(session: AsyncSession, product: Product, threshold: int = 2) -> None:
     if product.stock_quantity is not None and product.stock_quantity <= threshold and settings.admin_alert_email:
-        await email_service.send_low_stock_alert(settings.admin_alert_email, product.name, product.stock_quantity)
+        await jobs_service.enqueue(
+            session,
+            "email.low_stock_alert",
+            {"to_email": settings.admin_alert_email, "product_name": product.name, "stock": product.stock_quantity},
+        )
@@ -16,6 +16,7 @@ from app.models.content import (
     ContentStatus,
 )
 from app.schemas.content import ContentBlockCreate, ContentBlockUpdate
+from app.services import jobs as jobs_service
 from app.services import storage
 
 
@@ -114,7 +115,9 @@ async def upsert_block(
             )
             session.add(translation)
         audit = ContentAuditLog(content_block_id=block.id, action=f"translated:{lang}", version=block.version, user_id=actor_id)
-        session.add(audit)
+        # translations live in their own table; touch the block so HTTP validators change
+        block.updated_at = now
+        session.add_all([block, audit])
         await session.commit()
         await session.refresh(block)
         _apply_content_translation(block, lang)
@@ -151,13 +154,15 @@ async def upsert_block(
 
 
 async def add_image(session: AsyncSession, block: ContentBlock, file, actor_id: UUID | None = None) -> ContentBlock:
-    path, filename = storage.save_upload(
+    path, filename = await storage.save_upload_async(
         file, allowed_content_types=("image/png", "image/jpeg", "image/webp", "image/gif"), max_bytes=5 * 1024 * 1024
     )
     next_sort = (max([img.sort_order for img in block.images], default=0) or 0) + 1
     image = ContentImage(content_block_id=block.id, url=path, alt_text=filename, sort_order=next_sort)
     audit = ContentAuditLog(content_block_id=block.id, action="image_upload", version=block.version, user_id=actor_id)
-    session.add_all([image, audit])
+    block.updated_at = datetime.now(timezone.utc)
+    session.add_all([image, audit, block])
+    await jobs_service.enqueue(session, "media.thumbnails", {"url": path}, commit=False)
     await session.commit()
     await session.refresh(block, attribute_names=["images", "audits"])
     return block
@@ -1,5 +1,8 @@
+import asyncio
 import logging
 import smtplib
+import threading
+import time
 from email.message import EmailMessage
 from pathlib import Path
 from typing import Sequence
@@ -11,6 +14,7 @@ except ImportError:
     FileSystemLoader = None  # type: ignore
     select_autoescape = None  # type: ignore
 
+from app.core import rate_limit
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -21,8 +25,131 @@ env = (
     if Environment
     else None
 )
-_rate_global: list[float] = []
-_rate_per_recipient: dict[str, list[float]] = {}
+
+
+class SMTPPool:
+    """Reusable SMTP connections for blocking ``smtplib`` calls made from worker threads.
+
+    ``size`` bounds concurrent connections; idle connections are reused (after a NOOP probe once
+    they have sat for ``idle_seconds``) so batches and bursts skip the TCP/TLS/AUTH handshake.
+    """
+
+    def __init__(self, host: str, port: int, size: int = 2, idle_seconds: float = 30.0) -> None:
+        self.host = host
+        self.port = port
+        self.idle_seconds = idle_seconds
+        self._idle: list[tuple[float, smtplib.SMTP]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=10)
+        try:
+            if settings.smtp_use_tls:
+                smtp.starttls()
+            if settings.smtp_username and settings.smtp_password:
+                smtp.login(settings.smtp_username, settings.smtp_password)
+        except Exception:
+            _close_quietly(smtp)
+            raise
+        return smtp
+
+    def _acquire(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                item = self._idle.pop() if self._idle else None
+            if item is None:
+                return self._connect()
+            last_used, smtp = item
+            if time.monotonic() - last_used < self.idle_seconds:
+                return smtp
+            try:
+                if smtp.noop()[0] == 250:
+                    return smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            _close_quietly(smtp)
+
+    def _release(self, smtp: smtplib.SMTP) -> None:
+        with self._lock:
+            self._idle.append((time.monotonic(), smtp))
+
+    def send(self, messages: Sequence[EmailMessage]) -> list[bool]:
+        """Send ``messages`` over one connection, reconnecting once if the server drops it."""
+        results: list[bool] = []
+        with self._slots:
+            try:
+                smtp: smtplib.SMTP | None = self._acquire()
+            except (smtplib.SMTPException, OSError) as exc:
+                logger.warning("Email send failed: %s", exc)
+                return [False] * len(messages)
+            for msg in messages:
+                sent = False
+                for attempt in range(2):
+                    try:
+                        if smtp is None:
+                            smtp = self._connect()
+                        smtp.send_message(msg)
+                        sent = True
+                        break
+                    except smtplib.SMTPServerDisconnected as exc:
+                        if smtp is not None:
+                            _close_quietly(smtp)
+                        smtp = None
+                        if attempt:
+                            logger.warning("Email send failed: %s", exc)
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as exc:
+                        logger.warning("Email send failed: %s", exc)
+                        break
+                    except OSError as exc:
+                        if smtp is not None:
+                            _close_quietly(smtp)
+                        smtp = None
+                        logger.warning("Email send failed: %s", exc)
+                        break
+                results.append(sent)
+            if smtp is not None:
+                self._release(smtp)
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, smtp in idle:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                _close_quietly(smtp)
+
+
+def _close_quietly(smtp: smtplib.SMTP) -> None:
+    try:
+        smtp.close()
+    except OSError:
+        pass
+
+
+_pool: SMTPPool | None = None
+_pool_key: tuple | None = None
+
+
+def _get_pool() -> SMTPPool:
+    global _pool, _pool_key
+    key = (settings.smtp_host, settings.smtp_port, settings.smtp_username, settings.smtp_use_tls)
+    if _pool is None or _pool_key != key:
+        if _pool is not None:
+            _pool.close()
+        _pool = SMTPPool(settings.smtp_host, settings.smtp_port, settings.smtp_pool_size, settings.smtp_pool_idle_seconds)
+        _pool_key = key
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool, _pool_key
+    if _pool is not None:
+        _pool.close()
+    _pool = None
+    _pool_key = None
 
 
 def _build_message(to_email: str, subject: str, text_body: str, html_body: str | None = None) -> EmailMessage:
@@ -37,26 +164,37 @@ def _build_message(to_email: str, subject: str, text_body: str, html_body: str |
 
 
 async def send_email(to_email: str, subject: str, text_body: str, html_body: str | None = None) -> bool:
+    return (await send_many([(to_email, subject, text_body, html_body)])) == []
+
+
+async def send_many(
+    messages: Sequence[tuple[str, str, str, str | None]], deferred: dict[str, float] | None = None
+) -> list[str]:
+    """Send ``(to_email, subject, text_body, html_body)`` messages over one pooled connection.
+
+    The SMTP conversation runs in a worker thread so the event loop never blocks on the network.
+    Returns the recipients that were not sent (rate limited or rejected); empty means all delivered.
+    When ``deferred`` is given, rate-limited recipients go there instead, mapped to the seconds until
+    the limit has room again.
+    """
     if not settings.smtp_enabled:
-        return False
-    now = __import__("time").time()
-    _prune(now)
-    if not _allow_send(now, to_email):
-        logger.warning("Email rate limit reached for %s", to_email)
-        return False
-    msg = _build_message(to_email, subject, text_body, html_body)
-    try:
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=10) as smtp:
-            if settings.smtp_use_tls:
-                smtp.starttls()
-            if settings.smtp_username and settings.smtp_password:
-                smtp.login(settings.smtp_username, settings.smtp_password)
-            smtp.send_message(msg)
-        _record_send(now, to_email)
-        return True
-    except Exception as exc:
-        logger.warning("Email send failed: %s", exc)
-        return False
+        return [to_email for to_email, *_ in messages]
+    failed: list[str] = []
+    allowed: list[EmailMessage] = []
+    for to_email, subject, text_body, html_body in messages:
+        wait = await _rate_limit_wait(to_email)
+        if wait:
+            logger.warning("Email rate limit reached for %s", to_email)
+            if deferred is None:
+                failed.append(to_email)
+            else:
+                deferred[to_email] = max(deferred.get(to_email, 0.0), wait)
+            continue
+        allowed.append(_build_message(to_email, subject, text_body, html_body))
+    if allowed:
+        results = await asyncio.to_thread(_get_pool().send, allowed)
+        failed.extend(msg["To"] for msg, sent in zip(allowed, results) if not sent)
+    return failed
 
 
 def _lang_or_default(lang: str | None) -> str:
@@ -144,12 +282,24 @@ async def send_cart_abandonment(to_email: str) -> bool:
     return await send_email(to_email, subject, text_body, html_body)
 
 
+async def send_cart_abandonment_batch(to_emails: Sequence[str], deferred: dict[str, float] | None = None) -> list[str]:
+    subject = "Still thinking it over?"
+    text_body, html_body = render_template("cart_abandonment.txt.j2", {})
+    return await send_many([(to_email, subject, text_body, html_body) for to_email in to_emails], deferred)
+
+
 async def send_back_in_stock(to_email: str, product_name: str) -> bool:
     subject = f"{product_name} is back in stock"
     text_body, html_body = render_template("back_in_stock.txt.j2", {"product_name": product_name})
     return await send_email(to_email, subject, text_body, html_body)
 
 
+async def send_back_in_stock_batch(to_emails: Sequence[str], product_name: str, deferred: dict[str, float] | None = None) -> list[str]:
+    subject = f"{product_name} is back in stock"
+    text_body, html_body = render_template("back_in_stock.txt.j2", {"product_name": product_name})
+    return await send_many([(to_email, subject, text_body, html_body) for to_email in to_emails], deferred)
+
+
 async def send_low_stock_alert(to_email: str, product_name: str, stock: int) -> bool:
     subject = f"Low stock alert: {product_name}"
     text_body, html_body = render_template("low_stock_alert.txt.j2", {"product_name": product_name, "stock": stock})
@@ -185,27 +335,22 @@ async def notify_critical_error(message: str) -> bool:
     return False
 
 
-def _prune(now: float) -> None:
-    window = 60.0
-    _rate_global[:] = [ts for ts in _rate_global if now - ts < window]
-    for key in list(_rate_per_recipient.keys()):
-        _rate_per_recipient[key] = [ts for ts in _rate_per_recipient[key] if now - ts < window]
-        if not _rate_per_recipient[key]:
-            _rate_per_recipient.pop(key, None)
-
+async def _rate_limit_wait(recipient: str) -> float:
+    """Take one send from the global and per-recipient allowances, shared with the other workers
+    when ``rate_limit_backend`` is ``shared`` or ``redis``. A limit of 0 disables that check.
 
-def _allow_send(now: float, recipient: str) -> bool:
-    window = 60.0
+    Returns 0 when the send may go ahead, otherwise the seconds until it could. The recipient's
+    allowance is only charged once the global one has room, so a send held back by the global
+    limit does not eat into that recipient's quota.
+    """
     global_limit = settings.email_rate_limit_per_minute
+    if global_limit:
+        decision = await rate_limit.hit("email:global", global_limit, 60)
+        if not decision.allowed:
+            return max(decision.retry_after, 1.0)
     recipient_limit = settings.email_rate_limit_per_recipient_per_minute
-    if global_limit and len([ts for ts in _rate_global if now - ts < window]) >= global_limit:
-        return False
-    rec_list = _rate_per_recipient.get(recipient, [])
-    if recipient_limit and len([ts for ts in rec_list if now - ts < window]) >= recipient_limit:
-        return False
-    return True
-
-
-def _record_send(now: float, recipient: str) -> None:
-    _rate_global.append(now)
-    _rate_per_recipient.setdefault(recipient, []).append(now)
+    if recipient_limit:
+        decision = await rate_limit.hit(f"email:to:{recipient.lower()}", recipient_limit, 60)
+        if not decision.allowed:
+            return max(decision.retry_after, 1.0)
+    return 0.0
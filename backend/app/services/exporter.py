@@ -1,6 +1,9 @@
-from typing import Any, Dict
+import csv
+import io
+from typing import Any, AsyncIterator, Dict, Sequence
 
-from sqlalchemy import select
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.address import Address
@@ -106,3 +109,45 @@ async def export_json(session: AsyncSession) -> Dict[str, Any]:
             }
         )
     return data
+
+
+EXPORT_BATCH_SIZE = 500
+
+
+async def iter_batches(session: AsyncSession, query: Select, batch_size: int | None = None) -> AsyncIterator[Sequence]:
+    """Yield result rows in fixed-size batches from a server-side cursor."""
+    batch_size = batch_size or EXPORT_BATCH_SIZE
+    result = await session.stream(query.execution_options(yield_per=batch_size))
+    async for partition in result.partitions(batch_size):
+        yield partition
+
+
+async def iter_csv(header: Sequence[str], batches: AsyncIterator[Sequence[Sequence[Any]]]) -> AsyncIterator[str]:
+    """Render CSV incrementally: one chunk for the header, then one per batch of rows."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    yield buf.getvalue()
+    async for rows in batches:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(rows)
+        yield buf.getvalue()
+
+
+def csv_streaming_response(session: AsyncSession, chunks: AsyncIterator[str], filename: str) -> StreamingResponse:
+    """Stream ``chunks`` as a CSV download.
+
+    The body outlives the request's ``get_session`` scope, so the session is closed once the
+    last chunk has been sent (or the client disconnects).
+    """
+
+    async def body() -> AsyncIterator[str]:
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await session.close()
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(body(), media_type="text/csv", headers=headers)
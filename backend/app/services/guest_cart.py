@@ -0,0 +1,194 @@
+"""Stateless guest carts (``cart_guest_storage = "token"``).
+
+An anonymous visitor's cart lives in a signed token the client sends back in ``X-Cart-Token``; the server
+keeps no row for it. The token only carries what the shopper chose (product, variant, quantity, note,
+max quantity). Prices, names and stock always come from the database when the token is read. The cart is
+persisted only when the guest signs in (``cart.merge_guest_cart``) or checks out.
+
+Format: ``base64url(json) "." base64url(hmac_sha256(secret_key, json)[:16])``.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.models.catalog import Product, ProductVariant
+from app.services import cart as cart_service
+
+TOKEN_HEADER = "X-Cart-Token"
+_SIGNATURE_BYTES = 16
+
+
+@dataclass
+class GuestLine:
+    product_id: uuid.UUID
+    variant_id: uuid.UUID | None
+    quantity: int
+    note: str | None = None
+    max_quantity: int | None = None
+
+
+@dataclass
+class GuestCartState:
+    cart_id: uuid.UUID = field(default_factory=uuid.uuid4)
+    lines: list[GuestLine] = field(default_factory=list)
+
+    def line_id(self, line: GuestLine) -> uuid.UUID:
+        return uuid.uuid5(self.cart_id, f"{line.product_id}:{line.variant_id or ''}")
+
+    def find(self, item_id: uuid.UUID) -> GuestLine:
+        for line in self.lines:
+            if self.line_id(line) == item_id:
+                return line
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cart item not found")
+
+
+@dataclass
+class GuestCartItem:
+    """Priced line; duck-types ``CartItem`` for totals, serialization, payments and orders."""
+
+    id: uuid.UUID
+    product_id: uuid.UUID
+    variant_id: uuid.UUID | None
+    quantity: int
+    max_quantity: int | None
+    note: str | None
+    unit_price_at_add: Decimal
+    product: Product
+    variant: ProductVariant | None = None
+
+
+@dataclass
+class GuestCart:
+    """Duck-types ``Cart``; never added to a session."""
+
+    id: uuid.UUID
+    items: list[GuestCartItem]
+    user_id: uuid.UUID | None = None
+    session_id: str | None = None
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(settings.secret_key.encode("utf-8"), payload, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+
+
+def encode(state: GuestCartState) -> str:
+    lines = [
+        [line.product_id.hex, line.variant_id.hex if line.variant_id else None, line.quantity, line.note, line.max_quantity]
+        for line in state.lines
+    ]
+    payload = json.dumps({"c": state.cart_id.hex, "t": int(time.time()), "i": lines}, separators=(",", ":"))
+    raw = payload.encode("utf-8")
+    return f"{_b64encode(raw)}.{_b64encode(_sign(raw))}"
+
+
+def decode(token: str | None) -> GuestCartState:
+    """The cart in ``token``; a missing, tampered or expired token is an empty cart, not an error."""
+    if not token:
+        return GuestCartState()
+    try:
+        body, signature = token.split(".", 1)
+        raw = _b64decode(body)
+        if not hmac.compare_digest(_b64decode(signature), _sign(raw)):
+            return GuestCartState()
+        data: dict[str, Any] = json.loads(raw)
+        if time.time() - int(data["t"]) > settings.cart_token_max_age_days * 86400:
+            return GuestCartState()
+        lines = [
+            GuestLine(
+                product_id=uuid.UUID(product_id),
+                variant_id=uuid.UUID(variant_id) if variant_id else None,
+                quantity=int(quantity),
+                note=note,
+                max_quantity=max_quantity,
+            )
+            for product_id, variant_id, quantity, note, max_quantity in data["i"]
+        ]
+        return GuestCartState(cart_id=uuid.UUID(data["c"]), lines=lines)
+    except (ValueError, KeyError, TypeError):
+        return GuestCartState()
+
+
+async def hydrate(session: AsyncSession, state: GuestCartState) -> GuestCart:
+    """Price the token's lines from the database (one query for products, one for variants).
+
+    Lines whose product is gone, deleted or inactive, or whose variant no longer belongs to it, are
+    dropped.
+    """
+    products: dict[uuid.UUID, Product] = {}
+    variants: dict[uuid.UUID, ProductVariant] = {}
+    product_ids = {line.product_id for line in state.lines}
+    if product_ids:
+        result = await session.execute(
+            select(Product).options(selectinload(Product.images)).where(Product.id.in_(product_ids))
+        )
+        products = {product.id: product for product in result.scalars()}
+    variant_ids = {line.variant_id for line in state.lines if line.variant_id}
+    if variant_ids:
+        result = await session.execute(select(ProductVariant).where(ProductVariant.id.in_(variant_ids)))
+        variants = {variant.id: variant for variant in result.scalars()}
+
+    items = []
+    for line in state.lines:
+        product = products.get(line.product_id)
+        if product is None or product.is_deleted or not product.is_active:
+            continue
+        variant = variants.get(line.variant_id) if line.variant_id else None
+        if line.variant_id and (variant is None or variant.product_id != product.id):
+            continue
+        items.append(
+            GuestCartItem(
+                id=state.line_id(line),
+                product_id=line.product_id,
+                variant_id=line.variant_id,
+                quantity=line.quantity,
+                max_quantity=line.max_quantity,
+                note=line.note,
+                unit_price_at_add=cart_service.unit_price(product, variant),
+                product=product,
+                variant=variant,
+            )
+        )
+    return GuestCart(id=state.cart_id, items=items)
+
+
+def prune(state: GuestCartState, cart: GuestCart) -> GuestCartState:
+    """Drop lines that ``hydrate`` could not price, so the reissued token stops carrying them."""
+    kept = {item.id for item in cart.items}
+    state.lines = [line for line in state.lines if state.line_id(line) in kept]
+    return state
+
+
+def put_line(state: GuestCartState, line: GuestLine) -> GuestLine:
+    """Add ``line`` or, for a product/variant already in the cart, replace it."""
+    if len(state.lines) >= settings.cart_token_max_items and not any(
+        existing.product_id == line.product_id and existing.variant_id == line.variant_id for existing in state.lines
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Too many items in cart")
+    state.lines = [
+        existing
+        for existing in state.lines
+        if not (existing.product_id == line.product_id and existing.variant_id == line.variant_id)
+    ]
+    state.lines.append(line)
+    return line
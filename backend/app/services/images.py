@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Largest first: each size is downscaled from the previous one instead of from the full decode.
+VARIANT_SIZES: dict[str, tuple[int, int]] = {"lg": (1024, 1024), "md": (640, 640), "sm": (320, 320)}
+VARIANT_FORMATS: dict[str, str] = {"webp": "WEBP", "avif": "AVIF"}
+
+_UNBOUNDED = 1 << 16
+
+T = TypeVar("T")
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def variant_formats() -> list[str]:
+    """Extra encodings to write next to each size, limited to what this Pillow build can save."""
+    Image.init()
+    return [ext for ext in settings.image_variant_formats if VARIANT_FORMATS.get(ext) in Image.SAVE]
+
+
+def variant_paths(path: Path) -> list[Path]:
+    paths: list[Path] = []
+    for suffix in VARIANT_SIZES:
+        paths.append(path.with_name(f"{path.stem}-{suffix}{path.suffix}"))
+        paths.extend(path.with_name(f"{path.stem}-{suffix}.{ext}") for ext in VARIANT_FORMATS)
+    return paths
+
+
+def _for_format(img: Image.Image, fmt: str) -> Image.Image:
+    has_alpha = "A" in img.getbands() or "transparency" in img.info
+    if fmt == "JPEG":
+        return img if img.mode == "RGB" else img.convert("RGB")
+    if fmt in VARIANT_FORMATS.values() and img.mode not in ("RGB", "RGBA"):
+        return img.convert("RGBA" if has_alpha else "RGB")
+    return img
+
+
+def render_variants(source: str, formats: list[str] | None = None) -> list[str]:
+    """Decode ``source`` once and write every size/format variant; runs inside the process pool."""
+    path = Path(source)
+    formats = variant_formats() if formats is None else formats
+    written: list[str] = []
+    with Image.open(path) as img:
+        original_format = Image.registered_extensions().get(path.suffix.lower()) or img.format
+        # JPEG can decode straight at a reduced scale, which skips most of the work for large photos.
+        img.draft("RGB", max(VARIANT_SIZES.values()))
+        current = ImageOps.exif_transpose(img)
+        for suffix, size in VARIANT_SIZES.items():
+            current = current.copy()
+            current.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            target = path.with_name(f"{path.stem}-{suffix}{path.suffix}")
+            _for_format(current, original_format).save(target, original_format, optimize=True)
+            written.append(str(target))
+            for ext in formats:
+                fmt = VARIANT_FORMATS[ext]
+                target = path.with_name(f"{path.stem}-{suffix}.{ext}")
+                _for_format(current, fmt).save(target, fmt, quality=settings.image_variant_quality)
+                written.append(str(target))
+    return written
+
+
+def render_derivative(
+    source: str, target: str, width: int | None, height: int | None, fmt: str, quality: int
+) -> int:
+    """Fit ``source`` inside ``width`` x ``height`` (never upscaling) and write it atomically to ``target``."""
+    box = (width or _UNBOUNDED, height or _UNBOUNDED)
+    destination = Path(target)
+    partial = destination.with_name(f"{destination.name}.{os.getpid()}.part")
+    try:
+        with Image.open(source) as img:
+            img.draft("RGB", box)
+            current = ImageOps.exif_transpose(img)
+            current.thumbnail(box, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            _for_format(current, fmt).save(partial, fmt, quality=quality, optimize=True)
+        os.replace(partial, destination)
+    finally:
+        partial.unlink(missing_ok=True)
+    return destination.stat().st_size
+
+
+def _get_pool() -> Executor | None:
+    global _pool
+    if settings.image_process_workers <= 0:
+        return None
+    if _pool is None:
+        # Spawned, not forked: a fork would copy the worker's event loop, open sockets and held locks.
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.image_process_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def run_in_pool(fn: Callable[..., T], *args: Any) -> T:
+    """Run a CPU-bound Pillow call in the process pool, or on a thread when the pool is disabled."""
+    global _pool
+    pool = _get_pool()
+    if pool is None:
+        return await asyncio.to_thread(fn, *args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # A pool process died (e.g. OOM on a huge image); start a fresh pool for the next call.
+        _pool = None
+        raise
+
+
+def generate_variants_sync(path: Path) -> list[str]:
+    try:
+        return render_variants(str(path))
+    except Exception as exc:
+        logger.warning("thumbnail_generation_failed", extra={"path": str(path), "error": str(exc)})
+        return []
+
+
+async def generate_variants(path: Path) -> list[str]:
+    """Render the size/format variants for ``path``; a broken pool propagates so the job retries."""
+    if not path.exists():
+        return []
+    try:
+        return await run_in_pool(render_variants, str(path), variant_formats())
+    except BrokenProcessPool:
+        raise
+    except Exception as exc:
+        logger.warning("thumbnail_generation_failed", extra={"path": str(path), "error": str(exc)})
+        return []
@@ -0,0 +1,281 @@
+"""Stock reservations for checkout.
+
+``stock_quantity`` on products and variants is what can still be sold. Checkout takes units out of it with a
+conditional ``UPDATE ... SET stock_quantity = stock_quantity - :qty WHERE id = :id AND stock_quantity >= :qty``:
+the database checks and decrements in one statement, so concurrent checkouts for the last units cannot both
+succeed and nothing holds a lock beyond that row update. Each reserved line is recorded in
+``stock_reservations`` with an expiry.
+
+A captured payment commits the reservation (the units stay sold). A failed or voided payment, or the expiry
+swept by ``ReservationSweeper``, releases it and puts the units back. Releasing only flips ``active`` rows, so a
+webhook and the sweeper racing on the same reservation return its units once. A payment that lands after its
+reservation expired takes the units again with the same conditional decrement; if they have been sold in the
+meantime the order gets a ``stock_shortfall`` event instead of driving stock negative.
+"""
+
+import asyncio
+import contextlib
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import cache
+from app.core.config import settings
+from app.models.catalog import Product, ProductVariant
+from app.models.inventory import ReservationStatus, StockReservation
+from app.models.order import Order, OrderEvent, OrderItem
+
+logger = logging.getLogger(__name__)
+
+# (product_id, variant_id, quantity); a line with a variant draws on the variant's stock.
+Line = tuple[uuid.UUID, uuid.UUID | None, int]
+
+counters = {"reserved": 0, "rejected": 0, "committed": 0, "released": 0, "expired": 0, "shortfall": 0}
+
+
+def _totals(lines: Iterable[Line]) -> dict[tuple[uuid.UUID, uuid.UUID | None], int]:
+    totals: dict[tuple[uuid.UUID, uuid.UUID | None], int] = {}
+    for product_id, variant_id, quantity in lines:
+        totals[(product_id, variant_id)] = totals.get((product_id, variant_id), 0) + quantity
+    return totals
+
+
+def _lock_order(entry: tuple[tuple[uuid.UUID, uuid.UUID | None], int]) -> tuple[str, str]:
+    # Every transaction touches stock rows in the same order, so two checkouts sharing SKUs cannot deadlock.
+    (product_id, variant_id), _ = entry
+    return str(product_id), str(variant_id or "")
+
+
+async def _adjust(
+    session: AsyncSession, product_id: uuid.UUID, variant_id: uuid.UUID | None, delta: int, require: int = 0
+):
+    """Add ``delta`` to the stock row of a line; with ``require`` only if it holds at least that many units."""
+    model, row_id = (ProductVariant, variant_id) if variant_id else (Product, product_id)
+    criteria = [model.id == row_id]
+    if require:
+        criteria.append(model.stock_quantity >= require)
+    return await session.execute(
+        update(model)
+        .where(*criteria)
+        .values(stock_quantity=model.stock_quantity + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def reserve(session: AsyncSession, lines: Iterable[Line], ttl_minutes: int | None = None) -> list[StockReservation]:
+    """Take ``lines`` out of sellable stock, all or nothing, and commit.
+
+    If any product or variant cannot cover its quantity the transaction is rolled back and a 400
+    "Insufficient stock" is raised, so callers should have committed their own work first.
+    """
+    wanted = sorted(_totals(lines).items(), key=_lock_order)
+    if not wanted:
+        return []
+    ttl = ttl_minutes if ttl_minutes is not None else settings.stock_reservation_ttl_minutes
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=ttl)
+    try:
+        for (product_id, variant_id), quantity in wanted:
+            result = await _adjust(session, product_id, variant_id, -quantity, require=quantity)
+            if result.rowcount != 1:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Insufficient stock")
+        reservations = [
+            StockReservation(product_id=product_id, variant_id=variant_id, quantity=quantity, expires_at=expires_at)
+            for (product_id, variant_id), quantity in wanted
+        ]
+        session.add_all(reservations)
+        await session.commit()
+    except BaseException:
+        await session.rollback()
+        counters["rejected"] += 1
+        raise
+    counters["reserved"] += 1
+    # Cached product and listing JSON carries stock_quantity.
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
+    return reservations
+
+
+async def assign_order(session: AsyncSession, reservations: list[StockReservation], order_id: uuid.UUID) -> None:
+    if not reservations:
+        return
+    await session.execute(
+        update(StockReservation)
+        .where(StockReservation.id.in_([reservation.id for reservation in reservations]))
+        .values(order_id=order_id)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+
+
+async def reserve_order(session: AsyncSession, order: Order) -> None:
+    """Reserve an order's items again unless it still holds active reservations, e.g. before retrying a
+    payment whose failure released them."""
+    held = await session.scalar(
+        select(func.count(StockReservation.id)).where(
+            StockReservation.order_id == order.id, StockReservation.status == ReservationStatus.active
+        )
+    )
+    if held:
+        return
+    reservations = await reserve(session, [(item.product_id, item.variant_id, item.quantity) for item in order.items])
+    await assign_order(session, reservations, order.id)
+
+
+async def _release(session: AsyncSession, *criteria) -> int:
+    result = await session.execute(
+        update(StockReservation)
+        .where(StockReservation.status == ReservationStatus.active, *criteria)
+        .values(status=ReservationStatus.released, released_at=datetime.now(timezone.utc))
+        .returning(StockReservation.product_id, StockReservation.variant_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    )
+    released = result.all()
+    for (product_id, variant_id), quantity in sorted(_totals(released).items(), key=_lock_order):
+        await _adjust(session, product_id, variant_id, quantity)
+    await session.commit()
+    if released:
+        await cache.invalidate(cache.CATALOG_NAMESPACE)
+    return len(released)
+
+
+async def release(session: AsyncSession, reservations: list[StockReservation]) -> int:
+    if not reservations:
+        return 0
+    released = await _release(session, StockReservation.id.in_([reservation.id for reservation in reservations]))
+    counters["released"] += released
+    return released
+
+
+async def release_for_order(session: AsyncSession, order_id: uuid.UUID) -> int:
+    released = await _release(session, StockReservation.order_id == order_id)
+    counters["released"] += released
+    return released
+
+
+async def release_expired(session: AsyncSession, now: datetime | None = None) -> int:
+    expired = await _release(session, StockReservation.expires_at <= (now or datetime.now(timezone.utc)))
+    counters["expired"] += expired
+    return expired
+
+
+async def commit_for_order(session: AsyncSession, order_id: uuid.UUID) -> int:
+    """Mark the order's reservations as sold; their units never go back to stock.
+
+    If the order has no active or committed reservation left but had some released (it was paid after the
+    TTL), its items are reserved again; see ``_recommit``.
+    """
+    result = await session.execute(
+        update(StockReservation)
+        .where(StockReservation.order_id == order_id, StockReservation.status == ReservationStatus.active)
+        .values(status=ReservationStatus.committed)
+        .execution_options(synchronize_session=False)
+    )
+    committed, recommitted = result.rowcount, 0
+    if not committed:
+        statuses = set(
+            (await session.scalars(select(StockReservation.status).where(StockReservation.order_id == order_id))).all()
+        )
+        if statuses == {ReservationStatus.released}:
+            committed = recommitted = await _recommit(session, order_id)
+    await session.commit()
+    if recommitted:
+        await cache.invalidate(cache.CATALOG_NAMESPACE)
+    counters["committed"] += committed
+    return committed
+
+
+async def _recommit(session: AsyncSession, order_id: uuid.UUID) -> int:
+    """Take a paid order's items out of stock again after its reservations were released.
+
+    All or nothing, like ``reserve``. When the units are gone the order is flagged with a ``stock_shortfall``
+    event for staff to resolve (back-order or refund) rather than letting stock go negative.
+    """
+    items = (
+        await session.execute(
+            select(OrderItem.product_id, OrderItem.variant_id, OrderItem.quantity).where(OrderItem.order_id == order_id)
+        )
+    ).all()
+    wanted = sorted(_totals(items).items(), key=_lock_order)
+    now = datetime.now(timezone.utc)
+    for (product_id, variant_id), quantity in wanted:
+        result = await _adjust(session, product_id, variant_id, -quantity, require=quantity)
+        if result.rowcount != 1:
+            await session.rollback()
+            counters["shortfall"] += 1
+            logger.warning("stock_shortfall", extra={"order_id": str(order_id)})
+            session.add(
+                OrderEvent(
+                    order_id=order_id,
+                    event="stock_shortfall",
+                    note="Paid after its stock reservation expired and the units were no longer available",
+                )
+            )
+            return 0
+    session.add_all(
+        StockReservation(
+            product_id=product_id,
+            variant_id=variant_id,
+            order_id=order_id,
+            quantity=quantity,
+            status=ReservationStatus.committed,
+            expires_at=now,
+        )
+        for (product_id, variant_id), quantity in wanted
+    )
+    return len(wanted)
+
+
+async def active_totals(session: AsyncSession) -> dict[str, int]:
+    row = (
+        await session.execute(
+            select(func.count(StockReservation.id), func.coalesce(func.sum(StockReservation.quantity), 0)).where(
+                StockReservation.status == ReservationStatus.active
+            )
+        )
+    ).one()
+    return {"active_reservations": row[0], "reserved_units": int(row[1])}
+
+
+class ReservationSweeper:
+    def __init__(self, session_factory: async_sessionmaker | None = None):
+        self.session_factory = session_factory
+        self._task: asyncio.Task | None = None
+
+    def stats(self) -> dict[str, Any]:
+        return {**counters, "sweeper_running": self._task is not None and not self._task.done()}
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.stock_reservation_sweep_interval_seconds)
+            try:
+                await self.sweep()
+            except Exception as exc:  # pragma: no cover - try again next interval
+                logger.warning("stock_reservation_sweep_failed", extra={"error": str(exc)})
+
+    async def sweep(self) -> int:
+        """Release every expired reservation; returns how many were released."""
+        session_factory = self.session_factory
+        if session_factory is None:
+            from app.db.session import SessionLocal
+
+            session_factory = SessionLocal
+        async with session_factory() as session:
+            return await release_expired(session)
+
+
+sweeper = ReservationSweeper()
@@ -0,0 +1,114 @@
+"""Handlers for the background job kinds; imported by the worker via ``jobs.load_handlers``."""
+
+import logging
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.services import cart as cart_service
+from app.services import email as email_service
+from app.services import images as images_service
+from app.services import jobs as jobs_service
+from app.services import order as order_service
+from app.services import storage
+from app.services.jobs import register
+
+logger = logging.getLogger(__name__)
+
+
+def _ensure_sent(sent: bool) -> None:
+    # send_* swallow SMTP errors and rate limiting and report False; surface that so the job retries.
+    if not sent and settings.smtp_enabled:
+        raise RuntimeError("Email delivery failed")
+
+
+async def _retry_failed_recipients(
+    session: AsyncSession, kind: str, payload: dict, failed: list[str], deferred: dict[str, float]
+) -> None:
+    # A batch is one job, so only the recipients that failed are re-queued instead of retrying the whole batch.
+    if not settings.smtp_enabled:
+        return
+    if deferred:
+        # Rate limited is not a delivery failure: try again once the limit has room, same attempt number.
+        await jobs_service.enqueue(
+            session, kind, {**payload, "emails": list(deferred)}, delay_seconds=max(deferred.values())
+        )
+    if not failed:
+        return
+    attempt = payload.get("attempt", 1)
+    if attempt >= settings.job_max_attempts:
+        # Give up on these recipients only: raising would retry the whole job and mail the delivered ones again.
+        logger.warning(
+            "email_batch_recipients_failed", extra={"kind": kind, "recipients": len(failed), "attempt": attempt}
+        )
+        return
+    await jobs_service.enqueue(
+        session, kind, {**payload, "emails": failed, "attempt": attempt + 1}, delay_seconds=jobs_service.retry_delay(attempt)
+    )
+
+
+async def _load_order(session: AsyncSession, payload: dict):
+    order = await order_service.get_order_by_id(session, uuid.UUID(payload["order_id"]))
+    if not order:
+        raise LookupError(f"Order {payload['order_id']} not found")
+    return order
+
+
+@register("email.verification")
+async def send_verification(session: AsyncSession, payload: dict) -> None:
+    _ensure_sent(await email_service.send_verification_email(payload["to_email"], payload["token"]))
+
+
+@register("email.password_reset")
+async def send_password_reset(session: AsyncSession, payload: dict) -> None:
+    _ensure_sent(await email_service.send_password_reset(payload["to_email"], payload["token"]))
+
+
+@register("email.order_confirmation")
+async def send_order_confirmation(session: AsyncSession, payload: dict) -> None:
+    order = await _load_order(session, payload)
+    _ensure_sent(await email_service.send_order_confirmation(payload["to_email"], order, order.items))
+
+
+@register("email.shipping_update")
+async def send_shipping_update(session: AsyncSession, payload: dict) -> None:
+    order = await _load_order(session, payload)
+    _ensure_sent(await email_service.send_shipping_update(payload["to_email"], order, order.tracking_number))
+
+
+@register("email.delivery_confirmation")
+async def send_delivery_confirmation(session: AsyncSession, payload: dict) -> None:
+    order = await _load_order(session, payload)
+    _ensure_sent(await email_service.send_delivery_confirmation(payload["to_email"], order))
+
+
+@register("email.back_in_stock_batch")
+async def send_back_in_stock_batch(session: AsyncSession, payload: dict) -> None:
+    deferred: dict[str, float] = {}
+    failed = await email_service.send_back_in_stock_batch(payload["emails"], payload["product_name"], deferred)
+    await _retry_failed_recipients(session, "email.back_in_stock_batch", payload, failed, deferred)
+
+
+@register("email.low_stock_alert")
+async def send_low_stock_alert(session: AsyncSession, payload: dict) -> None:
+    _ensure_sent(
+        await email_service.send_low_stock_alert(payload["to_email"], payload["product_name"], payload["stock"])
+    )
+
+
+@register("email.cart_abandonment_batch")
+async def send_cart_abandonment_batch(session: AsyncSession, payload: dict) -> None:
+    deferred: dict[str, float] = {}
+    failed = await email_service.send_cart_abandonment_batch(payload["emails"], deferred)
+    await _retry_failed_recipients(session, "email.cart_abandonment_batch", payload, failed, deferred)
+
+
+@register("cart.abandoned_reminders")
+async def abandoned_cart_reminders(session: AsyncSession, payload: dict) -> None:
+    await cart_service.run_abandoned_cart_job(session, max_age_hours=payload.get("max_age_hours", 24))
+
+
+@register("media.thumbnails")
+async def generate_thumbnails(session: AsyncSession, payload: dict) -> None:
+    await images_service.generate_variants(storage.media_path(payload["url"]))
@@ -0,0 +1,335 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db import query_stats
+from app.models.job import BackgroundJob, JobStatus
+from app.services import email as email_service
+from app.services import images as images_service
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AsyncSession, dict], Awaitable[None]]
+
+HANDLERS: dict[str, JobHandler] = {}
+
+# Per-process counters for the worker; ``queue_stats`` reports the shared backlog from the table.
+_metrics: dict[str, dict[str, float]] = {}
+
+
+@dataclass
+class ClaimedJob:
+    id: uuid.UUID
+    kind: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+    locked_by: str
+
+
+def register(kind: str) -> Callable[[JobHandler], JobHandler]:
+    def decorator(handler: JobHandler) -> JobHandler:
+        HANDLERS[kind] = handler
+        return handler
+
+    return decorator
+
+
+def load_handlers() -> None:
+    from app.services import job_handlers  # noqa: F401
+
+
+async def enqueue(
+    session: AsyncSession,
+    kind: str,
+    payload: dict | None = None,
+    delay_seconds: float = 0,
+    max_attempts: int | None = None,
+    commit: bool = True,
+) -> BackgroundJob:
+    """Persist a job for the worker; with ``commit=False`` it is written with the caller's transaction."""
+    job = BackgroundJob(
+        kind=kind,
+        payload=json.dumps(payload or {}, default=str),
+        status=JobStatus.pending,
+        attempts=0,
+        max_attempts=max_attempts or settings.job_max_attempts,
+        run_at=datetime.now(timezone.utc) + timedelta(seconds=delay_seconds),
+    )
+    session.add(job)
+    if commit:
+        await session.commit()
+    return job
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff capped at ``job_retry_max_seconds``, jittered over its upper half."""
+    ceiling = min(settings.job_retry_max_seconds, settings.job_retry_base_seconds * 2 ** max(attempts - 1, 0))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+async def claim_jobs(session: AsyncSession, limit: int, worker_id: str) -> list[ClaimedJob]:
+    """Lock up to ``limit`` due jobs, including ones whose worker stopped heartbeating.
+
+    ``run_job`` refreshes ``locked_at`` while a handler runs, so only a job whose worker died (or lost the
+    database for ``job_lock_timeout_seconds``) is reclaimed. ``SKIP LOCKED`` lets several workers poll the
+    same table on Postgres without blocking each other.
+    """
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.job_lock_timeout_seconds)
+    result = await session.execute(
+        select(BackgroundJob)
+        .where(
+            or_(
+                and_(BackgroundJob.status == JobStatus.pending, BackgroundJob.run_at <= now),
+                and_(BackgroundJob.status == JobStatus.running, BackgroundJob.locked_at < stale),
+            )
+        )
+        .order_by(BackgroundJob.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    claimed: list[ClaimedJob] = []
+    for job in result.scalars():
+        job.attempts += 1
+        if job.attempts > job.max_attempts:
+            job.status = JobStatus.failed
+            job.finished_at = now
+            job.last_error = job.last_error or "Lock expired after final attempt"
+            continue
+        job.status = JobStatus.running
+        job.locked_at = now
+        job.locked_by = worker_id
+        claimed.append(
+            ClaimedJob(job.id, job.kind, json.loads(job.payload or "{}"), job.attempts, job.max_attempts, worker_id)
+        )
+    await session.commit()
+    return claimed
+
+
+def _record(kind: str, outcome: str, duration_ms: float) -> None:
+    stats = _metrics.setdefault(
+        kind, {"succeeded": 0, "retried": 0, "failed": 0, "lost_lock": 0, "duration_ms_total": 0.0}
+    )
+    stats[outcome] += 1
+    stats["duration_ms_total"] += duration_ms
+
+
+def metrics_snapshot() -> dict[str, dict[str, float]]:
+    return {kind: dict(stats) for kind, stats in _metrics.items()}
+
+
+async def _heartbeat(session_factory: async_sessionmaker, job: ClaimedJob) -> None:
+    """Keep ``locked_at`` fresh so a slow handler is not mistaken for a dead worker and run twice."""
+    interval = max(settings.job_lock_timeout_seconds / 3, 1.0)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as session:
+                await session.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id == job.id, BackgroundJob.locked_by == job.locked_by)
+                    .values(locked_at=datetime.now(timezone.utc))
+                )
+                await session.commit()
+        except Exception as exc:  # pragma: no cover - the next beat tries again
+            logger.warning("job_heartbeat_failed", extra={"job_id": str(job.id), "error": str(exc)})
+
+
+async def run_job(session_factory: async_sessionmaker, job: ClaimedJob) -> bool:
+    started = time.perf_counter()
+    error: str | None = None
+    heartbeat = asyncio.create_task(_heartbeat(session_factory, job))
+    try:
+        with query_stats.track(f"job {job.kind}") as db_stats:
+            try:
+                handler = HANDLERS.get(job.kind)
+                if handler is None:
+                    raise LookupError(f"No handler registered for job kind {job.kind}")
+                async with session_factory() as session:
+                    await handler(session, job.payload)
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+    finally:
+        heartbeat.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await heartbeat
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    now = datetime.now(timezone.utc)
+    if error is None:
+        outcome = "succeeded"
+        values = {"status": JobStatus.succeeded, "finished_at": now, "last_error": None}
+    elif job.attempts >= job.max_attempts:
+        outcome = "failed"
+        values = {"status": JobStatus.failed, "finished_at": now, "last_error": error}
+    else:
+        outcome = "retried"
+        values = {
+            "status": JobStatus.pending,
+            "run_at": now + timedelta(seconds=retry_delay(job.attempts)),
+            "last_error": error,
+        }
+    async with session_factory() as session:
+        # Only the worker still holding the lock may settle the job; another worker may have reclaimed it.
+        result = await session.execute(
+            update(BackgroundJob)
+            .where(
+                BackgroundJob.id == job.id,
+                BackgroundJob.locked_by == job.locked_by,
+                BackgroundJob.status == JobStatus.running,
+            )
+            .values(locked_at=None, locked_by=None, **values)
+        )
+        await session.commit()
+    if result.rowcount == 0:
+        outcome = "lost_lock"
+    _record(job.kind, outcome, duration_ms)
+    log = logger.info if error is None and outcome != "lost_lock" else logger.warning
+    log(
+        "job_finished",
+        extra={
+            "job_id": str(job.id),
+            "kind": job.kind,
+            "outcome": outcome,
+            "attempt": job.attempts,
+            "duration_ms": round(duration_ms, 2),
+            "db_queries": db_stats.count,
+            "db_time_ms": round(db_stats.total_ms, 2),
+            "error": error,
+        },
+    )
+    return error is None
+
+
+def periodic_jobs() -> dict[str, float]:
+    """Job kinds enqueued on a fixed interval (seconds) by whichever worker gets there first."""
+    return {"cart.abandoned_reminders": settings.job_abandoned_cart_interval_seconds}
+
+
+async def schedule_periodic(session_factory: async_sessionmaker, now: datetime | None = None) -> int:
+    """Enqueue each periodic job once per interval window; returns how many were added.
+
+    The job id is derived from the kind and window, so workers racing on the same window collide on the
+    primary key and only one row is written.
+    """
+    timestamp = (now or datetime.now(timezone.utc)).timestamp()
+    added = 0
+    for kind, interval in periodic_jobs().items():
+        if interval <= 0:
+            continue
+        window = int(timestamp // interval)
+        job_id = uuid.uuid5(uuid.NAMESPACE_URL, f"job:{kind}:{window}")
+        async with session_factory() as session:
+            if await session.get(BackgroundJob, job_id) is not None:
+                continue
+            job = await enqueue(session, kind, commit=False)
+            job.id = job_id
+            try:
+                await session.commit()
+            except IntegrityError:
+                await session.rollback()
+                continue
+        added += 1
+    return added
+
+
+async def run_worker(
+    session_factory: async_sessionmaker | None = None,
+    concurrency: int | None = None,
+    poll_interval: float | None = None,
+    once: bool = False,
+    stop: asyncio.Event | None = None,
+    schedule: bool | None = None,
+) -> int:
+    """Poll the queue and run up to ``concurrency`` jobs at a time.
+
+    With ``once`` the worker exits as soon as nothing is due and nothing is in flight, which is
+    handy for cron-style invocations and tests. ``schedule`` (default: not ``once``) also enqueues
+    ``periodic_jobs`` as their windows come due. Returns the number of jobs run.
+    """
+    if session_factory is None:
+        from app.db.session import SessionLocal
+
+        session_factory = SessionLocal
+    load_handlers()
+    concurrency = max(1, concurrency or settings.job_worker_concurrency)
+    poll_interval = poll_interval if poll_interval is not None else settings.job_poll_interval_seconds
+    stop = stop or asyncio.Event()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    schedule = not once if schedule is None else schedule
+    in_flight: set[asyncio.Task] = set()
+    processed = 0
+
+    while not stop.is_set():
+        if schedule:
+            try:
+                await schedule_periodic(session_factory)
+            except Exception as exc:  # pragma: no cover - retried on the next poll
+                logger.warning("job_schedule_failed", extra={"error": str(exc)})
+        claimed: list[ClaimedJob] = []
+        capacity = concurrency - len(in_flight)
+        if capacity > 0:
+            try:
+                async with session_factory() as session:
+                    claimed = await claim_jobs(session, capacity, worker_id)
+            except Exception as exc:  # pragma: no cover - keep polling through transient DB errors
+                logger.warning("job_claim_failed", extra={"error": str(exc)})
+        for job in claimed:
+            task = asyncio.create_task(run_job(session_factory, job))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        processed += len(claimed)
+        if once and not claimed and not in_flight:
+            break
+        if claimed and len(in_flight) < concurrency:
+            continue
+        if in_flight:
+            await asyncio.wait(in_flight, timeout=poll_interval, return_when=asyncio.FIRST_COMPLETED)
+        else:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    if in_flight:
+        await asyncio.gather(*in_flight, return_exceptions=True)
+    email_service.close_pool()
+    images_service.shutdown_pool()
+    logger.info("job_worker_stopped", extra={"processed": processed, "metrics": metrics_snapshot()})
+    return processed
+
+
+async def queue_stats(session: AsyncSession) -> dict[str, Any]:
+    rows = await session.execute(
+        select(BackgroundJob.kind, BackgroundJob.status, func.count()).group_by(BackgroundJob.kind, BackgroundJob.status)
+    )
+    counts = {status.value: 0 for status in JobStatus}
+    by_kind: dict[str, dict[str, int]] = {}
+    for kind, status_value, count in rows:
+        status_key = JobStatus(status_value).value
+        counts[status_key] += count
+        by_kind.setdefault(kind, {status.value: 0 for status in JobStatus})[status_key] = count
+    oldest = await session.scalar(
+        select(func.min(BackgroundJob.run_at)).where(BackgroundJob.status == JobStatus.pending)
+    )
+    lag = 0.0
+    if oldest is not None:
+        if oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        lag = max((datetime.now(timezone.utc) - oldest).total_seconds(), 0.0)
+    return {"counts": counts, "by_kind": by_kind, "oldest_pending_seconds": round(lag, 1)}
@@ -0,0 +1,237 @@
+"""On-demand image derivatives stored in a content-addressed, size-bounded cache under the media root.
+
+Derivatives live at ``<media_root>/<media_derivative_dir>/<aa>/<source sha256>/<w>x<h>-q<quality>.<ext>``.
+Keying on the source bytes rather than its path means a replaced file never serves stale pixels and
+identical uploads share derivatives; grouping by source digest lets ``delete_file`` drop them all at once.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import HTTPException, status
+from PIL import Image
+
+from app.core.config import settings
+from app.services import images
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS: dict[str, str] = {
+    "jpeg": "JPEG",
+    "jpg": "JPEG",
+    "png": "PNG",
+    "webp": "WEBP",
+    "gif": "GIF",
+    "avif": "AVIF",
+}
+MEDIA_TYPES: dict[str, str] = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+    "AVIF": "image/avif",
+}
+_EXTENSIONS: dict[str, str] = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif", "AVIF": "avif"}
+# Only bump a hit's mtime (our LRU clock) this often, so hot derivatives don't cost a metadata write per request.
+_TOUCH_INTERVAL_SECONDS = 3600
+_DIGEST_CACHE_SIZE = 4096
+
+_digests: "OrderedDict[tuple[str, int, int], str]" = OrderedDict()
+_inflight: dict[Path, asyncio.Future] = {}
+_cache_bytes: int | None = None
+
+
+@dataclass
+class Derivative:
+    path: Path
+    media_type: str
+    etag: str
+    version: str  # prefix of the source digest; pass it back as ``v`` for an immutable URL
+
+
+def cache_root() -> Path:
+    return Path(settings.media_root) / settings.media_derivative_dir
+
+
+def source_digest(path: Path) -> str:
+    """sha256 of the file, memoised on (path, mtime, size) so hot sources are hashed once."""
+    stat = path.stat()
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    digest = _digests.get(key)
+    if digest is not None:
+        _digests.move_to_end(key)
+        return digest
+    with path.open("rb") as fh:
+        digest = hashlib.file_digest(fh, "sha256").hexdigest()
+    _digests[key] = digest
+    if len(_digests) > _DIGEST_CACHE_SIZE:
+        _digests.popitem(last=False)
+    return digest
+
+
+def _digest_dir(digest: str) -> Path:
+    return cache_root() / digest[:2] / digest
+
+
+def resolve_source(relative: str) -> Path:
+    root = Path(settings.media_root).resolve()
+    source = (root / relative).resolve()
+    try:
+        inside = source.relative_to(root)
+    except ValueError:
+        inside = None
+    if inside is None or inside.parts[:1] == (settings.media_derivative_dir,) or not source.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    return source
+
+
+def output_format(source: Path, fmt: str | None) -> str:
+    """The Pillow format to encode with: the source's own, or ``fmt`` if it is JPEG/PNG or one of the
+    configured variant formats this Pillow build can write."""
+    if fmt is None:
+        fmt = source.suffix.lower().lstrip(".")
+    elif fmt.lower() not in {"jpeg", "jpg", "png", *images.variant_formats()}:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported image format")
+    pil_format = OUTPUT_FORMATS.get(fmt.lower())
+    Image.init()
+    if pil_format is None or pil_format not in Image.SAVE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported image format")
+    return pil_format
+
+
+def snap_dimension(value: int | None) -> int | None:
+    """Round a requested edge up to the nearest allowed size, so each source has a bounded set of
+    derivatives however many distinct ``w``/``h`` values clients ask for."""
+    if value is None:
+        return None
+    sizes = sorted(settings.media_resize_sizes)
+    return next((size for size in sizes if size >= value), sizes[-1])
+
+
+def _lookup(source: Path, width: int | None, height: int | None, pil_format: str) -> tuple[Path, bool]:
+    digest = source_digest(source)
+    quality = settings.image_variant_quality
+    target = _digest_dir(digest) / f"{width or 0}x{height or 0}-q{quality}.{_EXTENSIONS[pil_format]}"
+    try:
+        mtime = target.stat().st_mtime
+    except FileNotFoundError:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return target, False
+    if time.time() - mtime > _TOUCH_INTERVAL_SECONDS:
+        os.utime(target)
+    return target, True
+
+
+async def get_derivative(relative: str, width: int | None, height: int | None, fmt: str | None) -> Derivative:
+    """Return the cached derivative for ``relative`` at the requested box, rendering it on a miss."""
+    if width is None and height is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Width or height is required")
+    source = resolve_source(relative)
+    pil_format = output_format(source, fmt)
+    width, height = snap_dimension(width), snap_dimension(height)
+    target, hit = await asyncio.to_thread(_lookup, source, width, height, pil_format)
+    if not hit:
+        # Concurrent misses for the same derivative share one render.
+        pending = _inflight.get(target)
+        if pending is None:
+            pending = asyncio.ensure_future(_render(source, target, width, height, pil_format))
+            _inflight[target] = pending
+            pending.add_done_callback(lambda _: _inflight.pop(target, None))
+        await asyncio.shield(pending)
+    version = target.parent.name[:16]
+    return Derivative(
+        path=target, media_type=MEDIA_TYPES[pil_format], etag=f'"{version}-{target.stem}"', version=version
+    )
+
+
+async def _render(source: Path, target: Path, width: int | None, height: int | None, pil_format: str) -> None:
+    global _cache_bytes
+    try:
+        size = await images.run_in_pool(
+            images.render_derivative,
+            str(source),
+            str(target),
+            width,
+            height,
+            pil_format,
+            settings.image_variant_quality,
+        )
+    except (OSError, ValueError) as exc:
+        logger.warning("derivative_render_failed", extra={"path": str(source), "error": str(exc)})
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Image could not be processed")
+    if _cache_bytes is None:
+        _cache_bytes = await asyncio.to_thread(cache_size)
+    else:
+        _cache_bytes += size
+    if _cache_bytes > settings.media_derivative_cache_max_bytes:
+        _cache_bytes = await asyncio.to_thread(evict, None, target)
+
+
+def _cache_files() -> list[tuple[float, int, Path]]:
+    files: list[tuple[float, int, Path]] = []
+    root = cache_root()
+    if not root.exists():
+        return files
+    for path in root.rglob("*"):
+        if path.is_file():
+            stat = path.stat()
+            files.append((stat.st_mtime, stat.st_size, path))
+    return files
+
+
+def cache_size() -> int:
+    return sum(size for _, size, _ in _cache_files())
+
+
+def evict(max_bytes: int | None = None, keep: Path | None = None) -> int:
+    """Drop least recently used derivatives until the cache is under 90% of its budget; returns the new size.
+
+    ``keep`` protects the derivative that triggered the sweep, which is about to be served.
+    """
+    budget = settings.media_derivative_cache_max_bytes if max_bytes is None else max_bytes
+    files = sorted(_cache_files())
+    total = sum(size for _, size, _ in files)
+    low_water = int(budget * 0.9)
+    evicted = 0
+    for _, size, path in files:
+        if total <= low_water:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= size
+        evicted += 1
+        try:
+            path.parent.rmdir()
+            path.parent.parent.rmdir()
+        except OSError:
+            pass
+    if evicted:
+        logger.info("derivative_cache_evicted", extra={"evicted": evicted, "cache_bytes": total})
+    return total
+
+
+def remove_for_source(path: Path) -> None:
+    """Delete every derivative of ``path``; call before the source itself is removed."""
+    global _cache_bytes
+    try:
+        digest = source_digest(path)
+    except OSError:
+        return
+    shutil.rmtree(_digest_dir(digest), ignore_errors=True)
+    _cache_bytes = None
+
+
+def is_derivative(path: Path) -> bool:
+    try:
+        path.resolve().relative_to(cache_root().resolve())
+    except ValueError:
+        return False
+    return True
@@ -12,6 +12,8 @@ from sqlalchemy.orm import selectinload
 from app.models.cart import Cart
 from app.models.order import Order, OrderItem, OrderStatus, ShippingMethod, OrderEvent
 from app.schemas.order import OrderUpdate, ShippingMethodCreate
+from app.services import exporter as exporter_service
+from app.services import inventory
 from app.services import payments
 
 
@@ -129,6 +131,32 @@ async def list_orders(session: AsyncSession, status: OrderStatus | None = None,
     return list(result.scalars().unique())
 
 
+ORDER_EXPORT_CSV_HEADER = ["id", "reference_code", "status", "total_amount", "currency", "user_id", "created_at"]
+
+
+async def iter_orders_csv(session: AsyncSession):
+    """Stream the admin order export as CSV chunks without loading order relationships."""
+    query = select(
+        Order.id,
+        Order.reference_code,
+        Order.status,
+        Order.total_amount,
+        Order.currency,
+        Order.user_id,
+        Order.created_at,
+    ).order_by(Order.created_at.desc(), Order.id.desc())
+
+    async def batches():
+        async for rows in exporter_service.iter_batches(session, query):
+            yield [
+                [order_id, reference_code, status_value.value, total_amount, currency, user_id, created_at]
+                for order_id, reference_code, status_value, total_amount, currency, user_id, created_at in rows
+            ]
+
+    async for chunk in exporter_service.iter_csv(ORDER_EXPORT_CSV_HEADER, batches()):
+        yield chunk
+
+
 ALLOWED_TRANSITIONS = {
     OrderStatus.pending: {OrderStatus.paid, OrderStatus.cancelled},
     OrderStatus.paid: {OrderStatus.shipped, OrderStatus.refunded},
@@ -164,6 +192,10 @@ async def update_order(
         setattr(order, field, value)
     session.add(order)
     await session.commit()
+    if order.status == OrderStatus.paid:
+        await inventory.commit_for_order(session, order.id)
+    elif order.status == OrderStatus.cancelled:
+        await inventory.release_for_order(session, order.id)
     await session.refresh(order)
     await session.refresh(order, attribute_names=["items", "shipping_method", "events"])
     return order
@@ -240,6 +272,7 @@ async def update_fulfillment(session: AsyncSession, order: Order, item_id: UUID,
 async def retry_payment(session: AsyncSession, order: Order) -> Order:
     if order.status != OrderStatus.pending:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Retry only allowed for pending orders")
+    await inventory.reserve_order(session, order)
     order.payment_retry_count += 1
     await _log_event(session, order.id, "payment_retry", f"Attempt {order.payment_retry_count}")
     session.add(order)
@@ -274,6 +307,7 @@ async def capture_payment(session: AsyncSession, order: Order, intent_id: str |
     await _log_event(session, order.id, "payment_captured", f"Intent {payment_intent_id}")
     session.add(order)
     await session.commit()
+    await inventory.commit_for_order(session, order.id)
     await session.refresh(order)
     await session.refresh(order, attribute_names=["events", "items", "shipping_method"])
     return order
@@ -291,11 +325,31 @@ async def void_payment(session: AsyncSession, order: Order, intent_id: str | Non
     await _log_event(session, order.id, "payment_voided", f"Intent {payment_intent_id}")
     session.add(order)
     await session.commit()
+    await inventory.release_for_order(session, order.id)
     await session.refresh(order)
     await session.refresh(order, attribute_names=["events", "items", "shipping_method"])
     return order
 
 
+PAYMENT_FAILED_EVENTS = {"payment_intent.payment_failed", "payment_intent.canceled"}
+
+
+async def apply_payment_event(session: AsyncSession, event: dict) -> None:
+    """Settle the stock held by the order behind a Stripe payment intent event."""
+    intent_id = ((event.get("data") or {}).get("object") or {}).get("id")
+    event_type = event.get("type")
+    if not intent_id or (event_type != "payment_intent.succeeded" and event_type not in PAYMENT_FAILED_EVENTS):
+        return
+    result = await session.execute(select(Order).where(Order.stripe_payment_intent_id == intent_id))
+    order = result.scalar_one_or_none()
+    if not order:
+        return
+    if event_type == "payment_intent.succeeded":
+        await inventory.commit_for_order(session, order.id)
+    elif await inventory.release_for_order(session, order.id):
+        await _log_event(session, order.id, "stock_released", f"{event_type} for intent {intent_id}")
+
+
 async def _log_event(session: AsyncSession, order_id: UUID, event: str, note: str | None = None) -> None:
     evt = OrderEvent(order_id=order_id, event=event, note=note)
     session.add(evt)
@@ -0,0 +1,230 @@
+import csv
+import io
+import logging
+import random
+import string
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import cache
+from app.models.catalog import Category, Product, ProductSlugHistory, ProductStatus, Tag, product_tags
+from app.schemas.catalog import ProductUpdate
+from app.services import search as search_service
+from app.services.catalog import slugify
+
+logger = logging.getLogger(__name__)
+
+# Bounds both IN lists (SQLite caps bound parameters) and executemany batches.
+IMPORT_CHUNK_SIZE = 500
+
+
+@dataclass
+class ImportRow:
+    line: int
+    slug: str
+    category_slug: str
+    tags: list[str]
+    values: dict
+
+
+def _chunks(items: list, size: int = IMPORT_CHUNK_SIZE) -> Iterator[list]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _parse_row(line: int, row: dict) -> tuple[ImportRow | None, str | None]:
+    slug = (row.get("slug") or "").strip()
+    name = (row.get("name") or "").strip()
+    category_slug = (row.get("category_slug") or "").strip()
+    if not slug or not name or not category_slug:
+        return None, f"Row {line}: missing slug, name, or category_slug"
+    try:
+        base_price = float(row.get("base_price") or 0)
+        stock_quantity = int(row.get("stock_quantity") or 0)
+    except ValueError:
+        return None, f"Row {line}: invalid base_price or stock_quantity"
+    status_value = (row.get("status") or ProductStatus.draft.value).strip()
+    try:
+        status_enum = ProductStatus(status_value)
+    except ValueError:
+        return None, f"Row {line}: invalid status {status_value}"
+    try:
+        payload = ProductUpdate(
+            name=name,
+            base_price=base_price,
+            currency=(row.get("currency") or "USD").strip(),
+            stock_quantity=stock_quantity,
+            status=status_enum,
+            is_featured=str(row.get("is_featured") or "").lower() in {"true", "1", "yes"},
+            is_active=str(row.get("is_active") or "true").lower() not in {"false", "0", "no"},
+            short_description=(row.get("short_description") or "").strip() or None,
+            long_description=(row.get("long_description") or "").strip() or None,
+        )
+    except ValidationError as exc:
+        error = exc.errors()[0]
+        field = ".".join(str(part) for part in error["loc"])
+        return None, f"Row {line}: invalid {field}: {error['msg']}"
+    values = payload.model_dump(exclude_unset=True)
+    values["currency"] = values["currency"].upper()
+    tags = list(dict.fromkeys(t.strip() for t in (row.get("tags") or "").split(",") if t.strip()))
+    return ImportRow(line=line, slug=slug, category_slug=category_slug, tags=tags, values=values), None
+
+
+async def _lookup(session: AsyncSession, key_column, value_columns: list, keys: Iterable) -> dict:
+    """Map ``key_column`` values to their row's ``value_columns`` with one ``IN`` query per chunk."""
+    found: dict = {}
+    for chunk in _chunks(list(set(keys))):
+        result = await session.execute(select(key_column, *value_columns).where(key_column.in_(chunk)))
+        for key, *values in result:
+            found[key] = values[0] if len(values) == 1 else tuple(values)
+    return found
+
+
+def _sku_candidate(slug: str) -> str:
+    slug_part = slug.replace("-", "").upper()[:8] or "SKU"
+    return f"{slug_part}-{''.join(random.choices(string.digits, k=4))}"
+
+
+async def _assign_skus(session: AsyncSession, inserts: list[dict]) -> None:
+    pending = inserts
+    taken: set[str] = set()
+    while pending:
+        for values in pending:
+            values["sku"] = _sku_candidate(values["slug"])
+        existing = await _lookup(session, Product.sku, [Product.id], (values["sku"] for values in pending))
+        retry = []
+        for values in pending:
+            if values["sku"] in existing or values["sku"] in taken:
+                retry.append(values)
+            else:
+                taken.add(values["sku"])
+        pending = retry
+
+
+async def import_products_csv(session: AsyncSession, content: str, dry_run: bool = True) -> dict:
+    """Validate a product CSV in full, then apply it with a handful of set-based statements.
+
+    Rows are keyed by slug: existing products are updated, others created, and a slug repeated
+    later in the file updates the earlier row. Any row error aborts the write; ``dry_run`` only
+    reports what would happen.
+    """
+    started = time.perf_counter()
+    rows: list[ImportRow] = []
+    errors: list[str] = []
+    total_rows = 0
+    for line, raw in enumerate(csv.DictReader(io.StringIO(content)), start=2):
+        total_rows += 1
+        parsed, error = _parse_row(line, raw)
+        if error:
+            errors.append(error)
+        else:
+            rows.append(parsed)
+
+    categories = await _lookup(session, Category.slug, [Category.id], (row.category_slug for row in rows))
+    products = await _lookup(session, Product.slug, [Product.id, Product.publish_at], (row.slug for row in rows))
+    history = await _lookup(session, ProductSlugHistory.slug, [ProductSlugHistory.product_id], (row.slug for row in rows))
+
+    now = datetime.now(timezone.utc)
+    created = 0
+    updated = 0
+    new_categories: dict[str, uuid.UUID] = {}
+    inserts: dict[uuid.UUID, dict] = {}
+    updates: dict[uuid.UUID, dict] = {}
+    tags_by_product: dict[uuid.UUID, list[str]] = {}
+    for row in rows:
+        category_id = categories.get(row.category_slug) or new_categories.get(row.category_slug)
+        if category_id is None:
+            if dry_run:
+                errors.append(f"Row {row.line}: category {row.category_slug} not found")
+                continue
+            category_id = new_categories[row.category_slug] = uuid.uuid4()
+        values = {**row.values, "category_id": category_id}
+        published = values["status"] == ProductStatus.published
+        if row.slug in products:
+            product_id, publish_at = products[row.slug]
+            if published and publish_at is None:
+                values["publish_at"] = now
+                products[row.slug] = (product_id, now)
+            updated += 1
+            target = inserts if product_id in inserts else updates
+            target.setdefault(product_id, {"id": product_id}).update(values)
+        elif row.slug in history:
+            errors.append(f"Row {row.line}: slug {row.slug} already exists in history")
+            continue
+        else:
+            product_id = uuid.uuid4()
+            publish_at = now if published else None
+            inserts[product_id] = {**values, "id": product_id, "slug": row.slug, "publish_at": publish_at}
+            products[row.slug] = (product_id, publish_at)
+            created += 1
+        tags_by_product[product_id] = row.tags
+
+    def result() -> dict:
+        elapsed = time.perf_counter() - started
+        stats = {
+            "rows": total_rows,
+            "duration_ms": round(elapsed * 1000, 2),
+            "rows_per_second": round(total_rows / elapsed, 1) if elapsed else float(total_rows),
+        }
+        logger.info(
+            "product_import",
+            extra={
+                "dry_run": dry_run,
+                "created_count": created,
+                "updated_count": updated,
+                "error_count": len(errors),
+                **stats,
+            },
+        )
+        return {"created": created, "updated": updated, "errors": errors, "stats": stats}
+
+    if errors or dry_run:
+        return result()
+
+    tag_names: dict[str, str] = {}
+    for names in tags_by_product.values():
+        for name in names:
+            tag_names.setdefault(slugify(name), name)
+    tag_ids = await _lookup(session, Tag.slug, [Tag.id], tag_names)
+    new_tags = [{"id": uuid.uuid4(), "slug": slug, "name": name} for slug, name in tag_names.items() if slug not in tag_ids]
+    tag_ids.update({tag["slug"]: tag["id"] for tag in new_tags})
+    links = {
+        (product_id, tag_ids[slugify(name)]) for product_id, names in tags_by_product.items() for name in names
+    }
+    await _assign_skus(session, list(inserts.values()))
+
+    try:
+        if new_categories:
+            await session.execute(
+                insert(Category),
+                [{"id": cid, "slug": slug, "name": slug.replace("-", " ").title()} for slug, cid in new_categories.items()],
+            )
+        for chunk in _chunks(new_tags):
+            await session.execute(insert(Tag), chunk)
+        for chunk in _chunks(list(inserts.values())):
+            await session.execute(insert(Product), chunk)
+        for chunk in _chunks(list(updates.values())):
+            await session.execute(update(Product), chunk)
+        for chunk in _chunks(list(updates)):
+            await session.execute(delete(product_tags).where(product_tags.c.product_id.in_(chunk)))
+        for chunk in _chunks([{"product_id": pid, "tag_id": tid} for pid, tid in links]):
+            await session.execute(insert(product_tags), chunk)
+        for chunk in _chunks(list(tags_by_product)):
+            await search_service.reindex_products(session, chunk)
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Import conflicts with concurrent catalog changes; nothing was imported"
+        )
+    await cache.invalidate(cache.CATALOG_NAMESPACE)
+    return result()
@@ -0,0 +1,163 @@
+"""Write-behind buffer for recently-viewed products.
+
+Product page views are recorded in memory, one entry per (viewer, product) with the latest view time. A
+background writer flushes them periodically: one delete of the pairs being refreshed, one bulk insert,
+and one set-based trim per viewer down to ``recently_viewed_limit`` rows. ``catalog.get_recently_viewed``
+merges the views that have not been flushed yet, so readers do not notice the delay within a worker.
+"""
+
+import asyncio
+import contextlib
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import delete, insert, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.catalog import RecentlyViewedProduct
+
+logger = logging.getLogger(__name__)
+
+# ("user", user_id) or ("session", session_id); a signed-in viewer is always tracked by user.
+Viewer = tuple[str, Any]
+
+
+def viewer_for(user_id: uuid.UUID | None, session_id: str | None) -> Viewer | None:
+    if user_id:
+        return ("user", user_id)
+    if session_id:
+        return ("session", session_id)
+    return None
+
+
+def _viewer_column(kind: str):
+    return RecentlyViewedProduct.user_id if kind == "user" else RecentlyViewedProduct.session_id
+
+
+class ViewBuffer:
+    def __init__(self, session_factory: async_sessionmaker | None = None):
+        self.session_factory = session_factory
+        self._pending: dict[Viewer, dict[uuid.UUID, datetime]] = {}
+        self._size = 0
+        self._task: asyncio.Task | None = None
+        self.counters = {"recorded": 0, "dropped": 0, "written": 0, "failed": 0, "flushes": 0}
+
+    def record(self, user_id: uuid.UUID | None, session_id: str | None, product_id: uuid.UUID) -> bool:
+        """Non-blocking; repeated views of the same product by the same viewer only move its timestamp."""
+        viewer = viewer_for(user_id, session_id)
+        if viewer is None:
+            return False
+        views = self._pending.get(viewer)
+        if views is None or product_id not in views:
+            if self._size >= settings.recently_viewed_buffer_max:
+                self.counters["dropped"] += 1
+                return False
+            self._size += 1
+        self._pending.setdefault(viewer, {})[product_id] = datetime.now(timezone.utc)
+        self.counters["recorded"] += 1
+        return True
+
+    def pending_for(self, user_id: uuid.UUID | None, session_id: str | None) -> dict[uuid.UUID, datetime]:
+        viewer = viewer_for(user_id, session_id)
+        return dict(self._pending.get(viewer, {})) if viewer is not None else {}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.counters,
+            "pending": self._size,
+            "viewers": len(self._pending),
+            "writer_running": self._task is not None and not self._task.done(),
+        }
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._size = 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.recently_viewed_flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception as exc:  # pragma: no cover - flush already counts failures
+                logger.warning("recently_viewed_flush_failed", extra={"error": str(exc)})
+
+    async def flush(self) -> int:
+        """Persist everything buffered so far in one transaction; returns the number of views written."""
+        if not self._pending:
+            return 0
+        batch, self._pending, self._size = self._pending, {}, 0
+        written = sum(len(views) for views in batch.values())
+        session_factory = self.session_factory
+        if session_factory is None:
+            from app.db.session import SessionLocal
+
+            session_factory = SessionLocal
+        try:
+            async with session_factory() as session:
+                await write_views(session, batch)
+                await session.commit()
+        except Exception as exc:
+            # Views are best-effort history; a failed batch is counted and dropped, not retried forever.
+            self.counters["failed"] += written
+            logger.warning("recently_viewed_batch_failed", extra={"views": written, "error": str(exc)})
+            return 0
+        self.counters["written"] += written
+        self.counters["flushes"] += 1
+        return written
+
+
+async def write_views(session: AsyncSession, batch: dict[Viewer, dict[uuid.UUID, datetime]]) -> None:
+    limit = settings.recently_viewed_limit
+    rows = []
+    pairs: dict[str, list[tuple[Any, uuid.UUID]]] = {"user": [], "session": []}
+    for (kind, ident), views in batch.items():
+        # Only the newest `limit` views of a viewer can survive the trim below.
+        newest = sorted(views.items(), key=lambda item: item[1], reverse=True)[:limit]
+        for product_id, viewed_at in newest:
+            pairs[kind].append((ident, product_id))
+            rows.append(
+                {
+                    "id": uuid.uuid4(),
+                    "product_id": product_id,
+                    "user_id": ident if kind == "user" else None,
+                    "session_id": ident if kind == "session" else None,
+                    "viewed_at": viewed_at,
+                }
+            )
+    # No unique key on (viewer, product): the upsert is "drop the old rows, insert the new ones".
+    conditions = [
+        tuple_(_viewer_column(kind), RecentlyViewedProduct.product_id).in_(kind_pairs)
+        for kind, kind_pairs in pairs.items()
+        if kind_pairs
+    ]
+    await session.execute(delete(RecentlyViewedProduct).where(or_(*conditions)))
+    await session.execute(insert(RecentlyViewedProduct), rows)
+    for kind, ident in batch:
+        column = _viewer_column(kind)
+        keep = (
+            select(RecentlyViewedProduct.id)
+            .where(column == ident)
+            .order_by(RecentlyViewedProduct.viewed_at.desc())
+            .limit(limit)
+        )
+        await session.execute(
+            delete(RecentlyViewedProduct).where(column == ident, RecentlyViewedProduct.id.not_in(keep))
+        )
+
+
+buffer = ViewBuffer()
@@ -0,0 +1,141 @@
+import unicodedata
+import uuid
+from typing import Iterable
+
+from sqlalchemy import and_, case, delete, func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.catalog import Category, Product, ProductSearchDocument, ProductTranslation, Tag, product_tags
+
+BASE_LANG = "base"
+MAX_QUERY_TOKENS = 8
+
+
+def normalize_text(value: str | None) -> str:
+    """Lowercase, strip diacritics and collapse everything that is not a letter or digit."""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    cleaned = "".join(ch if ch.isalnum() else " " for ch in stripped.lower())
+    return " ".join(cleaned.split())
+
+
+def tokenize_query(query: str | None) -> list[str]:
+    return normalize_text(query).split()[:MAX_QUERY_TOKENS]
+
+
+def _dialect_name(session: AsyncSession) -> str:
+    bind = session.get_bind()
+    return bind.dialect.name
+
+
+def _document(product_id: uuid.UUID, lang: str, title_parts: list, body_parts: list) -> ProductSearchDocument:
+    title = normalize_text(" ".join(part for part in title_parts if part))
+    body = normalize_text(" ".join(part for part in body_parts if part))
+    return ProductSearchDocument(product_id=product_id, lang=lang, title=title, content=f"{title} {body}".strip())
+
+
+async def reindex_products(session: AsyncSession, product_ids: Iterable[uuid.UUID]) -> int:
+    """Rebuild search documents for the given products; the caller owns the commit."""
+    ids = list(set(product_ids))
+    if not ids:
+        return 0
+    await session.flush()
+    rows = (
+        await session.execute(
+            select(
+                Product.id,
+                Product.sku,
+                Product.name,
+                Product.short_description,
+                Product.long_description,
+                Category.name,
+            )
+            .join(Category, Category.id == Product.category_id)
+            .where(Product.id.in_(ids))
+        )
+    ).all()
+    tag_rows = (
+        await session.execute(
+            select(product_tags.c.product_id, Tag.name)
+            .join(Tag, Tag.id == product_tags.c.tag_id)
+            .where(product_tags.c.product_id.in_(ids))
+        )
+    ).all()
+    translation_rows = (
+        await session.execute(
+            select(
+                ProductTranslation.product_id,
+                ProductTranslation.lang,
+                ProductTranslation.name,
+                ProductTranslation.short_description,
+                ProductTranslation.long_description,
+            ).where(ProductTranslation.product_id.in_(ids))
+        )
+    ).all()
+    tags_by_product: dict[uuid.UUID, list[str]] = {}
+    for product_id, tag_name in tag_rows:
+        tags_by_product.setdefault(product_id, []).append(tag_name)
+    translations_by_product: dict[uuid.UUID, list] = {}
+    for row in translation_rows:
+        translations_by_product.setdefault(row[0], []).append(row)
+
+    await session.execute(delete(ProductSearchDocument).where(ProductSearchDocument.product_id.in_(ids)))
+    documents: list[ProductSearchDocument] = []
+    for product_id, sku, name, short_description, long_description, category_name in rows:
+        tags = tags_by_product.get(product_id, [])
+        documents.append(
+            _document(product_id, BASE_LANG, [name, sku], [short_description, long_description, category_name, *tags])
+        )
+        for _, lang, t_name, t_short, t_long in translations_by_product.get(product_id, []):
+            documents.append(_document(product_id, lang, [t_name, sku], [t_short, t_long, category_name, *tags]))
+    session.add_all(documents)
+    await session.flush()
+    return len(documents)
+
+
+async def reindex_all(session: AsyncSession, batch_size: int = 500) -> int:
+    indexed = 0
+    last_id: uuid.UUID | None = None
+    while True:
+        query = select(Product.id).order_by(Product.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(Product.id > last_id)
+        ids = list((await session.execute(query)).scalars())
+        if not ids:
+            break
+        indexed += await reindex_products(session, ids)
+        await session.commit()
+        last_id = ids[-1]
+    return indexed
+
+
+def build_search_ranking(session: AsyncSession, query: str, lang: str | None):
+    """Return a ``(product_id, rank)`` subquery of products matching ``query``, or ``None`` for a blank query.
+
+    Postgres uses the GIN-indexed ``to_tsvector('simple', content)`` with prefix matching plus
+    pg_trgm word similarity on titles for typos; other dialects fall back to substring matching.
+    """
+    tokens = tokenize_query(query)
+    if not tokens:
+        return None
+    doc = ProductSearchDocument
+    langs = [BASE_LANG, lang] if lang else [BASE_LANG]
+    if _dialect_name(session) == "postgresql":
+        vector = func.to_tsvector(literal_column("'simple'::regconfig"), doc.content)
+        ts_query = func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{tok}:*" for tok in tokens))
+        phrase = " ".join(tokens)
+        match = or_(vector.op("@@")(ts_query), doc.title.op("%>")(phrase))
+        rank = func.ts_rank_cd(vector, ts_query) + func.word_similarity(phrase, doc.title)
+    else:
+        match = and_(*(doc.content.like(f"%{tok}%") for tok in tokens))
+        rank = sum(case((doc.title.like(f"%{tok}%"), 1.0), else_=0.0) for tok in tokens) + case(
+            (doc.title.like(f"{tokens[0]}%"), 0.5), else_=0.0
+        )
+    return (
+        select(doc.product_id.label("product_id"), func.max(rank).label("rank"))
+        .where(doc.lang.in_(langs), match)
+        .group_by(doc.product_id)
+        .subquery("search_rank")
+    )
@@ -1,16 +1,19 @@
+import asyncio
 import imghdr
 import logging
 import uuid
 from pathlib import Path
-from typing import Tuple
+from typing import Any, Tuple
 
-from PIL import Image
 from fastapi import HTTPException, UploadFile, status
 
 from app.core.config import settings
+from app.services import images, media_cache
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 def ensure_media_root(root: str | Path | None = None) -> Path:
     path = Path(root or settings.media_root)
@@ -34,56 +37,61 @@ def save_upload(
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid upload destination")
 
-    read_len = max_bytes + 1 if max_bytes is not None else -1
-    content = file.file.read(read_len)
-    if max_bytes is not None and len(content) > max_bytes:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File too large")
-
-    if allowed_content_types:
-        if not file.content_type or file.content_type not in allowed_content_types:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file type")
-        sniff = imghdr.what(None, h=content)
-        if sniff:
-            sniff_mime = f"image/{'jpeg' if sniff == 'jpg' else sniff}"
-            if sniff_mime not in allowed_content_types:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file type")
+    if allowed_content_types and (not file.content_type or file.content_type not in allowed_content_types):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file type")
 
     original_suffix = Path(file.filename or "").suffix.lower()
     safe_name = Path(filename or "").name if filename else ""
     if not safe_name:
         safe_name = f"{uuid.uuid4().hex}{original_suffix or '.bin'}"
     destination = dest_root / safe_name
-    destination.write_bytes(content)
+    # Stream into a temp file next to the destination so a rejected or interrupted upload never
+    # replaces an existing file (avatars reuse their name) and memory stays bounded by the chunk size.
+    partial = dest_root / f".{uuid.uuid4().hex}.part"
+    written = 0
+    try:
+        with partial.open("wb") as out:
+            while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                if written == 0 and allowed_content_types:
+                    _check_sniffed_type(chunk, allowed_content_types)
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File too large")
+                out.write(chunk)
+        partial.replace(destination)
+    finally:
+        partial.unlink(missing_ok=True)
 
     if generate_thumbnails and allowed_content_types:
-        _generate_thumbnails(destination)
+        images.generate_variants_sync(destination)
 
     rel_path = destination.relative_to(base_root).as_posix()
     return f"/media/{rel_path}", destination.name
 
 
-def delete_file(filepath: str) -> None:
+async def save_upload_async(file: UploadFile, **kwargs: Any) -> Tuple[str, str]:
+    """``save_upload`` on a worker thread so request handlers don't block on disk I/O."""
+    return await asyncio.to_thread(save_upload, file, **kwargs)
+
+
+def _check_sniffed_type(head: bytes, allowed_content_types: tuple[str, ...]) -> None:
+    sniff = imghdr.what(None, h=head)
+    if sniff:
+        sniff_mime = f"image/{'jpeg' if sniff == 'jpg' else sniff}"
+        if sniff_mime not in allowed_content_types:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file type")
+
+
+def media_path(filepath: str) -> Path:
     if filepath.startswith("/media/"):
-        rel = filepath.removeprefix("/media/")
-        path = Path(settings.media_root) / rel
-    else:
-        path = Path(filepath)
-    if path.exists():
-        path.unlink()
-        for suffix in ("-sm", "-md", "-lg"):
-            sibling = path.with_name(f"{path.stem}{suffix}{path.suffix}")
-            if sibling.exists():
-                sibling.unlink()
+        return Path(settings.media_root) / filepath.removeprefix("/media/")
+    return Path(filepath)
 
 
-def _generate_thumbnails(path: Path) -> None:
-    try:
-        with Image.open(path) as img:
-            sizes = {"sm": (320, 320), "md": (640, 640), "lg": (1024, 1024)}
-            for suffix, size in sizes.items():
-                thumb = img.copy()
-                thumb.thumbnail(size)
-                thumb_path = path.with_name(f"{path.stem}-{suffix}{path.suffix}")
-                thumb.save(thumb_path, optimize=True)
-    except Exception as exc:  # pragma: no cover
-        logger.warning("thumbnail_generation_failed", extra={"path": str(path), "error": str(exc)})
+def delete_file(filepath: str) -> None:
+    path = media_path(filepath)
+    if path.exists():
+        media_cache.remove_for_source(path)
+        path.unlink()
+        for sibling in images.variant_paths(path):
+            sibling.unlink(missing_ok=True)
@@ -0,0 +1,81 @@
+"""Short-lived per-process cache of ``users`` rows for authenticated requests.
+
+Only column values are kept; a hit is rebuilt into a ``User`` attached to the request's session without
+a SELECT, so handlers can still modify and commit it. Any ORM update or delete of a user drops its entry
+in this process; other workers see the change once ``user_cache_ttl_seconds`` has passed.
+"""
+
+from __future__ import annotations
+
+import time
+import uuid
+from collections import OrderedDict
+from threading import Lock
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.models.user import User
+
+_entries: OrderedDict[uuid.UUID, tuple[float, dict[str, Any]]] = OrderedDict()
+_lock = Lock()
+_COLUMNS = [attr.key for attr in inspect(User).mapper.column_attrs]
+
+
+def get(user_id: uuid.UUID) -> dict[str, Any] | None:
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, values = entry
+        if expires_at <= now:
+            del _entries[user_id]
+            return None
+        _entries.move_to_end(user_id)
+        return values
+
+
+def put(user: User) -> None:
+    if settings.user_cache_ttl_seconds <= 0:
+        return
+    values = {key: getattr(user, key) for key in _COLUMNS}
+    with _lock:
+        _entries[user.id] = (time.monotonic() + settings.user_cache_ttl_seconds, values)
+        _entries.move_to_end(user.id)
+        while len(_entries) > settings.user_cache_max_entries:
+            _entries.popitem(last=False)
+
+
+def invalidate(user_id: uuid.UUID | None) -> None:
+    if user_id is None:
+        return
+    with _lock:
+        _entries.pop(user_id, None)
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+async def attach(session: AsyncSession, values: dict[str, Any]) -> User:
+    """Rebuild a cached row as a persistent ``User`` in ``session`` without querying.
+
+    Like the ``raiseload("*")`` row ``get_current_user`` selects on a miss, the result has no relationships
+    loaded. ``merge(load=False)`` takes no loader options, so accessing one falls back to the class-level
+    loader, which an ``AsyncSession`` refuses to run implicitly (``MissingGreenlet``, also an
+    ``InvalidRequestError``): it raises rather than querying, the same as on a miss.
+    """
+    user = User(**values)
+    make_transient_to_detached(user)
+    return await session.merge(user, load=False)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _drop_on_change(mapper, connection, target: User) -> None:
+    invalidate(target.id)
@@ -0,0 +1,156 @@
+"""Microbenchmark: per-request overhead of the middleware stack, BaseHTTPMiddleware vs the fused ASGI layer.
+
+Drives raw ASGI calls in-process (no sockets, no HTTP client) against a trivial endpoint, so the numbers
+isolate middleware cost. The legacy stack below replays the five ``BaseHTTPMiddleware`` layers the app
+used before ``RequestPipelineMiddleware``.
+
+    python -m scripts.bench_middleware --requests 20000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logging_config import request_id_ctx_var
+from app.middleware import RequestPipelineMiddleware
+from app.middleware.security import security_headers
+from app.services.audit import bearer_user_id
+
+
+async def endpoint(scope: Scope, receive: Receive, send: Send) -> None:
+    await PlainTextResponse("ok")(scope, receive, send)
+
+
+class LegacySecurityHeaders(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        for name, value in security_headers():
+            response.headers.setdefault(name, value)
+        return response
+
+
+class LegacyMaintenance(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        if settings.maintenance_mode:
+            return JSONResponse(status_code=503, content={"detail": "Maintenance mode"})
+        return await call_next(request)
+
+
+class LegacyBackpressure(BaseHTTPMiddleware):
+    def __init__(self, app):
+        super().__init__(app)
+        self.semaphore = asyncio.Semaphore(settings.max_concurrent_requests)
+
+    async def dispatch(self, request, call_next):
+        await self.semaphore.acquire()
+        try:
+            return await call_next(request)
+        finally:
+            self.semaphore.release()
+
+
+class LegacyRequestLogging(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        request_id = str(uuid.uuid4())
+        token = request_id_ctx_var.set(request_id)
+        try:
+            response = await call_next(request)
+        finally:
+            request_id_ctx_var.reset(token)
+        response.headers["X-Request-ID"] = request_id
+        logging.getLogger("app.request").info("request", extra={"request_id": request_id})
+        return response
+
+
+class LegacyAudit(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        await request.body()
+        user_id = bearer_user_id(request.headers.get("authorization"))
+        response = await call_next(request)
+        logging.getLogger("app.audit").info("audit", extra={"user_id": user_id or "-"})
+        return response
+
+
+def legacy_stack():
+    app = endpoint
+    for layer in (LegacySecurityHeaders, LegacyMaintenance, LegacyBackpressure, LegacyRequestLogging, LegacyAudit):
+        app = layer(app)
+    return app
+
+
+def _scope() -> Scope:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/catalog/products",
+        "raw_path": b"/api/v1/catalog/products",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+
+def _channel() -> tuple[Receive, Send]:
+    """Like uvicorn: one request message, then ``http.disconnect`` once the response has been sent."""
+    sent = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and not message.get("more_body", False):
+            done.set()
+
+    return receive, send
+
+
+async def _request(app) -> None:
+    receive, send = _channel()
+    await app(_scope(), receive, send)
+
+
+async def measure(app, requests: int) -> float:
+    for _ in range(min(requests, 500)):  # warm up
+        await _request(app)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await _request(app)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+async def main(requests: int) -> None:
+    logging.disable(logging.CRITICAL)
+    baseline = await measure(endpoint, requests)
+    results = {
+        "legacy (5x BaseHTTPMiddleware)": await measure(legacy_stack(), requests),
+        "fused (RequestPipelineMiddleware)": await measure(RequestPipelineMiddleware(endpoint), requests),
+    }
+    print(f"{'bare endpoint':36s} {baseline:8.1f} us/request")
+    for name, per_request in results.items():
+        print(f"{name:36s} {per_request:8.1f} us/request  (+{per_request - baseline:.1f} us overhead)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark middleware overhead per request.")
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
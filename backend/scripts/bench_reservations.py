@@ -0,0 +1,141 @@
+"""Benchmark: hundreds of parallel checkouts for the same SKU.
+
+Every checkout opens its own session and asks for one unit of a single product. Three ways of taking stock
+are compared:
+
+- ``conditional``: ``inventory.reserve``, one ``UPDATE ... WHERE stock_quantity >= :qty`` per line.
+- ``row_lock``: ``SELECT ... FOR UPDATE`` then write the new count (Postgres only; SQLite ignores the lock).
+- ``read_then_write``: read the count, check it, write ``count - 1``, as checkout effectively did before.
+
+The table shows throughput, accepted checkouts and ``oversold`` (accepted minus units actually taken).
+Without ``--database-url`` a throwaway SQLite file is used; point it at a migrated Postgres database for
+meaningful lock behaviour. The benchmark product and its reservations are deleted afterwards.
+
+    python -m scripts.bench_reservations --checkouts 500 --concurrency 200 --stock 300
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+from pathlib import Path
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models.catalog import Category, Product
+from app.models.inventory import StockReservation
+from app.services import inventory
+
+
+async def conditional(session, product_id: uuid.UUID) -> bool:
+    try:
+        await inventory.reserve(session, [(product_id, None, 1)])
+    except HTTPException:
+        return False
+    return True
+
+
+async def _read_check_write(session, product_id: uuid.UUID, lock: bool) -> bool:
+    query = select(Product.stock_quantity).where(Product.id == product_id)
+    stock = await session.scalar(query.with_for_update() if lock else query)
+    if stock < 1:
+        await session.rollback()
+        return False
+    await asyncio.sleep(0)  # the gap between check and write that concurrent checkouts fall into
+    await session.execute(update(Product).where(Product.id == product_id).values(stock_quantity=stock - 1))
+    await session.commit()
+    return True
+
+
+async def row_lock(session, product_id: uuid.UUID) -> bool:
+    return await _read_check_write(session, product_id, lock=True)
+
+
+async def read_then_write(session, product_id: uuid.UUID) -> bool:
+    return await _read_check_write(session, product_id, lock=False)
+
+
+async def run(SessionLocal, strategy, stock: int, checkouts: int, concurrency: int) -> dict:
+    async with SessionLocal() as session:
+        product = Product(
+            category=Category(slug=f"bench-{uuid.uuid4().hex[:8]}", name="Bench"),
+            slug=f"bench-{uuid.uuid4().hex[:8]}",
+            name="Bench SKU",
+            base_price=Decimal("1.00"),
+            currency="USD",
+            stock_quantity=stock,
+        )
+        session.add(product)
+        await session.commit()
+        product_id, category_id = product.id, product.category_id
+
+    gate = asyncio.Semaphore(concurrency)
+
+    async def checkout() -> bool:
+        async with gate, SessionLocal() as session:
+            return await strategy(session, product_id)
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(checkout() for _ in range(checkouts)), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+
+    async with SessionLocal() as session:
+        left = await session.scalar(select(Product.stock_quantity).where(Product.id == product_id))
+        await session.execute(delete(StockReservation).where(StockReservation.product_id == product_id))
+        await session.execute(delete(Product).where(Product.id == product_id))
+        await session.execute(delete(Category).where(Category.id == category_id))
+        await session.commit()
+    accepted = sum(1 for outcome in outcomes if outcome is True)
+    return {
+        "elapsed": elapsed,
+        "accepted": accepted,
+        "errors": sum(1 for outcome in outcomes if isinstance(outcome, BaseException)),
+        "left": left,
+        "oversold": accepted - (stock - left),
+    }
+
+
+async def main(database_url: str | None, stock: int, checkouts: int, concurrency: int) -> None:
+    logging.disable(logging.CRITICAL)
+    tmpdir = None
+    if database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite+aiosqlite:///{Path(tmpdir.name) / 'bench.db'}"
+    pool = {} if database_url.startswith("sqlite") else {"pool_size": concurrency, "max_overflow": 0, "pool_timeout": 120}
+    engine = create_async_engine(database_url, **pool)
+    if tmpdir is not None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+    strategies = {"conditional": conditional, "read_then_write": read_then_write}
+    if engine.dialect.name != "sqlite":
+        strategies["row_lock"] = row_lock
+    print(f"{checkouts} checkouts, {concurrency} in parallel, {stock} units, {engine.dialect.name}")
+    try:
+        for name, strategy in strategies.items():
+            result = await run(SessionLocal, strategy, stock, checkouts, concurrency)
+            print(
+                f"{name:16s} {checkouts / result['elapsed']:8.0f} checkouts/s  accepted {result['accepted']:5d}"
+                f"  left {result['left']:5d}  oversold {result['oversold']:5d}  errors {result['errors']}"
+            )
+    finally:
+        await engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark parallel checkouts for one SKU.")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--stock", type=int, default=300)
+    parser.add_argument("--checkouts", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.database_url, args.stock, args.checkouts, args.concurrency))
@@ -1,5 +1,6 @@
 import argparse
 import asyncio
+import shutil
 from pathlib import Path
 
 from sqlalchemy import select
@@ -8,6 +9,7 @@ from app.core.config import settings
 from app.db.session import SessionLocal
 from app.models.catalog import ProductImage
 from app.models.content import ContentImage
+from app.services import images, media_cache
 from app.services.storage import delete_file
 
 
@@ -23,20 +25,42 @@ async def collect_references() -> set[str]:
 
 
 def walk_media() -> set[str]:
+    """Uploaded originals only; thumbnails and cached derivatives are removed along with their source."""
     root = Path(settings.media_root)
     existing: set[str] = set()
     if not root.exists():
         return existing
-    for path in root.rglob("*"):
-        if path.is_file():
+    files = [path for path in root.rglob("*") if path.is_file() and not media_cache.is_derivative(path)]
+    variants = {variant for path in files for variant in images.variant_paths(path)}
+    for path in files:
+        if path not in variants:
             existing.add(f"/media/{path.relative_to(root).as_posix()}")
     return existing
 
 
+def stale_derivative_dirs(existing: set[str]) -> list[Path]:
+    """Derivative groups whose source digest no longer matches any file in the media root."""
+    cache = media_cache.cache_root()
+    if not cache.exists():
+        return []
+    digests = {media_cache.source_digest(_media_file(url)) for url in existing}
+    return sorted(group for group in cache.glob("*/*") if group.is_dir() and group.name not in digests)
+
+
+def _media_file(url: str) -> Path:
+    return Path(settings.media_root) / url.removeprefix("/media/")
+
+
 async def main(delete: bool) -> None:
     referenced = await collect_references()
     existing = walk_media()
     orphans = existing - referenced
+    stale = stale_derivative_dirs(existing - orphans)
+    if stale:
+        print(f"Found {len(stale)} stale derivative cache groups.")
+        if delete:
+            for group in stale:
+                shutil.rmtree(group, ignore_errors=True)
     if not orphans:
         print("No orphaned media files found.")
         return
@@ -0,0 +1,15 @@
+import asyncio
+
+import pytest
+
+from app.core import cache, rate_limit
+from app.services import recently_viewed, user_cache
+
+
+@pytest.fixture(autouse=True)
+def reset_response_cache():
+    asyncio.run(cache.reset())
+    asyncio.run(rate_limit.reset())
+    user_cache.clear()
+    recently_viewed.buffer.clear()
+    yield
@@ -169,6 +169,10 @@ def test_sitemap_and_robots(test_app: Dict[str, object]) -> None:
     resp = client.get("/api/v1/sitemap.xml")
     assert resp.status_code == 200
     assert "<urlset" in resp.text
+    assert resp.headers["Cache-Control"].startswith("public")
+    revalidated = client.get("/api/v1/sitemap.xml", headers={"If-None-Match": resp.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
     robots = client.get("/api/v1/robots.txt")
     assert robots.status_code == 200
     assert "Sitemap:" in robots.text
@@ -208,9 +212,18 @@ def test_admin_lists_and_audit_and_feed(test_app: Dict[str, object]) -> None:
     assert audit.json()["products"]
     assert audit.json()["content"]
 
+    sink = client.get("/api/v1/admin/dashboard/audit-sink", headers=headers)
+    assert sink.status_code == 200
+    assert "queue_depth" in sink.json()
+
     feed = client.get("/api/v1/feeds/products.json")
     assert feed.status_code == 200
     assert any(item["slug"] == data["product_slug"] for item in feed.json())
+    assert feed.headers["ETag"]
+    not_modified = client.get(
+        "/api/v1/feeds/products.json", headers={"If-Modified-Since": feed.headers["Last-Modified"]}
+    )
+    assert not_modified.status_code == 304
 
 
 def test_category_and_image_reorder(test_app: Dict[str, object]) -> None:
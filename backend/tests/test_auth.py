@@ -3,13 +3,14 @@ from typing import Callable, Dict
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.main import app
 from app.db.base import Base
 from app.db.session import get_session
 from app.models.user import User, UserRole
+from app.services import jobs as jobs_service
 
 
 @pytest.fixture
@@ -29,7 +30,7 @@ def test_app() -> Dict[str, object]:
 
     app.dependency_overrides[get_session] = override_get_session
     client = TestClient(app)
-    yield {"client": client, "session_factory": SessionLocal}
+    yield {"client": client, "session_factory": SessionLocal, "engine": engine}
     client.close()
     app.dependency_overrides.clear()
 
@@ -118,6 +119,7 @@ def test_password_reset_flow(monkeypatch: pytest.MonkeyPatch, test_app: Dict[str
 
     req = client.post("/api/v1/auth/password-reset/request", json={"email": "reset@example.com"})
     assert req.status_code == 202
+    asyncio.run(jobs_service.run_worker(test_app["session_factory"], concurrency=1, once=True))  # type: ignore[arg-type]
     assert sent["token"]
 
     confirm = client.post(
@@ -128,3 +130,93 @@ def test_password_reset_flow(monkeypatch: pytest.MonkeyPatch, test_app: Dict[str
 
     login = client.post("/api/v1/auth/login", json={"email": "reset@example.com", "password": "newsecret"})
     assert login.status_code == 200
+
+
+def test_authenticated_requests_reuse_cached_user(test_app: Dict[str, object]) -> None:
+    client: TestClient = test_app["client"]  # type: ignore[assignment]
+    engine = test_app["engine"]
+    res = client.post("/api/v1/auth/register", json={"email": "cached@example.com", "password": "supersecret"})
+    assert res.status_code == 201, res.text
+    headers = {"Authorization": f"Bearer {res.json()['tokens']['access_token']}"}
+
+    user_selects: list[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+            user_selects.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+        assert len(user_selects) == 1
+        assert client.get("/api/v1/auth/me", headers=headers).json()["email"] == "cached@example.com"
+        assert len(user_selects) == 1
+
+        # Writes through a cached (merged) instance persist and drop the entry.
+        res = client.patch("/api/v1/auth/me/language", json={"preferred_language": "ro"}, headers=headers)
+        assert res.status_code == 200, res.text
+        assert client.get("/api/v1/auth/me", headers=headers).json()["preferred_language"] == "ro"
+        assert len(user_selects) >= 2
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+def test_current_user_relationships_raise_instead_of_loading(test_app: Dict[str, object]) -> None:
+    from sqlalchemy.exc import InvalidRequestError
+    from starlette.requests import Request
+
+    from app.core import dependencies
+    from app.services import user_cache
+
+    client: TestClient = test_app["client"]  # type: ignore[assignment]
+    session_factory = test_app["session_factory"]
+    res = client.post("/api/v1/auth/register", json={"email": "raise@example.com", "password": "supersecret"})
+    assert res.status_code == 201, res.text
+
+    async def load_twice() -> None:
+        async with session_factory() as session:  # type: ignore[operator]
+            user_id = (await session.execute(select(User.id))).scalar_one()
+        user_cache.clear()
+        for _ in range(2):  # a miss (selected with raiseload) and then a cache hit (merged)
+            async with session_factory() as session:  # type: ignore[operator]
+                request = Request({"type": "http", "headers": []})
+                user = await dependencies._load_user(request, session, user_id)
+                assert user.email == "raise@example.com"
+                with pytest.raises(InvalidRequestError):
+                    user.payment_methods  # noqa: B018
+        assert user_cache.get(user_id) is not None
+
+    asyncio.run(load_twice())
+
+
+def test_avatar_reupload_drops_old_derivatives(test_app: Dict[str, object], monkeypatch, tmp_path) -> None:
+    import io
+
+    from PIL import Image
+
+    from app.core.config import settings
+    from app.services import media_cache
+
+    monkeypatch.setattr(settings, "media_root", str(tmp_path))
+    monkeypatch.setattr(settings, "image_process_workers", 0)
+    monkeypatch.setattr(media_cache, "_cache_bytes", None)
+    client: TestClient = test_app["client"]  # type: ignore[assignment]
+    res = client.post("/api/v1/auth/register", json={"email": "avatar@example.com", "password": "supersecret"})
+    headers = {"Authorization": f"Bearer {res.json()['tokens']['access_token']}"}
+
+    def upload(color: str) -> str:
+        buf = io.BytesIO()
+        Image.new("RGB", (300, 300), color).save(buf, "PNG")
+        res = client.post("/api/v1/auth/me/avatar", files={"file": ("me.png", buf.getvalue(), "image/png")}, headers=headers)
+        assert res.status_code == 200, res.text
+        return res.json()["avatar_url"].removeprefix("/media/")
+
+    path = upload("red")
+    first = client.get(f"/media/resize/{path}", params={"w": 64})
+    assert first.status_code == 200 and "immutable" not in first.headers["cache-control"]
+    assert len(media_cache._cache_files()) == 1
+
+    assert upload("blue") == path
+    assert media_cache._cache_files() == []
+    second = client.get(f"/media/resize/{path}", params={"w": 64})
+    assert second.headers["X-Media-Version"] != first.headers["X-Media-Version"]
@@ -1,7 +1,10 @@
+import asyncio
+
 from fastapi.testclient import TestClient
 
 from app.core.config import settings
 from app.main import get_application
+from app.middleware.backpressure import AdaptiveLimiter, priority_for
 
 
 def test_maintenance_mode_returns_503(monkeypatch):
@@ -20,3 +23,52 @@ def test_backpressure_zero_concurrency(monkeypatch):
     res = client.get("/api/v1/catalog/products")
     assert res.status_code == 429
     monkeypatch.setattr(settings, "max_concurrent_requests", 100)
+
+
+def test_adaptive_limiter_prioritises_queued_requests_and_sheds_on_deadline(monkeypatch):
+    monkeypatch.setattr(settings, "backpressure_max_wait_ms", 50)
+    limiter = AdaptiveLimiter(max_limit=2, min_limit=1, queue_size=2)
+    assert priority_for("POST", "/api/v1/orders") == "critical"
+    assert priority_for("GET", "/api/v1/catalog/products/export") == "bulk"
+    assert priority_for("GET", "/api/v1/catalog/products") == "normal"
+
+    async def run():
+        # normal may fill 90% of 2 slots -> 1; critical gets the second one
+        assert await limiter.acquire("normal")
+        assert not await limiter.acquire("bulk")  # over its share and only waits 10ms
+        assert await limiter.acquire("critical")
+
+        normal = asyncio.create_task(limiter.acquire("normal"))
+        critical = asyncio.create_task(limiter.acquire("critical"))
+        await asyncio.sleep(0)
+        assert limiter.stats()["queued"] == {"critical": 1, "normal": 1, "bulk": 0}
+        assert not await limiter.acquire("normal")  # queue is full
+        assert limiter.retry_after() >= 1
+
+        limiter.release("normal", 0.01)
+        assert await critical  # freed slot goes to the higher class first
+        assert not await normal  # still no room for normal before its deadline
+        limiter.release("critical", 0.01)
+        limiter.release("critical", 0.01)
+        return limiter.stats()
+
+    stats = asyncio.run(run())
+    assert stats["in_flight"] == 0
+    assert stats["admitted"] == {"critical": 2, "normal": 1, "bulk": 0}
+    assert stats["shed"] == {"critical": 0, "normal": 2, "bulk": 1}
+
+
+def test_adaptive_limit_follows_latency():
+    limiter = AdaptiveLimiter(max_limit=40, min_limit=4)
+    limiter.in_flight = 40
+    for _ in range(50):
+        limiter._observe(0.01)
+    assert limiter.limit == 40
+    for _ in range(100):
+        limiter._observe(0.2)
+    assert limiter.limit < 15
+    low = limiter.limit
+    limiter.in_flight = int(low)
+    for _ in range(400):
+        limiter._observe(0.01)
+    assert limiter.limit > low
@@ -0,0 +1,24 @@
+import asyncio
+
+from app.core.cache import MemoryCache
+
+
+def test_memory_cache_lru_ttl_and_generations(monkeypatch):
+    async def run():
+        cache = MemoryCache(max_entries=2)
+        await cache.set("a", b"1", ttl_seconds=60)
+        await cache.set("b", b"2", ttl_seconds=60)
+        assert await cache.get("a") == b"1"  # refreshes "a"
+        await cache.set("c", b"3", ttl_seconds=60)
+        assert await cache.get("b") is None  # least recently used evicted
+        assert await cache.get("a") == b"1"
+
+        await cache.set("short", b"x", ttl_seconds=0)
+        assert await cache.get("short") is None
+
+        assert await cache.generation("catalog") == 0
+        await cache.bump_generation("catalog")
+        assert await cache.generation("catalog") == 1
+        assert await cache.generation("other") == 0
+
+    asyncio.run(run())
@@ -4,11 +4,14 @@ from uuid import UUID
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from app.core.config import settings
 from app.main import app
 from app.db.base import Base
 from app.db.session import get_session
+from app.models.cart import Cart
 from app.models.catalog import Category, Product, ProductImage
 from app.services.auth import create_user
 from app.schemas.user import UserCreate
@@ -139,6 +142,163 @@ def test_guest_cart_and_merge(test_app: Dict[str, object]) -> None:
     assert merge_res.json()["items"][0]["quantity"] == 1
 
 
+def test_get_cart_query_count_does_not_grow_with_items(test_app: Dict[str, object], monkeypatch) -> None:
+    client: TestClient = test_app["client"]  # type: ignore[assignment]
+    SessionLocal = test_app["session_factory"]  # type: ignore[assignment]
+    monkeypatch.setattr(settings, "db_query_debug_header", True)
+    token, _ = create_user_token(SessionLocal, email="hydrate@example.com")
+
+    async def seed_many() -> list[UUID]:
+        async with SessionLocal() as session:
+            category = Category(slug="many", name="Many")
+            products = [
+                Product(
+                    category=category,
+                    slug=f"many-{n}",
+                    name=f"Many {n}",
+                    base_price=n + 1,
+                    currency="USD",
+                    stock_quantity=10,
+                    images=[
+                        ProductImage(url=f"/media/{n}-b.png", sort_order=1),
+                        ProductImage(url=f"/media/{n}-a.png", sort_order=0),
+                    ],
+                )
+                for n in range(4)
+            ]
+            session.add_all(products)
+            await session.commit()
+            return [product.id for product in products]
+
+    queries = []
+    for product_id in asyncio.run(seed_many()):
+        client.post("/api/v1/cart/items", json={"product_id": str(product_id), "quantity": 1}, headers=auth_headers(token))
+        res = client.get("/api/v1/cart", headers=auth_headers(token))
+        assert res.status_code == 200
+        queries.append(int(res.headers["X-DB-Queries"]))
+
+    body = res.json()
+    assert sorted(item["image_url"] for item in body["items"]) == [f"/media/{n}-a.png" for n in range(4)]
+    assert body["totals"]["subtotal"] == "10.00"
+    assert queries == [1, 1, 1, 1]
+
+
+def test_cart_sync_and_merge_are_set_based(test_app: Dict[str, object], monkeypatch) -> None:
+    client: TestClient = test_app["client"]  # type: ignore[assignment]
+    SessionLocal = test_app["session_factory"]  # type: ignore[assignment]
+    monkeypatch.setattr(settings, "db_query_debug_header", True)
+    token, _ = create_user_token(SessionLocal, email="sync-set@example.com")
+
+    async def seed_many() -> list[str]:
+        async with SessionLocal() as session:
+            category = Category(slug="set", name="Set")
+            products = [
+                Product(category=category, slug=f"set-{n}", name=f"Set {n}", base_price=2, currency="USD", stock_quantity=9)
+                for n in range(6)
+            ]
+            session.add_all(products)
+            await session.commit()
+            return [str(product.id) for product in products]
+
+    ids = asyncio.run(seed_many())
+    headers = auth_headers(token)
+
+    def sync(product_ids: list[str], quantity: int = 1) -> tuple[dict, int]:
+        res = client.post(
+            "/api/v1/cart/sync",
+            json={"items": [{"product_id": pid, "quantity": quantity} for pid in product_ids]},
+            headers=headers,
+        )
+        assert res.status_code == 200, res.text
+        return res.json(), int(res.headers["X-DB-Queries"])
+
+    sync(ids[:1])
+    _, small = sync(ids[:2], quantity=2)
+    _, large = sync(ids[:5], quantity=3)
+    assert large == small
+    body, _ = sync(ids[1:6], quantity=3)
+    assert sorted(item["product_id"] for item in body["items"]) == sorted(ids[1:6])
+    assert {item["quantity"] for item in body["items"]} == {3}
+
+    res = client.post(
+        "/api/v1/cart/sync", json={"items": [{"product_id": ids[0], "quantity": 99}]}, headers=headers
+    )
+    assert res.status_code == 400
+    assert len(client.get("/api/v1/cart", headers=headers).json()["items"]) == 5
+
+    guest = {"X-Session-Id": "guest-set-merge"}
+    for pid in ids[:3]:
+        client.post("/api/v1/cart/items", json={"product_id": pid, "quantity": 1}, headers=guest)
+    merged = client.post("/api/v1/cart/merge", headers={**headers, **guest})
+    assert merged.status_code == 200
+    quantities = {item["product_id"]: item["quantity"] for item in merged.json()["items"]}
+    assert quantities == {ids[0]: 1, ids[1]: 4, ids[2]: 4, ids[3]: 3, ids[4]: 3, ids[5]: 3}
+
+    # The token-backed guest cart validates a sync in one pass as well.
+    monkeypatch.setattr(settings, "cart_guest_storage", "token")
+    cart_token = client.get("/api/v1/cart").headers["X-Cart-Token"]
+
+    def token_sync(product_ids: list[str]) -> int:
+        res = client.post(
+            "/api/v1/cart/sync",
+            json={"items": [{"product_id": pid, "quantity": 1} for pid in product_ids]},
+            headers={"X-Cart-Token": cart_token},
+        )
+        assert res.status_code == 200, res.text
+        assert len(res.json()["items"]) == len(product_ids)
+        return int(res.headers["X-DB-Queries"])
+
+    assert token_sync(ids[:1]) == token_sync(ids[:5])
+
+
+def test_token_guest_cart_creates_no_rows_until_merge(test_app: Dict[str, object], monkeypatch) -> None:
+    client: TestClient = test_app["client"]  # type: ignore[assignment]
+    SessionLocal = test_app["session_factory"]  # type: ignore[assignment]
+    monkeypatch.setattr(settings, "cart_guest_storage", "token")
+
+    token, user_id = create_user_token(SessionLocal, email="tokencart@example.com")
+    product_id = seed_product(SessionLocal)
+
+    res = client.get("/api/v1/cart")
+    assert res.status_code == 200 and res.json()["items"] == []
+    cart_token = res.headers["X-Cart-Token"]
+
+    res = client.post(
+        "/api/v1/cart/items", json={"product_id": str(product_id), "quantity": 1}, headers={"X-Cart-Token": cart_token}
+    )
+    assert res.status_code == 201
+    cart_token = res.headers["X-Cart-Token"]
+    res = client.post(
+        "/api/v1/cart/items", json={"product_id": str(product_id), "quantity": 1}, headers={"X-Cart-Token": cart_token}
+    )
+    cart_token = res.headers["X-Cart-Token"]
+    item_id = res.json()["id"]
+    assert res.json()["quantity"] == 2
+
+    too_many = client.patch(f"/api/v1/cart/items/{item_id}", json={"quantity": 9}, headers={"X-Cart-Token": cart_token})
+    assert too_many.status_code == 400
+
+    res = client.get("/api/v1/cart", headers={"X-Cart-Token": cart_token})
+    body = res.json()
+    assert [item["id"] for item in body["items"]] == [item_id]
+    assert body["items"][0]["unit_price_at_add"] == "10.00" and body["totals"]["subtotal"] == "20.00"
+
+    # A token edited on the client is ignored rather than trusted.
+    forged = client.get("/api/v1/cart", headers={"X-Cart-Token": cart_token[:-2] + "AA"})
+    assert forged.json()["items"] == []
+
+    async def cart_rows() -> int:
+        async with SessionLocal() as session:
+            return len((await session.execute(select(Cart))).scalars().all())
+
+    assert asyncio.run(cart_rows()) == 0
+
+    merged = client.post("/api/v1/cart/merge", headers={**auth_headers(token), "X-Cart-Token": cart_token})
+    assert merged.status_code == 200
+    assert [(item["product_id"], item["quantity"]) for item in merged.json()["items"]] == [(str(product_id), 2)]
+    assert asyncio.run(cart_rows()) == 1
+
+
 def test_max_quantity_promo_and_abandoned_job(test_app: Dict[str, object]) -> None:
     client: TestClient = test_app["client"]  # type: ignore[assignment]
     SessionLocal = test_app["session_factory"]  # type: ignore[assignment]
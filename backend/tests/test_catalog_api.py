@@ -1,4 +1,5 @@
 import asyncio
+import csv
 import io
 from typing import Dict
 
@@ -545,3 +546,380 @@ def test_featured_collections_feed_and_audit(test_app: Dict[str, object]) -> Non
 
     count = asyncio.run(audit_count())
     assert count >= 1
+
+
+def test_product_list_cursor_pagination(test_app: Dict[str, object]) -> None:
+    client: TestClient = test_app["client"]  # type: ignore[assignment]
+    SessionLocal = test_app["session_factory"]  # type: ignore[assignment]
+    admin_token = create_admin_token(SessionLocal, email="cursoradmin@example.com")
+
+    res = client.post(
+        "/api/v1/catalog/categories",
+        json={"slug": "cursor-cat", "name": "Cursor"},
+        headers=auth_headers(admin_token),
+    )
+    category_id = res.json()["id"]
+    # duplicate prices and names force the Product.id tiebreaker
+    for idx, (name, price) in enumerate([("Bowl", 10), ("Mug", 10), ("Mug", 15), ("Vase", 5), ("Bowl", 20)]):
+        resp = client.post(
+            "/api/v1/catalog/products",
+            json={
+                "category_id": category_id,
+                "slug": f"cursor-{idx}",
+                "name": name,
+                "base_price": price,
+                "currency": "USD",
+                "stock_quantity": 1,
+            },
+            headers=auth_headers(admin_token),
+        )
+        assert resp.status_code == 201, resp.text
+
+    for sort in ["newest", "price_asc", "price_desc", "name_asc", "name_desc"]:
+        full = client.get("/api/v1/catalog/products", params={"sort": sort, "limit": 100}).json()
+        assert full["meta"]["next_cursor"] is None
+        expected = [p["slug"] for p in full["items"]]
+
+        seen: list[str] = []
+        params: dict[str, object] = {"sort": sort, "limit": 2, "include_total": False}
+        while True:
+            page = client.get("/api/v1/catalog/products", params=params)
+            assert page.status_code == 200, page.text
+            body = page.json()
+            assert body["meta"]["total_items"] is None
+            seen.extend(p["slug"] for p in body["items"])
+            if not body["meta"]["next_cursor"]:
+                break
+            params["cursor"] = body["meta"]["next_cursor"]
+        assert seen == expected
+
+    # Products carrying two of the filtered tags still count once towards a page.
+    for idx, tags in enumerate([["red", "blue"], ["red", "blue"], ["red"], ["blue", "red"], ["green"]]):
+        resp = client.post(
+            "/api/v1/catalog/products",
+            json={
+                "category_id": category_id,
+                "slug": f"tagged-{idx}",
+                "name": f"Tagged {idx}",
+                "base_price": 7,
+                "currency": "USD",
+                "stock_quantity": 1,
+                "tags": tags,
+            },
+            headers=auth_headers(admin_token),
+        )
+        assert resp.status_code == 201, resp.text
+    seen = []
+    params = {"sort": "newest", "limit": 2, "tags": ["red", "blue"]}
+    while True:
+        body = client.get("/api/v1/catalog/products", params=params).json()
+        assert len(body["items"]) == 2 or not body["meta"]["next_cursor"]
+        seen.extend(p["slug"] for p in body["items"])
+        if not body["meta"]["next_cursor"]:
+            break
+        params["cursor"] = body["meta"]["next_cursor"]
+    assert sorted(seen) == ["tagged-0", "tagged-1", "tagged-2", "tagged-3"]
+    total = client.get("/api/v1/catalog/products", params={"tags": ["red", "blue"]}).json()["meta"]["total_items"]
+    assert total == 4
+
+    first = client.get("/api/v1/catalog/products", params={"sort": "price_asc", "limit": 2}).json()
+    mismatched = client.get(
+        "/api/v1/catalog/products", params={"sort": "name_asc", "cursor": first["meta"]["next_cursor"]}
+    )
+    assert mismatched.status_code == 400
+    assert client.get("/api/v1/catalog/products", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_product_search_ranking_translations_and_prefix(test_app: Dict[str, object]) -> None:
+    client: TestClient = test_app["client"]  # type: ignore[assignment]
+    SessionLocal = test_app["session_factory"]  # type: ignore[assignment]
+    admin_token = create_admin_token(SessionLocal, email="searchadmin@example.com")
+
+    res = client.post(
+        "/api/v1/catalog/categories",
+        json={"slug": "search-cat", "name": "Ceramics"},
+        headers=auth_headers(admin_token),
+    )
+    category_id = res.json()["id"]
+    products = [
+        ("glazed-bowl", "Glazed Bowl", "Hand thrown", ["stoneware"]),
+        ("plain-plate", "Plain Plate", "Pairs well with a glazed bowl", []),
+        ("tall-vase", "Tall Vase", "Matte finish", ["glazed-look"]),
+    ]
+    for slug, name, short, tags in products:
+        resp = client.post(
+            "/api/v1/catalog/products",
+            json={
+                "category_id": category_id,
+                "slug": slug,
+                "name": name,
+                "short_description": short,
+                "base_price": 10,
+                "currency": "USD",
+                "stock_quantity": 1,
+                "tags": tags,
+            },
+            headers=auth_headers(admin_token),
+        )
+        assert resp.status_code == 201, resp.text
+
+    # title matches outrank description/tag matches; prefixes match
+    res = client.get("/api/v1/catalog/products", params={"search": "glaz"})
+    slugs = [p["slug"] for p in res.json()["items"]]
+    assert slugs[0] == "glazed-bowl"
+    assert set(slugs) == {"glazed-bowl", "plain-plate", "tall-vase"}
+
+    res = client.get("/api/v1/catalog/products", params={"search": "ceramics stoneware"})
+    assert [p["slug"] for p in res.json()["items"]] == ["glazed-bowl"]
+
+    async def add_translation():
+        from app.services import search as search_service
+
+        async with SessionLocal() as session:
+            product = (await session.execute(select(Product).where(Product.slug == "tall-vase"))).scalar_one()
+            session.add(ProductTranslation(product_id=product.id, lang="ro", name="Vază Înaltă"))
+            await session.flush()
+            await search_service.reindex_products(session, [product.id])
+            await session.commit()
+
+    asyncio.run(add_translation())
+
+    # diacritics are folded and translated documents are only searched for their language
+    res = client.get("/api/v1/catalog/products", params={"search": "vaza inalta", "lang": "ro"})
+    assert [p["slug"] for p in res.json()["items"]] == ["tall-vase"]
+    res = client.get("/api/v1/catalog/products", params={"search": "inalta"})
+    assert res.json()["items"] == []
+
+    # rename reindexes the product
+    client.patch(
+        "/api/v1/catalog/products/plain-plate", json={"name": "Dinner Plate"}, headers=auth_headers(admin_token)
+    )
+    res = client.get("/api/v1/catalog/products", params={"search": "dinner"})
+    assert [p["slug"] for p in res.json()["items"]] == ["plain-plate"]
+
+    # renaming the category reindexes its products
+    res = client.patch(
+        "/api/v1/catalog/categories/search-cat", json={"name": "Porcelain"}, headers=auth_headers(admin_token)
+    )
+    assert res.status_code == 200
+    res = client.get("/api/v1/catalog/products", params={"search": "porcelain"})
+    assert {p["slug"] for p in res.json()["items"]} == {"glazed-bowl", "plain-plate", "tall-vase"}
+    assert client.get("/api/v1/catalog/products", params={"search": "ceramics"}).json()["items"] == []
+
+
+def test_anonymous_catalog_reads_are_cached_and_invalidated(test_app: Dict[str, object]) -> None:
+    client: TestClient = test_app["client"]  # type: ignore[assignment]
+    SessionLocal = test_app["session_factory"]  # type: ignore[assignment]
+    admin_token = create_admin_token(SessionLocal, email="cacheadmin@example.com")
+
+    res = client.post(
+        "/api/v1/catalog/categories",
+        json={"slug": "cache-cat", "name": "Cache"},
+        headers=auth_headers(admin_token),
+    )
+    category_id = res.json()["id"]
+    client.post(
+        "/api/v1/catalog/products",
+        json={
+            "category_id": category_id,
+            "slug": "cached-mug",
+            "name": "Cached Mug",
+            "base_price": 9,
+            "currency": "USD",
+            "stock_quantity": 1,
+            "status": "published",
+        },
+        headers=auth_headers(admin_token),
+    )
+
+    first = client.get("/api/v1/catalog/products", params={"sort": "newest", "lang": "en"})
+    assert first.headers["X-Cache"] == "MISS"
+    # parameter order does not change the cache key
+    second = client.get("/api/v1/catalog/products", params={"lang": "en", "sort": "newest"})
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+
+    detail = client.get("/api/v1/catalog/products/cached-mug")
+    assert detail.headers["X-Cache"] == "MISS"
+    revalidated = client.get("/api/v1/catalog/products/cached-mug", headers={"If-None-Match": detail.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert client.get("/api/v1/catalog/products/cached-mug").headers["X-Cache"] == "HIT"
+    # tracked views still hit the database
+    tracked = client.get("/api/v1/catalog/products/cached-mug", params={"session_id": "cache-sess"})
+    assert "X-Cache" not in tracked.headers
+
+    res = client.patch(
+        "/api/v1/catalog/products/cached-mug", json={"name": "Renamed Mug"}, headers=auth_headers(admin_token)
+    )
+    assert res.status_code == 200
+    after = client.get("/api/v1/catalog/products", params={"sort": "newest", "lang": "en"})
+    assert after.headers["X-Cache"] == "MISS"
+    assert after.json()["items"][0]["name"] == "Renamed Mug"
+    assert client.get("/api/v1/catalog/products/cached-mug").json()["name"] == "Renamed Mug"
+
+    client.post(
+        "/api/v1/catalog/categories",
+        json={"slug": "cache-empty", "name": "Empty"},
+        headers=auth_headers(admin_token),
+    )
+    assert client.get("/api/v1/catalog/categories").headers["X-Cache"] == "MISS"
+    assert client.get("/api/v1/catalog/categories").headers["X-Cache"] == "HIT"
+    res = client.delete("/api/v1/catalog/categories/cache-empty", headers=auth_headers(admin_token))
+    assert res.status_code == 200
+    categories = client.get("/api/v1/catalog/categories")
+    assert categories.headers["X-Cache"] == "MISS"
+    assert [c["slug"] for c in categories.json()] == ["cache-cat"]
+
+
+def test_csv_exports_stream_in_batches(test_app: Dict[str, object], monkeypatch) -> None:
+    from app.services import exporter as exporter_service
+
+    monkeypatch.setattr(exporter_service, "EXPORT_BATCH_SIZE", 2)
+    client: TestClient = test_app["client"]  # type: ignore[assignment]
+    SessionLocal = test_app["session_factory"]  # type: ignore[assignment]
+    admin_token = create_admin_token(SessionLocal, email="exportadmin@example.com")
+
+    res = client.post(
+        "/api/v1/catalog/categories",
+        json={"slug": "export-cat", "name": "Export"},
+        headers=auth_headers(admin_token),
+    )
+    category_id = res.json()["id"]
+    for idx in range(5):
+        resp = client.post(
+            "/api/v1/catalog/products",
+            json={
+                "category_id": category_id,
+                "slug": f"export-{idx}",
+                "name": f"Export {idx}",
+                "short_description": "Plain",
+                "base_price": 10 + idx,
+                "currency": "USD",
+                "stock_quantity": 1,
+                "status": "published",
+                "tags": ["clay", f"tag-{idx}"],
+            },
+            headers=auth_headers(admin_token),
+        )
+        assert resp.status_code == 201, resp.text
+
+    async def add_translation():
+        async with SessionLocal() as session:
+            product = (await session.execute(select(Product).where(Product.slug == "export-3"))).scalar_one()
+            session.add(ProductTranslation(product_id=product.id, lang="ro", name="Export RO", short_description="Simplu"))
+            await session.commit()
+
+    asyncio.run(add_translation())
+
+    async def collect_export_chunks():
+        from app.services import catalog as catalog_service
+
+        async with SessionLocal() as session:
+            return [chunk async for chunk in catalog_service.iter_products_csv(session)]
+
+    # header chunk plus one chunk per batch of two rows
+    assert len(asyncio.run(collect_export_chunks())) == 4
+
+    res = client.get("/api/v1/catalog/products/export", headers=auth_headers(admin_token))
+    assert res.status_code == 200
+    assert res.headers["content-disposition"] == 'attachment; filename="products.csv"'
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    exported = {row["slug"]: row for row in rows}
+    assert set(exported) == {f"export-{idx}" for idx in range(5)}
+    assert sorted(exported["export-4"]["tags"].split(",")) == ["clay", "tag-4"]
+    assert exported["export-4"]["category_slug"] == "export-cat"
+
+    res = client.get("/api/v1/catalog/products/feed.csv", params={"lang": "ro"})
+    assert res.status_code == 200
+    feed = {row["slug"]: row for row in csv.DictReader(io.StringIO(res.text))}
+    assert set(feed) == {f"export-{idx}" for idx in range(5)}
+    assert feed["export-3"]["name"] == "Export RO"
+    assert feed["export-3"]["description"] == "Simplu"
+    assert feed["export-1"]["description"] == "Plain"
+
+    # soft-deleted products stay out of the export, so re-importing it cannot bring them back
+    assert client.delete("/api/v1/catalog/products/export-2", headers=auth_headers(admin_token)).status_code == 204
+    res = client.get("/api/v1/catalog/products/export", headers=auth_headers(admin_token))
+    assert {row["slug"] for row in csv.DictReader(io.StringIO(res.text))} == {"export-0", "export-1", "export-3", "export-4"}
+
+
+def test_bulk_csv_import_creates_updates_and_validates(test_app: Dict[str, object]) -> None:
+    client: TestClient = test_app["client"]  # type: ignore[assignment]
+    SessionLocal = test_app["session_factory"]  # type: ignore[assignment]
+    admin_token = create_admin_token(SessionLocal, email="importadmin@example.com")
+
+    res = client.post(
+        "/api/v1/catalog/categories",
+        json={"slug": "import-cat", "name": "Import"},
+        headers=auth_headers(admin_token),
+    )
+    category_id = res.json()["id"]
+    res = client.post(
+        "/api/v1/catalog/products",
+        json={
+            "category_id": category_id,
+            "slug": "existing-mug",
+            "name": "Mug",
+            "base_price": 5,
+            "currency": "USD",
+            "stock_quantity": 1,
+            "tags": ["old-tag"],
+        },
+        headers=auth_headers(admin_token),
+    )
+    assert res.status_code == 201, res.text
+    client.patch("/api/v1/catalog/products/existing-mug", json={"slug": "renamed-mug"}, headers=auth_headers(admin_token))
+
+    header = "slug,name,category_slug,base_price,currency,stock_quantity,status,is_featured,is_active,short_description,long_description,tags\n"
+
+    def upload(body: str, dry_run: bool):
+        return client.post(
+            "/api/v1/catalog/products/import",
+            params={"dry_run": dry_run},
+            files={"file": ("products.csv", io.BytesIO((header + body).encode("utf-8")), "text/csv")},
+            headers=auth_headers(admin_token),
+        )
+
+    invalid = upload(
+        "existing-mug,Reused,import-cat,5,USD,1,draft,false,true,,,\n"
+        "bad-price,Bad,import-cat,abc,USD,1,draft,false,true,,,\n"
+        "bad-currency,Bad,import-cat,5,USDX,1,draft,false,true,,,\n"
+        "ok-row,Fine,import-cat,5,usd,1,draft,false,true,,,\n",
+        dry_run=False,
+    )
+    assert invalid.status_code == 200
+    errors = invalid.json()["errors"]
+    assert len(errors) == 3
+    assert any("Row 2" in err and "history" in err for err in errors)
+    assert any(err.startswith("Row 3: invalid base_price") for err in errors)
+    assert any(err.startswith("Row 4: invalid currency") for err in errors)
+    assert client.get("/api/v1/catalog/products/ok-row").status_code == 404
+
+    rows = (
+        "renamed-mug,Big Mug,import-cat,12.5,usd,7,published,true,true,Updated,,\"clay,blue\"\n"
+        "new-bowl,Bowl,new-cat,20,EUR,3,draft,false,true,,Long text,clay\n"
+        "new-bowl,Bowl v2,new-cat,21,EUR,4,published,false,true,,,\n"
+    )
+    preview = upload(rows, dry_run=True)
+    assert preview.json()["errors"] == ["Row 3: category new-cat not found", "Row 4: category new-cat not found"]
+
+    applied = upload(rows, dry_run=False)
+    assert applied.status_code == 200, applied.text
+    body = applied.json()
+    assert body["errors"] == []
+    assert (body["created"], body["updated"]) == (1, 2)
+    assert body["stats"]["rows"] == 3
+
+    mug = client.get("/api/v1/catalog/products/renamed-mug").json()
+    assert mug["name"] == "Big Mug"
+    assert float(mug["base_price"]) == 12.5
+    assert mug["currency"] == "USD"
+    assert mug["status"] == "published"
+    assert sorted(tag["slug"] for tag in mug["tags"]) == ["blue", "clay"]
+    bowl = client.get("/api/v1/catalog/products/new-bowl").json()
+    assert bowl["name"] == "Bowl v2"
+    assert bowl["stock_quantity"] == 4
+    assert bowl["tags"] == []
+    assert bowl["sku"]
+    res = client.get("/api/v1/catalog/products", params={"search": "bowl"})
+    assert [p["slug"] for p in res.json()["items"]] == ["new-bowl"]
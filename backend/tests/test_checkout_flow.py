@@ -17,6 +17,7 @@ from app.services import cart as cart_service
 from app.services import order as order_service
 from app.services import payments
 from app.services import email as email_service
+from app.services import jobs as jobs_service
 from app.schemas.order import ShippingMethodCreate
 from app.schemas.promo import PromoCodeCreate
 
@@ -115,6 +116,7 @@ def test_guest_checkout_promo_and_shipping(checkout_app: Dict[str, object], monk
     assert "order_id" in body
     # Subtotal: 2 * 50 = 100; discount 10% => 10; taxable 90; tax 9; shipping 10 => total 109 => cents 10900
     assert captured.get("amount_cents") == 10900
+    asyncio.run(jobs_service.run_worker(SessionLocal, concurrency=1, once=True))
     assert captured.get("reset_email") == "guest@example.com"
 
     # Verify order totals stored in DB
@@ -128,3 +130,61 @@ def test_guest_checkout_promo_and_shipping(checkout_app: Dict[str, object], monk
     assert float(order.total_amount) == pytest.approx(109.0)
     assert order.stripe_payment_intent_id == "pi_test"
     assert captured.get("reset_token")
+
+
+def test_token_guest_checkout_returns_an_empty_cart_token(
+    checkout_app: Dict[str, object], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from app.core.config import settings
+
+    client: TestClient = checkout_app["client"]  # type: ignore[assignment]
+    SessionLocal = checkout_app["session_factory"]  # type: ignore[assignment]
+    monkeypatch.setattr(settings, "cart_guest_storage", "token")
+
+    async def seed():
+        async with SessionLocal() as session:
+            product = Product(
+                category=Category(slug="token-checkout", name="Token"),
+                slug="token-prod",
+                name="Token Product",
+                base_price=Decimal("20.00"),
+                currency="USD",
+                stock_quantity=10,
+            )
+            session.add(product)
+            await session.commit()
+            return product.id
+
+    product_id = asyncio.run(seed())
+
+    async def fake_create_payment_intent(session, cart, amount_cents=None):
+        return {"client_secret": "secret_token", "intent_id": "pi_token"}
+
+    monkeypatch.setattr(payments, "create_payment_intent", fake_create_payment_intent)
+
+    cart_token = client.get("/api/v1/cart").headers["X-Cart-Token"]
+    res = client.post(
+        "/api/v1/cart/items", json={"product_id": str(product_id), "quantity": 2}, headers={"X-Cart-Token": cart_token}
+    )
+    cart_token = res.headers["X-Cart-Token"]
+    payload = {
+        "name": "Token Guest",
+        "email": "token-guest@example.com",
+        "password": None,
+        "create_account": False,
+        "line1": "1 Token St",
+        "city": "Testville",
+        "postal_code": "12345",
+        "country": "US",
+    }
+    res = client.post("/api/v1/orders/guest-checkout", json=payload, headers={"X-Cart-Token": cart_token})
+    assert res.status_code == 201, res.text
+    emptied = res.headers["X-Cart-Token"]
+    assert client.get("/api/v1/cart", headers={"X-Cart-Token": emptied}).json()["items"] == []
+
+    again = client.post(
+        "/api/v1/orders/guest-checkout",
+        json={**payload, "email": "token-guest2@example.com"},
+        headers={"X-Cart-Token": emptied},
+    )
+    assert again.status_code == 400 and again.json()["detail"] == "Cart is empty"
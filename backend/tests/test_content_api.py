@@ -138,3 +138,35 @@ def test_content_crud_and_public(test_app: Dict[str, object]) -> None:
     ro_public = client.get("/api/v1/content/home.hero?lang=ro")
     assert ro_public.status_code == 200
     assert ro_public.json()["title"] == "Erou"
+
+
+def test_public_content_conditional_get(test_app: Dict[str, object]) -> None:
+    client: TestClient = test_app["client"]  # type: ignore[assignment]
+    SessionLocal = test_app["session_factory"]  # type: ignore[assignment]
+    admin_token = create_admin_token(SessionLocal)
+
+    client.post(
+        "/api/v1/content/admin/page.care",
+        json={"title": "Care", "body_markdown": "Hand wash", "status": "published"},
+        headers=auth_headers(admin_token),
+    )
+    first = client.get("/api/v1/content/pages/care")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"].startswith("public")
+    assert first.headers["Last-Modified"]
+
+    cached = client.get("/api/v1/content/pages/care", headers={"If-None-Match": f'"other", {etag}'})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert client.get("/api/v1/content/pages/care", headers={"If-None-Match": "*"}).status_code == 304
+
+    client.patch(
+        "/api/v1/content/admin/page.care",
+        json={"body_markdown": "Dishwasher safe"},
+        headers=auth_headers(admin_token),
+    )
+    changed = client.get("/api/v1/content/pages/care", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["body_markdown"] == "Dishwasher safe"
+    assert changed.headers["ETag"] != etag
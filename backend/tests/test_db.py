@@ -2,6 +2,7 @@ import pytest
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from app.db import session as db_session
 from app.db.base import Base
 from app.models.user import User, UserRole
 from app.models.catalog import Category, Product, ProductImage, ProductVariant
@@ -128,3 +129,30 @@ async def test_order_models_sqlite_memory() -> None:
         result = await session.execute(select(OrderItem).where(OrderItem.order == order))
         fetched = result.scalar_one()
         assert fetched.subtotal == 15
+
+
+def test_engine_options_follow_pool_settings(monkeypatch) -> None:
+    monkeypatch.setattr(db_session.settings, "db_pool_size", 7)
+    monkeypatch.setattr(db_session.settings, "db_statement_cache_size", 0)
+    monkeypatch.setattr(db_session.settings, "db_statement_timeout_ms", 2500)
+    options = db_session.engine_options("postgresql+asyncpg://u:p@db/app")
+    assert options["poolclass"] is db_session.TimedQueuePool
+    assert options["pool_size"] == 7
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert options["connect_args"]["prepared_statement_cache_size"] == 0
+    assert options["connect_args"]["server_settings"] == {"statement_timeout": "2500"}
+    assert "poolclass" not in db_session.engine_options("sqlite+aiosqlite:///:memory:")
+
+
+@pytest.mark.anyio("asyncio")
+async def test_warm_pool_opens_minimum_connections(tmp_path) -> None:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=db_session.TimedQueuePool, pool_size=3
+    )
+    assert await db_session.warm_pool(engine) == 3
+    stats = db_session.pool_stats(engine)
+    assert (stats["size"], stats["idle"], stats["checked_out"]) == (3, 3, 0)
+    assert stats["checkout_waits"] == 3
+    async with engine.connect():
+        assert db_session.pool_stats(engine)["checked_out"] == 1
+    await engine.dispose()
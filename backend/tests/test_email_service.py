@@ -1,5 +1,6 @@
 import asyncio
-import time
+import socketserver
+import threading
 
 from app.services import email as email_service
 
@@ -7,14 +8,78 @@ from app.services import email as email_service
 def test_email_rate_limit(monkeypatch):
     monkeypatch.setattr(email_service.settings, "email_rate_limit_per_minute", 1)
     monkeypatch.setattr(email_service.settings, "email_rate_limit_per_recipient_per_minute", 1)
-    email_service._rate_global.clear()
-    email_service._rate_per_recipient.clear()
-    now = time.time()
-    assert email_service._allow_send(now, "a@example.com") is True
-    email_service._record_send(now, "a@example.com")
-    assert email_service._allow_send(now, "a@example.com") is False
+    assert asyncio.run(email_service._rate_limit_wait("a@example.com")) == 0
+    assert asyncio.run(email_service._rate_limit_wait("a@example.com")) > 0
+    assert asyncio.run(email_service._rate_limit_wait("b@example.com")) > 0  # global allowance spent
+
+
+def test_global_rate_limit_does_not_spend_recipient_allowance(monkeypatch):
+    monkeypatch.setattr(email_service.settings, "email_rate_limit_per_minute", 1)
+    monkeypatch.setattr(email_service.settings, "email_rate_limit_per_recipient_per_minute", 1)
+    assert asyncio.run(email_service._rate_limit_wait("a@example.com")) == 0
+    assert asyncio.run(email_service._rate_limit_wait("b@example.com")) > 0
+    monkeypatch.setattr(email_service.settings, "email_rate_limit_per_minute", 0)
+    # b was turned away by the global limit, so its own allowance is untouched.
+    assert asyncio.run(email_service._rate_limit_wait("b@example.com")) == 0
 
 
 def test_email_preview():
     preview = asyncio.run(email_service.preview_email("cart_abandonment.txt.j2", {}))
     assert "text" in preview and "html" in preview
+
+
+class _DebugSMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.connections += 1  # type: ignore[attr-defined]
+        self.wfile.write(b"220 localhost debug smtp\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.wfile.write(b"250 localhost\r\n")
+            elif command == "DATA":
+                self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                body = b""
+                while not body.endswith(b"\r\n.\r\n"):
+                    body += self.rfile.readline()
+                self.server.messages.append(body)  # type: ignore[attr-defined]
+                self.wfile.write(b"250 OK\r\n")
+            elif command == "QUIT":
+                self.wfile.write(b"221 Bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 OK\r\n")
+
+
+def test_smtp_pool_reuses_connection_for_batches(monkeypatch):
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _DebugSMTPHandler)
+    server.daemon_threads = True
+    server.connections = 0  # type: ignore[attr-defined]
+    server.messages = []  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setattr(email_service.settings, "smtp_enabled", True)
+    monkeypatch.setattr(email_service.settings, "smtp_host", "127.0.0.1")
+    monkeypatch.setattr(email_service.settings, "smtp_port", server.server_address[1])
+    monkeypatch.setattr(email_service.settings, "email_rate_limit_per_minute", 100)
+    monkeypatch.setattr(email_service.settings, "email_rate_limit_per_recipient_per_minute", 1)
+    email_service.close_pool()
+    try:
+        failed = asyncio.run(email_service.send_back_in_stock_batch(["a@example.com", "b@example.com"], "Vase"))
+        assert failed == []
+        assert asyncio.run(email_service.send_email("c@example.com", "Hi", "Body")) is True
+        assert len(server.messages) == 3  # type: ignore[attr-defined]
+        assert server.connections == 1  # type: ignore[attr-defined]
+
+        # per-recipient limit applies inside a batch too
+        failed = asyncio.run(email_service.send_cart_abandonment_batch(["d@example.com", "d@example.com"]))
+        assert failed == ["d@example.com"]
+        assert len(server.messages) == 4  # type: ignore[attr-defined]
+    finally:
+        email_service.close_pool()
+        server.shutdown()
+        server.server_close()
+
+    assert asyncio.run(email_service.send_email("e@example.com", "Hi", "Body")) is False
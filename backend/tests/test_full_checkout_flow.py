@@ -15,6 +15,7 @@ from app.models.order import Order
 from app.schemas.order import ShippingMethodCreate
 from app.services import payments
 from app.services import email as email_service
+from app.services import jobs as jobs_service
 from app.services import order as order_service
 
 
@@ -112,6 +113,7 @@ def test_register_login_checkout_flow(full_app: Dict[str, object], monkeypatch:
     assert order_res.status_code == 201, order_res.text
     body = order_res.json()
     assert body["id"]
+    asyncio.run(jobs_service.run_worker(SessionLocal, concurrency=1, once=True))
     assert captured.get("email_sent") is True
 
     # Verify order persisted and tied to user
@@ -15,7 +15,9 @@ def test_healthcheck() -> None:
 def test_readiness() -> None:
     response = client.get("/api/v1/health/ready")
     assert response.status_code == 200
-    assert response.json() == {"status": "ready"}
+    body = response.json()
+    assert body["status"] == "ready"
+    assert "pool" in body["db_pool"]
 
 
 def test_request_id_header() -> None:
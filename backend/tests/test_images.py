@@ -0,0 +1,120 @@
+import asyncio
+import io
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.services import images
+from app.services import storage
+
+
+def _upload(content: bytes, filename: str = "photo.jpg", content_type: str = "image/jpeg") -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename=filename, headers=Headers({"content-type": content_type}))
+
+
+def _jpeg(size: tuple[int, int]) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, (200, 80, 40)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def test_upload_streams_in_chunks_and_variants_render_in_process_pool(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(settings, "media_root", str(tmp_path))
+    monkeypatch.setattr(storage, "UPLOAD_CHUNK_SIZE", 1024)
+    content = _jpeg((1600, 1200))
+
+    with pytest.raises(HTTPException) as exc:
+        storage.save_upload(_upload(content), max_bytes=len(content) - 1)
+    assert exc.value.detail == "File too large"
+    assert list(tmp_path.iterdir()) == []
+
+    url, name = asyncio.run(storage.save_upload_async(_upload(content)))
+    path = tmp_path / name
+    assert path.read_bytes() == content
+
+    async def render() -> list[str]:
+        try:
+            return await images.generate_variants(storage.media_path(url))
+        finally:
+            images.shutdown_pool()
+
+    written = asyncio.run(render())
+    expected = {"sm": 320, "md": 640, "lg": 1024}
+    for suffix, width in expected.items():
+        with Image.open(path.with_name(f"{path.stem}-{suffix}.jpg")) as thumb:
+            assert thumb.size == (width, width * 3 // 4)
+        with Image.open(path.with_name(f"{path.stem}-{suffix}.webp")) as thumb:
+            assert thumb.format == "WEBP"
+            assert thumb.size[0] == width
+    assert len(written) == len(expected) * (1 + len(images.variant_formats()))
+
+    storage.delete_file(url)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_variant_rendering_tolerates_non_images(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setattr(settings, "image_process_workers", 0)
+    path = tmp_path / "broken.jpg"
+    path.write_bytes(b"not an image")
+    assert asyncio.run(images.generate_variants(path)) == []
+
+
+def test_resize_endpoint_serves_cached_derivatives_with_lru_eviction(monkeypatch, tmp_path: Path) -> None:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.services import media_cache
+
+    monkeypatch.setattr(settings, "media_root", str(tmp_path))
+    monkeypatch.setattr(settings, "image_process_workers", 0)
+    monkeypatch.setattr(media_cache, "_cache_bytes", None)
+    (tmp_path / "products").mkdir()
+    source = tmp_path / "products" / "vase.jpg"
+    source.write_bytes(_jpeg((800, 600)))
+    client = TestClient(app)
+
+    res = client.get("/media/resize/products/vase.jpg", params={"w": 200, "fmt": "webp"})
+    assert res.status_code == 200, res.text
+    assert res.headers["content-type"] == "image/webp"
+    # Unversioned URLs revalidate; pinning the source version makes them immutable.
+    assert "immutable" not in res.headers["cache-control"] and "must-revalidate" in res.headers["cache-control"]
+    version = res.headers["X-Media-Version"]
+    pinned = client.get("/media/resize/products/vase.jpg", params={"w": 200, "fmt": "webp", "v": version})
+    assert "immutable" in pinned.headers["cache-control"]
+    with Image.open(io.BytesIO(res.content)) as img:
+        assert img.size == (200, 150)
+    etag = res.headers["etag"]
+
+    assert client.get("/media/resize/products/vase.jpg", params={"w": 200, "fmt": "webp"}).headers["etag"] == etag
+    # nearby widths snap up to the same allowed size
+    assert client.get("/media/resize/products/vase.jpg", params={"w": 199, "fmt": "webp"}).headers["etag"] == etag
+    assert len(media_cache._cache_files()) == 1
+    res = client.get(
+        "/media/resize/products/vase.jpg", params={"w": 200, "fmt": "webp"}, headers={"If-None-Match": etag}
+    )
+    assert res.status_code == 304
+
+    # identical bytes under another name share the derivative
+    (tmp_path / "copy.jpg").write_bytes(source.read_bytes())
+    assert client.get("/media/resize/copy.jpg", params={"w": 200, "fmt": "webp"}).headers["etag"] == etag
+    assert len(media_cache._cache_files()) == 1
+
+    assert client.get("/media/resize/products/vase.jpg", params={"h": 100}).status_code == 200
+    first_size = min(size for _, size, _ in media_cache._cache_files())
+    monkeypatch.setattr(settings, "media_derivative_cache_max_bytes", first_size + 1)
+    assert client.get("/media/resize/products/vase.jpg", params={"w": 64, "h": 64}).status_code == 200
+    assert len(media_cache._cache_files()) == 1
+
+    assert client.get("/media/resize/products/vase.jpg").status_code == 400
+    assert client.get("/media/resize/products/vase.jpg", params={"w": 10, "fmt": "bmp"}).status_code == 400
+    assert client.get("/media/resize/products/vase.jpg", params={"w": 10, "fmt": "gif"}).status_code == 400
+    assert client.get("/media/resize/products/missing.jpg", params={"w": 10}).status_code == 404
+    assert client.get("/media/resize/../etc/passwd", params={"w": 10}).status_code == 404
+    assert client.get("/media/resize/products/vase.jpg", params={"w": 100000}).status_code == 422
+
+    storage.delete_file("/media/products/vase.jpg")
+    assert media_cache._cache_files() == []
@@ -0,0 +1,201 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models.job import BackgroundJob, JobStatus
+from app.services import email as email_service
+from app.services import jobs as jobs_service
+
+
+def test_worker_retries_with_backoff_and_gives_up(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    calls: list[dict] = []
+
+    async def flaky(session, payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError("smtp down")
+
+    async def broken(session, payload):
+        raise RuntimeError("always")
+
+    monkeypatch.setitem(jobs_service.HANDLERS, "test.flaky", flaky)
+    monkeypatch.setitem(jobs_service.HANDLERS, "test.broken", broken)
+    monkeypatch.setattr(jobs_service.settings, "job_retry_base_seconds", 60.0)
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with SessionLocal() as session:
+            flaky_job = await jobs_service.enqueue(session, "test.flaky", {"n": 1})
+            broken_job = await jobs_service.enqueue(session, "test.broken", max_attempts=1)
+            delayed_job = await jobs_service.enqueue(session, "test.flaky", delay_seconds=3600)
+
+        assert await jobs_service.run_worker(SessionLocal, concurrency=1, once=True) == 2
+        async with SessionLocal() as session:
+            flaky_row = await session.get(BackgroundJob, flaky_job.id)
+            assert flaky_row.status == JobStatus.pending
+            assert flaky_row.attempts == 1
+            assert "smtp down" in flaky_row.last_error
+            run_at = flaky_row.run_at.replace(tzinfo=timezone.utc)
+            assert run_at > datetime.now(timezone.utc) + timedelta(seconds=25)
+            broken_row = await session.get(BackgroundJob, broken_job.id)
+            assert broken_row.status == JobStatus.failed
+            assert (await session.get(BackgroundJob, delayed_job.id)).attempts == 0
+
+            # make the retry due
+            await session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == flaky_job.id)
+                .values(run_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+            )
+            await session.commit()
+
+        assert await jobs_service.run_worker(SessionLocal, concurrency=1, once=True) == 1
+        async with SessionLocal() as session:
+            flaky_row = await session.get(BackgroundJob, flaky_job.id)
+            assert flaky_row.status == JobStatus.succeeded
+            assert flaky_row.attempts == 2
+            assert flaky_row.last_error is None
+            stats = await jobs_service.queue_stats(session)
+        assert stats["counts"] == {"pending": 1, "running": 0, "succeeded": 1, "failed": 1}
+        assert stats["by_kind"]["test.broken"]["failed"] == 1
+        assert calls == [{"n": 1}, {"n": 1}]
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_retry_delay_is_capped(monkeypatch):
+    monkeypatch.setattr(jobs_service.settings, "job_retry_base_seconds", 10.0)
+    monkeypatch.setattr(jobs_service.settings, "job_retry_max_seconds", 100.0)
+    assert 5.0 <= jobs_service.retry_delay(1) <= 10.0
+    assert 20.0 <= jobs_service.retry_delay(3) <= 40.0
+    assert 50.0 <= jobs_service.retry_delay(20) <= 100.0
+
+
+def test_worker_that_lost_its_lock_does_not_settle_the_job(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async def reclaimed(session, payload):
+            # Another worker took the job over while this handler was still running.
+            await session.execute(update(BackgroundJob).values(locked_by="other-worker"))
+            await session.commit()
+
+        monkeypatch.setitem(jobs_service.HANDLERS, "test.slow", reclaimed)
+        async with SessionLocal() as session:
+            job = await jobs_service.enqueue(session, "test.slow")
+            claimed = await jobs_service.claim_jobs(session, 1, "first-worker")
+        assert claimed[0].locked_by == "first-worker"
+
+        await jobs_service.run_job(SessionLocal, claimed[0])
+        async with SessionLocal() as session:
+            row = await session.get(BackgroundJob, job.id)
+            assert row.status == JobStatus.running
+            assert row.locked_by == "other-worker"
+        assert jobs_service.metrics_snapshot()["test.slow"]["lost_lock"] == 1
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_periodic_jobs_are_enqueued_once_per_window(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(jobs_service.settings, "job_abandoned_cart_interval_seconds", 3600.0)
+    now = datetime(2026, 1, 1, 12, 5, tzinfo=timezone.utc)
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        assert await jobs_service.schedule_periodic(SessionLocal, now) == 1
+        assert await jobs_service.schedule_periodic(SessionLocal, now + timedelta(minutes=30)) == 0
+        assert await jobs_service.schedule_periodic(SessionLocal, now + timedelta(hours=1)) == 1
+        async with SessionLocal() as session:
+            stats = await jobs_service.queue_stats(session)
+        assert stats["by_kind"]["cart.abandoned_reminders"]["pending"] == 2
+
+        monkeypatch.setattr(jobs_service.settings, "job_abandoned_cart_interval_seconds", 0)
+        assert await jobs_service.schedule_periodic(SessionLocal, now + timedelta(hours=2)) == 0
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_rate_limited_recipients_are_deferred_without_spending_an_attempt(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    jobs_service.load_handlers()
+
+    async def fake_batch(emails, deferred=None):
+        deferred["slow@example.com"] = 40.0
+        return ["bounce@example.com"]
+
+    monkeypatch.setattr(email_service.settings, "smtp_enabled", True)
+    monkeypatch.setattr(email_service, "send_cart_abandonment_batch", fake_batch)
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with SessionLocal() as session:
+            await jobs_service.HANDLERS["email.cart_abandonment_batch"](
+                session, {"emails": ["ok@example.com", "slow@example.com", "bounce@example.com"], "attempt": 2}
+            )
+            rows = (await session.execute(select(BackgroundJob))).scalars().all()
+        requeued = {tuple(json.loads(row.payload)["emails"]): row for row in rows}
+        assert set(requeued) == {("slow@example.com",), ("bounce@example.com",)}
+        assert json.loads(requeued[("bounce@example.com",)].payload)["attempt"] == 3
+        deferred = requeued[("slow@example.com",)]
+        assert json.loads(deferred.payload)["attempt"] == 2
+        assert deferred.run_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) + timedelta(seconds=30)
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_batch_failing_on_its_last_recipient_attempt_is_not_retried_as_a_whole(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    jobs_service.load_handlers()
+    sends: list[list[str]] = []
+
+    async def fake_batch(emails, deferred=None):
+        sends.append(list(emails))
+        deferred["slow@example.com"] = 40.0
+        return ["bounce@example.com"]
+
+    monkeypatch.setattr(email_service.settings, "smtp_enabled", True)
+    monkeypatch.setattr(email_service, "send_cart_abandonment_batch", fake_batch)
+    max_attempts = jobs_service.settings.job_max_attempts
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with SessionLocal() as session:
+            job = await jobs_service.enqueue(
+                session,
+                "email.cart_abandonment_batch",
+                {"emails": ["ok@example.com", "slow@example.com", "bounce@example.com"], "attempt": max_attempts},
+            )
+        assert await jobs_service.run_worker(SessionLocal, concurrency=1, once=True) == 1
+        async with SessionLocal() as session:
+            assert (await session.get(BackgroundJob, job.id)).status == JobStatus.succeeded
+            pending = (
+                await session.execute(select(BackgroundJob).where(BackgroundJob.status == JobStatus.pending))
+            ).scalars().all()
+        # Only the rate-limited recipient is queued again; the delivered one is not mailed twice.
+        assert [json.loads(row.payload)["emails"] for row in pending] == [["slow@example.com"]]
+        assert len(sends) == 1
+        await engine.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core import metrics
+from app.db.base import Base
+from app.db.session import get_session
+from app.main import app
+
+
+def test_metrics_exposition_has_route_histograms_and_events() -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def init_models() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(init_models())
+
+    async def override_get_session():
+        async with SessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    metrics.reset()
+    client = TestClient(app)
+    assert client.get("/api/v1/health").status_code == 200
+    assert client.get("/api/v1/content/pages/missing-page").status_code == 404
+    assert client.get("/api/v1/no-such-route").status_code == 404
+    metrics.record_signup()
+
+    res = client.get("/api/v1/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = res.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/health",status="200"} 1' in body
+    assert 'route="/api/v1/content/pages/{slug}"' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/v1/health",status="200",le="+Inf"} 1' in body
+    assert 'app_events_total{event="signups"} 1' in body
+    assert 'route="unmatched",status="404"' in body
+    assert "missing-page" not in body
+    client.close()
+    app.dependency_overrides.clear()
+
+
+def test_multiprocess_render_sums_workers_and_drops_dead_gauges(tmp_path, monkeypatch) -> None:
+    metrics.reset()
+    monkeypatch.setattr(metrics.settings, "metrics_multiproc_dir", str(tmp_path))
+    dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    dead_pid = int(dead.stdout)
+    (tmp_path / f"metrics-{dead_pid}.json").write_text(
+        json.dumps(
+            {
+                "app_events_total": [[["logins"], 4]],
+                "http_requests_in_flight": [[[], 7]],
+                "db_query_duration_seconds": [[["SELECT"], [1] + [0] * 12 + [0.0004]]],
+            }
+        )
+    )
+    metrics.record_login_success()
+    metrics.db_query_duration.observe(0.002, operation="SELECT")
+
+    body = metrics.render()
+    assert 'app_events_total{event="logins"} 5' in body
+    assert "http_requests_in_flight 7" not in body
+    assert 'db_query_duration_seconds_count{operation="SELECT"} 2' in body
+    assert 'db_query_duration_seconds_bucket{operation="SELECT",le="0.0005"} 1' in body
+    assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
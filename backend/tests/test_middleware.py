@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.responses import PlainTextResponse, StreamingResponse
+
+from app.core.logging_config import request_id_ctx_var
+from app.db.base import Base
+from app.middleware import RequestPipelineMiddleware
+from app.models.audit import AuditEvent
+from app.services import audit as audit_service
+
+
+def _scope(path: str = "/api/v1/things", headers: list[tuple[bytes, bytes]] | None = None) -> dict:
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "headers": headers or [],
+        "query_string": b"",
+        "client": ("10.0.0.1", 4000),
+    }
+
+
+def test_pipeline_streams_and_audits_with_request_id(monkeypatch, caplog) -> None:
+    sink = audit_service.AuditSink()
+    monkeypatch.setattr(audit_service, "sink", sink)
+    seen_ids: list[str | None] = []
+    release = asyncio.Event()
+
+    async def app(scope, receive, send):
+        body_bytes = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body_bytes += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        seen_ids.append(request_id_ctx_var.get())
+
+        async def body():
+            yield b"first"
+            await release.wait()
+            yield b"second"
+
+        if scope["path"] == "/api/v1/stream":
+            await StreamingResponse(body())(scope, receive, send)
+        else:
+            await PlainTextResponse(body_bytes)(scope, receive, send)
+
+    pipeline = RequestPipelineMiddleware(app, max_concurrent=1)
+
+    async def run():
+        sent: list[dict] = []
+        payload = json.dumps({"email": "a@b.c", "qty": 2}).encode()
+        pending = [
+            {"type": "http.request", "body": payload[:5], "more_body": True},
+            {"type": "http.request", "body": payload[5:], "more_body": False},
+        ]
+
+        async def receive():
+            if pending:
+                return pending.pop(0)
+            await asyncio.Event().wait()
+
+        async def send(message):
+            sent.append(message)
+
+        headers = [(b"content-type", b"application/json")]
+        await pipeline(_scope(headers=headers), receive, send)
+        assert sent[-1]["body"] == payload
+
+        # While a streamed response is in flight it holds the only slot; the first chunk is already out.
+        stream_sent: list[dict] = []
+
+        async def stream_send(message):
+            stream_sent.append(message)
+
+        pending.append({"type": "http.request", "body": b"", "more_body": False})
+        streaming = asyncio.create_task(pipeline(_scope("/api/v1/stream"), receive, stream_send))
+        while len(stream_sent) < 2:
+            await asyncio.sleep(0)
+        assert stream_sent[1]["body"] == b"first"
+
+        rejected: list[dict] = []
+
+        async def rejected_send(message):
+            rejected.append(message)
+
+        await pipeline(_scope(), receive, rejected_send)
+        release.set()
+        await streaming
+        return sent, stream_sent, rejected
+
+    sent, stream_sent, rejected = asyncio.run(run())
+    assert sink.stats()["queue_depth"] == 3
+    with caplog.at_level(logging.INFO, logger="app.audit"):
+        assert asyncio.run(sink.flush()) == 3
+
+    start_headers = dict(sent[0]["headers"])
+    request_id = start_headers[b"x-request-id"].decode()
+    assert seen_ids[0] == request_id
+    assert start_headers[b"x-content-type-options"] == b"nosniff"
+    assert [m.get("body") for m in stream_sent[1:]] == [b"first", b"second", b""]
+    assert rejected[0]["status"] == 429
+    assert b"x-request-id" in dict(rejected[0]["headers"])
+
+    audits = [r for r in caplog.records if r.name == "app.audit"]
+    assert audits[0].request_id == request_id
+    assert audits[0].request_payload == {"email": "***", "qty": 2}
+    assert audits[0].client_ip == "10.0.0.1"
+    assert [r.status_code for r in audits] == [200, 429, 200]
+
+
+def test_audit_sink_batches_into_table_and_counts_drops(monkeypatch) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(audit_service.settings, "audit_sink", "db")
+    monkeypatch.setattr(audit_service.settings, "audit_queue_max", 3)
+    monkeypatch.setattr(audit_service.settings, "audit_batch_size", 2)
+    sink = audit_service.AuditSink(session_factory=SessionLocal)
+
+    def record(n: int) -> bool:
+        return sink.record(
+            audit_service.AuditRecord(
+                request_id=f"req-{n}",
+                method="POST",
+                path="/api/v1/auth/login",
+                status_code=200,
+                client_ip="127.0.0.1",
+                duration_ms=3,
+                body=b'{"password": "secret"}',
+            )
+        )
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        assert [record(n) for n in range(4)] == [True, True, True, False]
+        assert await sink.flush() == 3
+        async with SessionLocal() as session:
+            rows = (await session.execute(select(AuditEvent).order_by(AuditEvent.request_id))).scalars().all()
+        await engine.dispose()
+        return rows
+
+    rows = asyncio.run(run())
+    assert [row.request_id for row in rows] == ["req-0", "req-1", "req-2"]
+    assert json.loads(rows[0].request_payload) == {"password": "***"}
+    assert rows[0].user_id is None
+    stats = sink.stats()
+    assert (stats["written"], stats["dropped"], stats["batches"], stats["queue_depth"]) == (3, 1, 2, 0)
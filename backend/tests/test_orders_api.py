@@ -20,6 +20,7 @@ from app.schemas.user import UserCreate
 from app.services import order as order_service
 from app.services import payments as payments_service
 from app.services import email as email_service
+from app.services import jobs as jobs_service
 from app.schemas.order import ShippingMethodCreate
 
 
@@ -135,6 +136,8 @@ def test_order_create_and_admin_updates(test_app: Dict[str, object]) -> None:
     assert float(order["shipping_amount"]) >= 0
     order_id = order["id"]
     item_id = order["items"][0]["id"]
+    assert sent["count"] == 0
+    asyncio.run(jobs_service.run_worker(SessionLocal, concurrency=1, once=True))
     assert sent["count"] == 1
 
     retry = client.post(f"/api/v1/orders/admin/{order_id}/retry-payment", headers=auth_headers(admin_token))
@@ -196,10 +199,11 @@ def test_order_create_and_admin_updates(test_app: Dict[str, object]) -> None:
     assert packing.status_code == 200
     assert "Packing slip for order" in packing.text
     assert "Items:" in packing.text
-    assert sent["shipped"] == 1
 
     delivery = client.post(f"/api/v1/orders/admin/{order_id}/delivery-email", headers=auth_headers(admin_token))
     assert delivery.status_code == 200
+    asyncio.run(jobs_service.run_worker(SessionLocal, concurrency=1, once=True))
+    assert sent["shipped"] == 1
     assert sent["delivered"] == 1
 
 
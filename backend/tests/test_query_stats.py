@@ -0,0 +1,75 @@
+import asyncio
+import logging
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import query_stats
+from app.db.base import Base
+from app.db.session import get_session
+from app.main import app
+
+
+def test_fingerprint_collapses_literals_and_in_lists() -> None:
+    a = query_stats.fingerprint("SELECT * FROM products WHERE id IN (?, ?, ?) AND stock > 5")
+    b = query_stats.fingerprint("SELECT *  FROM products\n WHERE id IN ($1) AND stock > 10")
+    c = query_stats.fingerprint("SELECT * FROM products WHERE slug = 'vase'")
+    assert a[0] == b[0]
+    assert a[1] == "SELECT * FROM products WHERE id IN (?) AND stock > ?"
+    assert c[0] != a[0]
+
+
+def test_repeated_statements_in_one_unit_are_flagged(caplog) -> None:
+    query_stats.reset()
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+
+    async def run():
+        async with engine.connect() as conn:
+            await conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+            with query_stats.track("job test") as stats:
+                for item_id in range(6):
+                    await conn.execute(text("SELECT id FROM items WHERE id = :id"), {"id": item_id})
+                await conn.execute(text("SELECT count(*) FROM items"))
+        await engine.dispose()
+        return stats
+
+    with caplog.at_level(logging.WARNING, logger="app.db.queries"):
+        stats = asyncio.run(run())
+    assert stats.count == 7
+    flagged = [r for r in caplog.records if r.getMessage() == "probable_n_plus_one"]
+    assert len(flagged) == 1
+    assert flagged[0].executions == 6 and flagged[0].unit == "job test"
+
+    top = query_stats.top(order_by="calls")
+    assert top[0]["statement"] == "SELECT id FROM items WHERE id = ?"
+    assert (top[0]["calls"], top[0]["n_plus_one"]) == (6, 1)
+
+
+def test_debug_header_reports_request_queries(monkeypatch) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def init_models() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(init_models())
+
+    async def override_get_session():
+        async with SessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    monkeypatch.setattr(query_stats.settings, "db_query_debug_header", True)
+    client = TestClient(app)
+    try:
+        res = client.get("/api/v1/content/pages/missing-page")
+        assert res.status_code == 404
+        assert int(res.headers["X-DB-Queries"]) >= 1
+        assert float(res.headers["X-DB-Time-Ms"]) >= 0
+        monkeypatch.setattr(query_stats.settings, "db_query_debug_header", False)
+        assert "X-DB-Queries" not in client.get("/api/v1/health").headers
+    finally:
+        client.close()
+        app.dependency_overrides.clear()
@@ -6,6 +6,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.api.v1 import auth as auth_api
+from app.core import rate_limit
 from app.db.base import Base
 from app.db.session import get_session
 from app.main import app
@@ -27,26 +28,12 @@ def rate_limit_app() -> Dict[str, object]:
             yield session
 
     app.dependency_overrides[get_session] = override_get_session
-    for dep in [
-        auth_api.login_rate_limit,
-        auth_api.register_rate_limit,
-        auth_api.refresh_rate_limit,
-        auth_api.reset_request_rate_limit,
-        auth_api.reset_confirm_rate_limit,
-    ]:
-        dep.buckets.clear()
+    asyncio.run(rate_limit.reset())
     client = TestClient(app)
     yield {"client": client}
     client.close()
     app.dependency_overrides.clear()
-    for dep in [
-        auth_api.login_rate_limit,
-        auth_api.register_rate_limit,
-        auth_api.refresh_rate_limit,
-        auth_api.reset_request_rate_limit,
-        auth_api.reset_confirm_rate_limit,
-    ]:
-        dep.buckets.clear()
+    asyncio.run(rate_limit.reset())
 
 
 def test_login_rate_limiter(rate_limit_app: Dict[str, object]) -> None:
@@ -55,10 +42,70 @@ def test_login_rate_limiter(rate_limit_app: Dict[str, object]) -> None:
     res = client.post("/api/v1/auth/register", json=payload)
     assert res.status_code == 201, res.text
 
+    # The full burst goes through; after that only the slow steady refill does, so a 429 follows shortly.
     limit = auth_api.settings.auth_rate_limit_login
-    for _ in range(limit):
-        ok = client.post("/api/v1/auth/login", json={"email": payload["email"], "password": payload["password"]})
-        assert ok.status_code == 200, ok.text
+    statuses = []
+    for _ in range(limit * 2):
+        res = client.post("/api/v1/auth/login", json={"email": payload["email"], "password": payload["password"]})
+        statuses.append(res.status_code)
+        if res.status_code == 429:
+            blocked = res
+            break
+    assert statuses[:limit] == [200] * limit
+    assert statuses[-1] == 429
+    assert int(blocked.headers["Retry-After"]) >= 1
 
-    blocked = client.post("/api/v1/auth/login", json={"email": payload["email"], "password": payload["password"]})
-    assert blocked.status_code == 429
+
+def test_memory_store_gcra_burst_then_steady_rate() -> None:
+    clock = [1000.0]
+    store = rate_limit.MemoryRateStore(max_keys=2, clock=lambda: clock[0])
+
+    async def take(key: str) -> float:
+        return await store.take(key, 6.0, 60.0)  # 10 per minute
+
+    async def run():
+        assert [await take("a") for _ in range(10)] == [0.0] * 10
+        assert await take("a") == pytest.approx(6.0)
+        clock[0] += 6.0
+        assert await take("a") == 0.0
+        assert await take("a") > 0
+        # bounded: the least recently used key is evicted
+        await take("b")
+        await take("c")
+        assert len(store) == 2 and "a" not in store._tats
+        # idle keys expire once their allowance has fully refilled
+        clock[0] += 61.0
+        await take("d")
+        assert list(store._tats) == ["d"]
+
+    asyncio.run(run())
+
+
+def test_full_burst_is_allowed_at_fractional_clock_values() -> None:
+    # Summing 60 / limit intervals in floats used to overshoot the window by ~1e-12 and reject the last one.
+    for now in (1000.1, 123456.789, 0.3, 987654.321):
+        for limit in (3, 7, 10, 60):
+            store = rate_limit.MemoryRateStore(clock=lambda now=now: now)
+
+            async def burst(store=store, limit=limit) -> list[float]:
+                return [await store.take("k", 60 / limit, 60.0) for _ in range(limit + 1)]
+
+            waits = asyncio.run(burst())
+            assert waits[:limit] == [0.0] * limit, (now, limit)
+            assert waits[limit] > 0
+
+
+def test_shared_store_is_visible_across_instances(tmp_path) -> None:
+    path = str(tmp_path / "ratelimit")
+    first = rate_limit.SharedMemoryRateStore(path, slots=64)
+    second = rate_limit.SharedMemoryRateStore(path, slots=64)
+
+    async def run():
+        assert await first.take("auth:login", 30.0, 60.0) == 0.0
+        assert await second.take("auth:login", 30.0, 60.0) == 0.0
+        assert await first.take("auth:login", 30.0, 60.0) > 0
+        assert await second.take("auth:other", 30.0, 60.0) == 0.0
+        await second.clear()
+        assert await first.take("auth:login", 30.0, 60.0) == 0.0
+
+    asyncio.run(run())
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core import cache
+from app.db import replicas
+from app.db.base import Base
+from app.db.session import get_session
+from app.main import app
+from app.models.catalog import Category
+from app.models.content import ContentBlock, ContentStatus
+
+
+def _database(url: str, title: str):
+    engine = create_async_engine(url, future=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def init() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with SessionLocal() as session:
+            session.add(ContentBlock(key="home.hero", title=title, body_markdown="-", status=ContentStatus.published))
+            await session.commit()
+
+    asyncio.run(init())
+    return engine, SessionLocal
+
+
+@pytest.fixture
+def two_databases(tmp_path):
+    primary_engine, PrimarySession = _database(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}", "from primary")
+    replica_url = f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"
+    replica_engine, _ = _database(replica_url, "from replica")
+
+    async def override_get_session():
+        async with PrimarySession() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    replica_set = replicas.configure([replica_url, f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'down.db'}"])
+    client = TestClient(app)
+    yield client, replica_set
+    client.close()
+    app.dependency_overrides.clear()
+    replicas.configure([])
+    asyncio.run(replica_set.dispose())
+    asyncio.run(primary_engine.dispose())
+    asyncio.run(replica_engine.dispose())
+
+
+def test_reads_go_to_healthy_replica_until_the_client_writes(two_databases):
+    client, replica_set = two_databases
+    healthy, broken = replica_set.replicas
+
+    asyncio.run(replica_set.check())
+    assert healthy.healthy and not broken.healthy
+
+    for _ in range(3):
+        resp = client.get("/api/v1/content/home.hero")
+        assert resp.status_code == 200
+        assert resp.json()["title"] == "from replica"
+    assert healthy.served == 3
+
+    register = client.post(
+        "/api/v1/auth/register", json={"email": "rw@example.com", "password": "rwpass123", "name": "RW"}
+    )
+    assert register.status_code == 201
+    assert replicas.READ_PRIMARY_COOKIE in register.headers["set-cookie"]
+
+    resp = client.get("/api/v1/content/home.hero")
+    assert resp.json()["title"] == "from primary"
+    assert replica_set.stats()["primary_fallbacks"] == 1
+
+
+def test_failing_replica_is_taken_out_of_rotation(two_databases):
+    client, replica_set = two_databases
+    healthy, broken = replica_set.replicas
+    replica_set.replicas = [broken, healthy]
+
+    with pytest.raises(OperationalError):
+        client.get("/api/v1/content/home.hero")
+    assert not broken.healthy and broken.failures == 1
+
+    resp = client.get("/api/v1/content/home.hero")
+    assert resp.json()["title"] == "from replica"
+
+
+def test_catalog_cache_does_not_keep_lagging_replica_reads(two_databases, tmp_path, monkeypatch):
+    client, replica_set = two_databases
+    replica_set.replicas = replica_set.replicas[:1]
+
+    # A category written on the primary that the replica has not replicated yet.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def write_primary() -> None:
+        async with SessionLocal() as session:
+            session.add(Category(slug="fresh", name="Fresh"))
+            await session.commit()
+        await cache.invalidate(cache.CATALOG_NAMESPACE)
+        await engine.dispose()
+
+    asyncio.run(write_primary())
+
+    resp = client.get("/api/v1/catalog/categories")
+    assert resp.json() == [] and resp.headers["X-Cache"] == "MISS"
+    # Served from the replica so soon after the invalidation, so it was not cached.
+    assert client.get("/api/v1/catalog/categories").headers["X-Cache"] == "MISS"
+
+    client.cookies.set(replicas.READ_PRIMARY_COOKIE, "1")
+    resp = client.get("/api/v1/catalog/categories")
+    assert resp.headers["X-Cache"] == "BYPASS" and [c["slug"] for c in resp.json()] == ["fresh"]
+    client.cookies.clear()
+
+    monkeypatch.setattr(replicas.settings, "db_read_your_writes_seconds", 0)
+    assert client.get("/api/v1/catalog/categories").headers["X-Cache"] == "MISS"
+    assert client.get("/api/v1/catalog/categories").headers["X-Cache"] == "HIT"
@@ -1,7 +1,10 @@
 import asyncio
 
+import pytest
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from app.core import security
 from app.db.base import Base
 from app.services import auth as auth_service
 from app.schemas.user import UserCreate
@@ -20,3 +23,48 @@ def test_auth_service_register_and_login():
             assert found.id == user.id
 
     asyncio.run(run_flow())
+
+
+def test_login_rehashes_when_cost_changes_and_guests_skip_hashing(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(security.settings, "password_bcrypt_rounds", 4)
+
+    async def run_flow():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with SessionLocal() as session:
+            user = await auth_service.create_user(session, UserCreate(email="cost@example.com", password="costpass1"))
+            assert user.hashed_password.startswith("$2b$04$")
+
+            monkeypatch.setattr(security.settings, "password_bcrypt_rounds", 5)
+            await auth_service.authenticate_user(session, "cost@example.com", "costpass1")
+            assert user.hashed_password.startswith("$2b$05$")
+            assert not security.password_needs_rehash(user.hashed_password)
+
+            guest = await auth_service.create_user(
+                session, UserCreate(email="guest@example.com", password="throwaway"), usable_password=False
+            )
+            assert not guest.hashed_password.startswith("$2")
+            assert await security.verify_password_async("throwaway", guest.hashed_password) is False
+            with pytest.raises(HTTPException):
+                await auth_service.authenticate_user(session, "guest@example.com", "throwaway")
+
+    asyncio.run(run_flow())
+
+
+def test_password_hasher_sheds_when_queue_is_full(monkeypatch):
+    monkeypatch.setattr(security.settings, "password_bcrypt_rounds", 4)
+    monkeypatch.setattr(security.settings, "password_hash_max_queue", 0)
+    hasher = security.PasswordHasher()
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(hasher.run(security.hash_password, "secret123"))
+    assert exc.value.status_code == 503
+
+    monkeypatch.setattr(security.settings, "password_hash_max_queue", 8)
+    hashed = asyncio.run(hasher.run(security.hash_password, "secret123"))
+    assert security.verify_password("secret123", hashed)
+    stats = hasher.stats()
+    assert (stats["queued"], stats["running"], stats["completed"], stats["rejected"]) == (0, 0, 1, 1)
+    hasher.shutdown()
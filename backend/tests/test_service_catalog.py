@@ -1,12 +1,14 @@
 import asyncio
 from decimal import Decimal
 
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.db.base import Base
-from app.models.catalog import Category
+from app.models.catalog import Category, Product, ProductStatus, RecentlyViewedProduct
 from app.schemas.catalog import ProductCreate
 from app.services import catalog as catalog_service
+from app.services import recently_viewed
 
 
 def test_catalog_service_create_and_slug():
@@ -38,3 +40,53 @@ def test_catalog_service_create_and_slug():
             await catalog_service.update_product(session, prod, ProductCreate.model_construct(name="Updated"), commit=True)  # type: ignore[arg-type]
 
     asyncio.run(run_flow())
+
+
+def test_recently_viewed_is_buffered_then_flushed_in_bulk(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(recently_viewed.settings, "recently_viewed_limit", 2)
+    buffer = recently_viewed.ViewBuffer(session_factory=SessionLocal)
+    monkeypatch.setattr(recently_viewed, "buffer", buffer)
+
+    async def run_flow():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with SessionLocal() as session:
+            category = Category(slug="rv-cat", name="RV")
+            session.add(category)
+            await session.flush()
+            products = [
+                Product(
+                    category_id=category.id,
+                    slug=f"rv-{n}",
+                    name=f"RV {n}",
+                    base_price=Decimal("1.00"),
+                    currency="USD",
+                    status=ProductStatus.published,
+                )
+                for n in range(3)
+            ]
+            session.add_all(products)
+            await session.commit()
+
+            for product in [products[0], products[1], products[0], products[2]]:
+                catalog_service.record_recently_viewed(product, None, "sess-rv")
+            assert buffer.stats()["pending"] == 3
+
+            # Not flushed yet: served from the buffer, newest first.
+            recent = await catalog_service.get_recently_viewed(session, None, "sess-rv", limit=5)
+            assert [p.slug for p in recent] == ["rv-2", "rv-0", "rv-1"]
+            assert (await session.scalar(select(func.count()).select_from(RecentlyViewedProduct))) == 0
+
+            assert await buffer.flush() == 3
+            catalog_service.record_recently_viewed(products[1], None, "sess-rv")
+            await buffer.flush()
+
+        async with SessionLocal() as session:
+            rows = (await session.execute(select(RecentlyViewedProduct))).scalars().all()
+            assert sorted(row.product_id for row in rows) == sorted([products[1].id, products[2].id])
+            recent = await catalog_service.get_recently_viewed(session, None, "sess-rv", limit=5)
+            assert [p.slug for p in recent] == ["rv-1", "rv-2"]
+
+    asyncio.run(run_flow())
@@ -0,0 +1,295 @@
+import asyncio
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.db.session import get_session
+from app.main import app
+from app.models.cart import Cart, CartItem
+from app.models.catalog import Category, Product
+from app.models.inventory import ReservationStatus, StockReservation
+from app.models.order import Order, OrderEvent, OrderItem
+from app.models.user import UserRole
+from app.schemas.user import UserCreate
+from app.services import inventory
+from app.services import order as order_service
+from app.services import payments as payments_service
+from app.services.auth import create_user, issue_tokens_for_user
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # A file database so concurrent sessions get their own connections and real write locks.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stock.db'}", future=True)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def init_models() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(init_models())
+    yield SessionLocal
+    asyncio.run(engine.dispose())
+
+
+def seed_product(session_factory, stock: int) -> UUID:
+    async def seed():
+        async with session_factory() as session:
+            product = Product(
+                category=Category(slug="drop", name="Drop"),
+                slug="limited",
+                name="Limited",
+                base_price=Decimal("30.00"),
+                currency="USD",
+                stock_quantity=stock,
+            )
+            session.add(product)
+            await session.commit()
+            return product.id
+
+    return asyncio.run(seed())
+
+
+async def _stock(session_factory, product_id: UUID) -> int:
+    async with session_factory() as session:
+        return await session.scalar(select(Product.stock_quantity).where(Product.id == product_id))
+
+
+def test_parallel_reservations_never_oversell(session_factory) -> None:
+    product_id = seed_product(session_factory, stock=5)
+
+    async def checkout() -> bool:
+        async with session_factory() as session:
+            try:
+                await inventory.reserve(session, [(product_id, None, 1)])
+            except HTTPException as exc:
+                assert exc.status_code == 400
+                return False
+            return True
+
+    async def run() -> list[bool]:
+        return await asyncio.gather(*(checkout() for _ in range(12)))
+
+    outcomes = asyncio.run(run())
+    assert outcomes.count(True) == 5
+    assert asyncio.run(_stock(session_factory, product_id)) == 0
+
+    async def totals():
+        async with session_factory() as session:
+            return await inventory.active_totals(session)
+
+    assert asyncio.run(totals()) == {"active_reservations": 5, "reserved_units": 5}
+
+
+def test_expired_reservations_are_released_once(session_factory) -> None:
+    product_id = seed_product(session_factory, stock=5)
+
+    async def scenario():
+        async with session_factory() as session:
+            held = await inventory.reserve(session, [(product_id, None, 2), (product_id, None, 1)], ttl_minutes=0)
+            assert len(held) == 1 and held[0].quantity == 3
+        assert await _stock(session_factory, product_id) == 2
+
+        sweeper = inventory.ReservationSweeper(session_factory)
+        assert await sweeper.sweep() == 1
+        assert await sweeper.sweep() == 0
+        async with session_factory() as session:
+            assert await inventory.release(session, held) == 0
+            reservation = await session.get(StockReservation, held[0].id)
+            assert reservation.status == ReservationStatus.released
+        assert await _stock(session_factory, product_id) == 5
+
+    asyncio.run(scenario())
+
+
+def test_order_holds_stock_until_payment_settles(session_factory, monkeypatch) -> None:
+    product_id = seed_product(session_factory, stock=5)
+
+    async def override_get_session():
+        async with session_factory() as session:
+            yield session
+
+    async def seed_users():
+        async with session_factory() as session:
+            buyer = await create_user(session, UserCreate(email="drop@example.com", password="droppass", name="Drop"))
+            admin = await create_user(session, UserCreate(email="ops@example.com", password="opspass1", name="Ops"))
+            admin.role = UserRole.admin
+            session.add(Cart(user_id=buyer.id, items=[CartItem(product_id=product_id, quantity=6, unit_price_at_add=30)]))
+            await session.commit()
+            return (
+                (await issue_tokens_for_user(session, buyer))["access_token"],
+                (await issue_tokens_for_user(session, admin))["access_token"],
+            )
+
+    token, admin_token = asyncio.run(seed_users())
+    app.dependency_overrides[get_session] = override_get_session
+    client = TestClient(app)
+    try:
+        headers = {"Authorization": f"Bearer {token}"}
+        res = client.post("/api/v1/orders", json={}, headers=headers)
+        assert res.status_code == 400 and res.json()["detail"] == "Insufficient stock"
+        assert asyncio.run(_stock(session_factory, product_id)) == 5
+
+        async def set_quantity():
+            async with session_factory() as session:
+                item = (await session.execute(select(CartItem))).scalar_one()
+                item.quantity = 2
+                await session.commit()
+
+        asyncio.run(set_quantity())
+        res = client.post("/api/v1/orders", json={}, headers=headers)
+        assert res.status_code == 201, res.text
+        order_id = UUID(res.json()["id"])
+        assert asyncio.run(_stock(session_factory, product_id)) == 3
+
+        async def attach_intent():
+            async with session_factory() as session:
+                order = await session.get(Order, order_id)
+                order.stripe_payment_intent_id = "pi_drop"
+                await session.commit()
+
+        asyncio.run(attach_intent())
+
+        def webhook(event_type: str):
+            async def fake_handle(payload, sig_header):
+                return {"type": event_type, "data": {"object": {"id": "pi_drop"}}}
+
+            monkeypatch.setattr(payments_service, "handle_webhook_event", fake_handle)
+            return client.post("/api/v1/payments/webhook", content=b"{}")
+
+        assert webhook("payment_intent.payment_failed").status_code == 200
+        assert asyncio.run(_stock(session_factory, product_id)) == 5
+
+        admin = {"Authorization": f"Bearer {admin_token}"}
+        retry = client.post(f"/api/v1/orders/admin/{order_id}/retry-payment", headers=admin)
+        assert retry.status_code == 200
+        assert any(evt["event"] == "stock_released" for evt in retry.json()["events"])
+        assert asyncio.run(_stock(session_factory, product_id)) == 3
+
+        assert webhook("payment_intent.succeeded").status_code == 200
+        assert webhook("payment_intent.payment_failed").status_code == 200
+        assert asyncio.run(_stock(session_factory, product_id)) == 3
+    finally:
+        client.close()
+        app.dependency_overrides.clear()
+
+
+def test_order_paid_after_its_reservation_expired(session_factory) -> None:
+    product_id = seed_product(session_factory, stock=3)
+
+    async def place_order(email: str, quantity: int) -> UUID:
+        async with session_factory() as session:
+            user = await create_user(session, UserCreate(email=email, password="latepass1", name="Late"))
+            order = Order(
+                user_id=user.id,
+                total_amount=30 * quantity,
+                items=[OrderItem(product_id=product_id, quantity=quantity, unit_price=30, subtotal=30 * quantity)],
+            )
+            session.add(order)
+            await session.commit()
+            held = await inventory.reserve(session, [(product_id, None, quantity)], ttl_minutes=0)
+            await inventory.assign_order(session, held, order.id)
+            return order.id
+
+    async def events(order_id: UUID) -> list[str]:
+        async with session_factory() as session:
+            return list(await session.scalars(select(OrderEvent.event).where(OrderEvent.order_id == order_id)))
+
+    async def scenario():
+        late = await place_order("late@example.com", 2)
+        assert await inventory.ReservationSweeper(session_factory).sweep() == 1
+        assert await _stock(session_factory, product_id) == 3
+
+        # The units are still there: the payment takes them again.
+        async with session_factory() as session:
+            assert await inventory.commit_for_order(session, late) == 1
+            assert await inventory.commit_for_order(session, late) == 0
+        assert await _stock(session_factory, product_id) == 1
+
+        # This time another checkout bought the units before the payment arrived.
+        lapsed = await place_order("lapsed@example.com", 1)
+        await inventory.ReservationSweeper(session_factory).sweep()
+        async with session_factory() as session:
+            await inventory.reserve(session, [(product_id, None, 1)])
+            assert await inventory.commit_for_order(session, lapsed) == 0
+        assert await _stock(session_factory, product_id) == 0
+        assert await events(lapsed) == ["stock_shortfall"]
+        assert await events(late) == []
+
+    asyncio.run(scenario())
+
+
+def test_failed_order_build_gives_reserved_stock_back(session_factory, monkeypatch) -> None:
+    product_id = seed_product(session_factory, stock=5)
+
+    async def override_get_session():
+        async with session_factory() as session:
+            yield session
+
+    async def seed_buyer() -> str:
+        async with session_factory() as session:
+            buyer = await create_user(session, UserCreate(email="build@example.com", password="buildpass", name="B"))
+            session.add(Cart(user_id=buyer.id, items=[CartItem(product_id=product_id, quantity=2, unit_price_at_add=30)]))
+            await session.commit()
+            return (await issue_tokens_for_user(session, buyer))["access_token"]
+
+    async def broken_build(*args, **kwargs):
+        raise HTTPException(status_code=409, detail="Reference code collision")
+
+    token = asyncio.run(seed_buyer())
+    monkeypatch.setattr(order_service, "build_order_from_cart", broken_build)
+    app.dependency_overrides[get_session] = override_get_session
+    client = TestClient(app)
+    try:
+        res = client.post("/api/v1/orders", json={}, headers={"Authorization": f"Bearer {token}"})
+        assert res.status_code == 409
+        assert asyncio.run(_stock(session_factory, product_id)) == 5
+    finally:
+        client.close()
+        app.dependency_overrides.clear()
+
+
+def test_reservations_invalidate_cached_catalog_reads(session_factory) -> None:
+    product_id = seed_product(session_factory, stock=4)
+
+    async def publish():
+        async with session_factory() as session:
+            product = await session.get(Product, product_id)
+            product.status = "published"
+            await session.commit()
+
+    asyncio.run(publish())
+
+    async def override_get_session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    client = TestClient(app)
+    try:
+        assert client.get("/api/v1/catalog/products/limited").json()["stock_quantity"] == 4
+        assert client.get("/api/v1/catalog/products/limited").headers["X-Cache"] == "HIT"
+
+        async def reserve():
+            async with session_factory() as session:
+                return await inventory.reserve(session, [(product_id, None, 3)])
+
+        held = asyncio.run(reserve())
+        detail = client.get("/api/v1/catalog/products/limited")
+        assert detail.headers["X-Cache"] == "MISS" and detail.json()["stock_quantity"] == 1
+
+        async def release():
+            async with session_factory() as session:
+                await inventory.release(session, held)
+
+        asyncio.run(release())
+        assert client.get("/api/v1/catalog/products/limited").json()["stock_quantity"] == 4
+    finally:
+        client.close()
+        app.dependency_overrides.clear()